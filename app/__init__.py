@@ -7,14 +7,45 @@ import os
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(test_config=None):
     # Création de l'application Flask
     app = Flask(__name__)
     
     # Configuration
     app.config['SECRET_KEY'] = 'votre_clé_secrète_provisoire'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///gabonmeteo.db'
+    # Base de données (DATABASE_URL, hérité par les processus de travail ; 'sqlite://' = en mémoire)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///gabonmeteo.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Répertoire des modèles ML persistés (registre par station)
+    app.config['ML_MODELS_DIR'] = os.environ.get('ML_MODELS_DIR', os.path.join(app.instance_path, 'ml_models'))
+    # Processus dédiés aux entraînements en arrière-plan
+    app.config['TRAINING_WORKERS'] = int(os.environ.get('TRAINING_WORKERS', 2))
+    # Durée (secondes) après laquelle un travail d'entraînement encore actif est considéré abandonné
+    app.config['TRAINING_JOB_TIMEOUT'] = int(os.environ.get('TRAINING_JOB_TIMEOUT', 2 * 3600))
+    # Pulsation des travaux en cours (secondes) et silence au-delà duquel un travail est abandonné
+    app.config['TRAINING_JOB_HEARTBEAT'] = int(os.environ.get('TRAINING_JOB_HEARTBEAT', 30))
+    app.config['TRAINING_JOB_HEARTBEAT_TIMEOUT'] = int(os.environ.get('TRAINING_JOB_HEARTBEAT_TIMEOUT', 5 * 60))
+    # Projection mémoire des modèles chargés par joblib ('r' pour partager les pages entre processus)
+    app.config['ML_MODEL_MMAP_MODE'] = os.environ.get('ML_MODEL_MMAP_MODE') or None
+    # Cache disque des diagrammes rendus (PNG), borné en taille
+    app.config['DIAGRAM_CACHE_DIR'] = os.environ.get('DIAGRAM_CACHE_DIR', os.path.join(app.instance_path, 'diagram_cache'))
+    app.config['DIAGRAM_CACHE_MAX_BYTES'] = int(os.environ.get('DIAGRAM_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    # Pool de rendu des diagrammes (processus préchauffés, délai par requête, file bornée)
+    app.config['DIAGRAM_RENDER_WORKERS'] = int(os.environ.get('DIAGRAM_RENDER_WORKERS', 2))
+    app.config['DIAGRAM_RENDER_TIMEOUT'] = float(os.environ.get('DIAGRAM_RENDER_TIMEOUT', 30))
+    app.config['DIAGRAM_RENDER_MAX_QUEUE'] = int(os.environ.get('DIAGRAM_RENDER_MAX_QUEUE', 32))
+    # Cache des prévisions (durée de vie, LRU mémoire, fichier SQLite partagé entre workers si défini)
+    app.config['FORECAST_CACHE_TTL'] = int(os.environ.get('FORECAST_CACHE_TTL', 3600))
+    app.config['FORECAST_CACHE_MAX_ENTRIES'] = int(os.environ.get('FORECAST_CACHE_MAX_ENTRIES', 1024))
+    app.config['FORECAST_CACHE_DB'] = os.environ.get('FORECAST_CACHE_DB') or None
+    # Durée de vie des périmètres de permission DGM en cache (secondes)
+    app.config['PERMISSION_SCOPE_TTL'] = int(os.environ.get('PERMISSION_SCOPE_TTL', 300))
+    # Plafond du comptage approché des listes paginées par clé
+    app.config['PAGINATION_COUNT_LIMIT'] = int(os.environ.get('PAGINATION_COUNT_LIMIT', 1000))
+    
+    # Configuration de test (base en mémoire...) appliquée avant l'initialisation des extensions
+    if test_config:
+        app.config.update(test_config)
     
     # Initialisation des extensions avec l'application
     db.init_app(app)
@@ -33,8 +64,14 @@ def create_app():
             AgentDGM,
             Prelevement,
             TurbulenceData,
-            MaritimeData
+            MaritimeData,
+            WeatherDataHourly,
+            WeatherDataDaily,
+            TrainingJob
         )
+        
+        # Mise à jour incrémentale des agrégats horaires/journaliers
+        from app.utils import weather_rollups
     
     # Import et enregistrement des blueprints
     from app.routes.main import main_bp
@@ -75,6 +112,10 @@ def create_app():
         
         # Création des directions et services par défaut si nécessaire
         create_default_settings(app)
+        
+        # Travaux d'entraînement laissés actifs par un arrêt du serveur
+        from app.utils.training_jobs import recover_orphaned_jobs
+        recover_orphaned_jobs()
     
     return app
 
@@ -5,6 +5,8 @@ from app.models.weather_data import WeatherStation, WeatherData
 from app.models.agent import Direction, Service, AgentDGM, Prelevement
 from app.models.aviation_data import TurbulenceData
 from app.models.maritime_data import MaritimeData
+from app.models.weather_rollup import WeatherDataHourly, WeatherDataDaily
+from app.models.training_job import TrainingJob
 
 __all__ = [
     'User',
@@ -15,5 +17,8 @@ __all__ = [
     'AgentDGM',
     'Prelevement',
     'TurbulenceData',
-    'MaritimeData'
+    'MaritimeData',
+    'WeatherDataHourly',
+    'WeatherDataDaily',
+    'TrainingJob'
 ]
\ No newline at end of file
@@ -54,6 +54,12 @@ class AgentDGM(db.Model):
         return f'<Agent {self.matricule} - {self.user.username}>'
 
 class Prelevement(db.Model):
+    __table_args__ = (
+        # Pagination par clé (date_prelevement, id) des listes à valider et des listes par agent
+        db.Index('ix_prelevement_validated_date', 'validated', 'date_prelevement'),
+        db.Index('ix_prelevement_agent_date', 'agent_id', 'date_prelevement'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     agent_id = db.Column(db.Integer, db.ForeignKey('agent_dgm.id'), nullable=False)
     station_id = db.Column(db.Integer, db.ForeignKey('weather_station.id'), nullable=False)
@@ -4,6 +4,9 @@ from datetime import datetime
 
 class TurbulenceData(db.Model):
     __tablename__ = 'turbulence_data'
+    __table_args__ = (
+        db.Index('ix_turbulence_data_station_timestamp', 'station_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     station_id = db.Column(db.Integer, db.ForeignKey('weather_station.id'), nullable=False)
@@ -5,6 +5,9 @@ from datetime import datetime
 class MaritimeData(db.Model):
     """Modèle pour les données maritimes"""
     __tablename__ = 'maritime_data'
+    __table_args__ = (
+        db.Index('ix_maritime_data_station_timestamp', 'station_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     station_id = db.Column(db.Integer, db.ForeignKey('weather_station.id'), nullable=False)
@@ -0,0 +1,80 @@
+# app/models/training_job.py
+"""
+File des travaux d'entraînement ML exécutés hors des requêtes web
+La table sert de file d'attente locale (état, progression, résultat)
+"""
+
+from app import db
+from datetime import datetime
+import json
+
+# États d'un travail
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class TrainingJob(db.Model):
+    __tablename__ = 'training_job'
+    __table_args__ = (
+        # Un seul travail actif par clé (type + station) : déduplication des demandes concurrentes
+        db.Index('uq_training_job_active', 'dedupe_key', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    station_id = db.Column(db.Integer, db.ForeignKey('weather_station.id'))
+    dedupe_key = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=JOB_QUEUED, index=True)
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    message = db.Column(db.String(255))
+    params = db.Column(db.Text)  # JSON
+    result = db.Column(db.Text)  # JSON
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Processus responsable (hôte:pid) : processus web en file, processus de travail en cours
+    owner = db.Column(db.String(100))
+    # Pulsation : rafraîchie pendant l'exécution, un travail muet est considéré abandonné
+    updated_at = db.Column(db.DateTime)
+
+    @property
+    def is_active(self):
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def duration(self):
+        """Durée d'exécution en secondes (en cours : jusqu'à maintenant)"""
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.utcnow()
+        return round((end - self.started_at).total_seconds(), 3)
+
+    def get_params(self):
+        return json.loads(self.params) if self.params else {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'station_id': self.station_id,
+            'status': self.status,
+            'progress': round(self.progress or 0.0, 3),
+            'message': self.message,
+            'params': self.get_params(),
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'duration_seconds': self.duration
+        }
+
+    def __repr__(self):
+        return f'<TrainingJob #{self.id} {self.kind} {self.status}>'
@@ -16,6 +16,11 @@ class WeatherStation(db.Model):
         return f'<Station {self.name}>'
 
 class WeatherData(db.Model):
+    __table_args__ = (
+        # Index composite pour "dernière observation par station" et les plages temporelles
+        db.Index('ix_weather_data_station_timestamp', 'station_id', 'timestamp'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     station_id = db.Column(db.Integer, db.ForeignKey('weather_station.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
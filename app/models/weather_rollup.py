@@ -0,0 +1,84 @@
+# app/models/weather_rollup.py
+"""
+Agrégats horaires et journaliers des observations (tables de cumul)
+Maintenus incrémentalement à l'insertion des WeatherData (voir app/utils/weather_rollups.py)
+"""
+
+from app import db
+from sqlalchemy.ext.declarative import declared_attr
+
+# Variables agrégées dans les tables de cumul
+ROLLUP_VARIABLES = ('temperature', 'humidity', 'pressure', 'wind_speed', 'precipitation')
+
+
+class RollupMixin:
+    """Colonnes communes : nombre d'observations et, par variable, somme/min/max/valeurs manquantes"""
+
+    id = db.Column(db.Integer, primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+    temperature_sum = db.Column(db.Float)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    temperature_nulls = db.Column(db.Integer, nullable=False, default=0)
+
+    humidity_sum = db.Column(db.Float)
+    humidity_min = db.Column(db.Float)
+    humidity_max = db.Column(db.Float)
+    humidity_nulls = db.Column(db.Integer, nullable=False, default=0)
+
+    pressure_sum = db.Column(db.Float)
+    pressure_min = db.Column(db.Float)
+    pressure_max = db.Column(db.Float)
+    pressure_nulls = db.Column(db.Integer, nullable=False, default=0)
+
+    wind_speed_sum = db.Column(db.Float)
+    wind_speed_min = db.Column(db.Float)
+    wind_speed_max = db.Column(db.Float)
+    wind_speed_nulls = db.Column(db.Integer, nullable=False, default=0)
+
+    precipitation_sum = db.Column(db.Float)
+    precipitation_min = db.Column(db.Float)
+    precipitation_max = db.Column(db.Float)
+    precipitation_nulls = db.Column(db.Integer, nullable=False, default=0)
+
+    @declared_attr
+    def station_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('weather_station.id'), nullable=False)
+
+    def count(self, variable):
+        """Nombre de valeurs renseignées pour une variable"""
+        return (self.record_count or 0) - (getattr(self, f'{variable}_nulls') or 0)
+
+    def mean(self, variable):
+        """Moyenne d'une variable sur la période (None si aucune valeur)"""
+        count = self.count(variable)
+        if not count:
+            return None
+        return getattr(self, f'{variable}_sum') / count
+
+
+class WeatherDataHourly(RollupMixin, db.Model):
+    """Agrégat horaire par station"""
+    __tablename__ = 'weather_data_hourly'
+    __table_args__ = (
+        db.UniqueConstraint('station_id', 'hour', name='uq_weather_data_hourly_station_hour'),
+    )
+
+    hour = db.Column(db.DateTime, nullable=False, index=True)  # Début de l'heure
+
+    def __repr__(self):
+        return f'<WeatherDataHourly Station:{self.station_id} {self.hour}>'
+
+
+class WeatherDataDaily(RollupMixin, db.Model):
+    """Agrégat journalier par station"""
+    __tablename__ = 'weather_data_daily'
+    __table_args__ = (
+        db.UniqueConstraint('station_id', 'day', name='uq_weather_data_daily_station_day'),
+    )
+
+    day = db.Column(db.Date, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<WeatherDataDaily Station:{self.station_id} {self.day}>'
@@ -6,6 +6,7 @@ from app.models.weather_data import WeatherStation, WeatherData
 from app.models.user import User
 from datetime import datetime
 from sqlalchemy import func
+from app.utils.keyset_pagination import keyset_paginate, date_range_filters, COUNT_APPROXIMATE
 
 # Définition du blueprint pour la gestion des agents par l'administrateur
 admin_agent_bp = Blueprint('admin_agent', __name__, url_prefix='/admin/agent')
@@ -284,7 +285,6 @@ def prelevements():
     date_to = request.args.get('date_to')
     
     # Pagination
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
     # Requête de base
@@ -303,25 +303,25 @@ def prelevements():
         elif status == 'pending':
             query = query.filter_by(validated=False)
     
+    # Plages sur date_prelevement (utilisables par les index, contrairement à func.date)
     if date_from:
         try:
             from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-            query = query.filter(func.date(Prelevement.date_prelevement) >= from_date)
+            query = query.filter(*date_range_filters(date_from=from_date))
         except ValueError:
             flash('Format de date invalide pour la date de début.', 'warning')
     
     if date_to:
         try:
             to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-            query = query.filter(func.date(Prelevement.date_prelevement) <= to_date)
+            query = query.filter(*date_range_filters(date_to=to_date))
         except ValueError:
             flash('Format de date invalide pour la date de fin.', 'warning')
     
-    # Trier par date de prélèvement (du plus récent au plus ancien)
-    query = query.order_by(Prelevement.date_prelevement.desc())
-    
-    # Paginer les résultats
-    pagination = query.paginate(page=page, per_page=per_page)
+    # Pagination par clé, du plus récent au plus ancien
+    pagination = keyset_paginate(query, per_page=per_page,
+                                 after=request.args.get('after'), before=request.args.get('before'),
+                                 count_mode=request.args.get('count', COUNT_APPROXIMATE))
     
     # Récupérer les stations et agents pour les filtres
     stations = WeatherStation.query.all()
@@ -6,6 +6,7 @@ from app.models.weather_data import WeatherStation, WeatherData
 from app.models.user import User
 from datetime import datetime
 from sqlalchemy import func
+from app.utils.keyset_pagination import keyset_paginate, date_range_filters, filter_args, COUNT_APPROXIMATE
 
 # Définition du blueprint pour les fonctionnalités des agents
 agent_bp = Blueprint('agent', __name__, url_prefix='/agent')
@@ -78,7 +79,6 @@ def prelevements():
     date_to = request.args.get('date_to')
     
     # Pagination des prélèvements
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
     prelevements_query = Prelevement.query.filter_by(agent_id=agent.id)
@@ -93,24 +93,25 @@ def prelevements():
         elif status == 'pending':
             prelevements_query = prelevements_query.filter_by(validated=False)
     
+    # Plages sur date_prelevement (utilisables par les index, contrairement à func.date)
     if date_from:
         try:
             from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-            prelevements_query = prelevements_query.filter(func.date(Prelevement.date_prelevement) >= from_date)
+            prelevements_query = prelevements_query.filter(*date_range_filters(date_from=from_date))
         except ValueError:
             flash('Format de date invalide pour la date de début.', 'warning')
     
     if date_to:
         try:
             to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-            prelevements_query = prelevements_query.filter(func.date(Prelevement.date_prelevement) <= to_date)
+            prelevements_query = prelevements_query.filter(*date_range_filters(date_to=to_date))
         except ValueError:
             flash('Format de date invalide pour la date de fin.', 'warning')
     
-    # Trier par date de prélèvement (du plus récent au plus ancien)
-    prelevements_query = prelevements_query.order_by(Prelevement.date_prelevement.desc())
-    
-    pagination = prelevements_query.paginate(page=page, per_page=per_page)
+    # Pagination par clé, du plus récent au plus ancien
+    pagination = keyset_paginate(prelevements_query, per_page=per_page,
+                                 after=request.args.get('after'), before=request.args.get('before'),
+                                 count_mode=request.args.get('count', COUNT_APPROXIMATE))
     
     # Si l'agent est affecté à une station, n'afficher que celle-ci
     stations = []
@@ -124,7 +125,8 @@ def prelevements():
                           agent=agent,
                           pagination=pagination,
                           prelevements=pagination.items,
-                          stations=stations)
+                          stations=stations,
+                          current_filters=filter_args(request.args))
 
 @agent_bp.route('/prelevement/add', methods=['GET', 'POST'])
 @login_required
@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, request
 from app import db
 from app.models.weather_data import WeatherStation, WeatherData
-from app.utils.weather_utils import predict_temperature
+from app.utils.forecast_cache import cached_temperature_forecast, temperature_forecast_key
+from app.utils.latest_observations import get_latest_observations, get_station_freshness
+from app.utils.weather_statistics import aggregate_station_statistics, summarize_statistics
 from datetime import datetime, timedelta
 import json
 
@@ -39,6 +41,44 @@ def get_stations():
         "stations": result
     })
 
+@api_bp.route('/stations/freshness', methods=['GET'])
+def get_stations_freshness():
+    """Fraîcheur du réseau : dernière observation par station et stations silencieuses"""
+    since = request.args.get('since')
+    if since:
+        try:
+            threshold = datetime.fromisoformat(since.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({"status": "error", "message": "Paramètre since invalide (format ISO attendu)"}), 400
+        # Les horodatages stockés sont naïfs en heure locale : un since avec fuseau
+        # (+00:00, Z) est converti pour rester comparable
+        if threshold.tzinfo is not None:
+            threshold = threshold.astimezone().replace(tzinfo=None)
+    else:
+        hours = max(request.args.get('hours', default=24, type=int), 1)
+        threshold = datetime.now() - timedelta(hours=hours)
+
+    now = datetime.now()
+    result = []
+    for row in get_station_freshness():
+        last = row.last_observation
+        result.append({
+            "id": row.id,
+            "name": row.name,
+            "region": row.region,
+            "last_observation": last.strftime('%Y-%m-%d %H:%M:%S') if last else None,
+            "age_hours": round((now - last).total_seconds() / 3600, 1) if last else None,
+            "stale": last is None or last < threshold
+        })
+
+    return jsonify({
+        "status": "success",
+        "since": threshold.strftime('%Y-%m-%d %H:%M:%S'),
+        "count": len(result),
+        "stale_count": sum(1 for station in result if station["stale"]),
+        "stations": result
+    })
+
 @api_bp.route('/stations/<int:station_id>', methods=['GET'])
 def get_station(station_id):
     """Obtenir les détails d'une station spécifique"""
@@ -64,9 +104,11 @@ def get_current_weather():
     stations = WeatherStation.query.all()
     result = []
     
+    # Dernières observations de toutes les stations en une seule requête
+    latest_data = get_latest_observations()
+    
     for station in stations:
-        # Récupérer les données les plus récentes
-        weather_data = WeatherData.query.filter_by(station_id=station.id).order_by(WeatherData.timestamp.desc()).first()
+        weather_data = latest_data.get(station.id)
         
         if weather_data:
             result.append({
@@ -164,17 +206,14 @@ def get_station_historical_data(station_id):
 def get_forecast():
     """Obtenir les prévisions météo pour toutes les stations"""
     stations = WeatherStation.query.all()
+    latest_data = get_latest_observations()
     result = []
     
     for station in stations:
-        # Récupérer les données historiques récentes pour faire des prédictions
-        historical_data = WeatherData.query.filter_by(station_id=station.id).order_by(
-            WeatherData.timestamp.desc()
-        ).limit(10).all()
-        
-        # Utiliser la fonction de prévision
-        if historical_data:
-            predictions = predict_temperature(historical_data, days_ahead=3)
+        # Prévision en cache tant qu'aucune nouvelle observation n'est arrivée
+        latest = latest_data.get(station.id)
+        if latest:
+            predictions, _ = cached_temperature_forecast(station.id, latest.timestamp, days_ahead=3)
             
             station_forecast = {
                 "station_id": station.id,
@@ -205,19 +244,15 @@ def get_station_forecast(station_id):
     """Obtenir les prévisions météo pour une station spécifique"""
     station = WeatherStation.query.get_or_404(station_id)
     
-    # Récupérer les données historiques récentes pour faire des prédictions
-    historical_data = WeatherData.query.filter_by(station_id=station.id).order_by(
-        WeatherData.timestamp.desc()
-    ).limit(10).all()
-    
-    # Utiliser la fonction de prévision
-    if not historical_data:
+    # Dernière observation : clé du cache de prévisions
+    latest = get_latest_observations(station_ids=[station.id]).get(station.id)
+    if not latest:
         return jsonify({
             "status": "error",
             "message": "Données insuffisantes pour générer des prévisions"
         }), 404
     
-    predictions = predict_temperature(historical_data, days_ahead=3)
+    predictions, cached = cached_temperature_forecast(station.id, latest.timestamp, days_ahead=3)
     
     result = []
     for prediction in predictions:
@@ -228,14 +263,18 @@ def get_station_forecast(station_id):
             "humidity": round(prediction['humidity'], 1) if 'humidity' in prediction else None
         })
     
-    return jsonify({
+    response = jsonify({
         "status": "success",
         "station_id": station.id,
         "station_name": station.name,
         "region": station.region,
         "forecast": result,
+        "cached": cached,
         "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
+    # Prévision déterministe : même clé, même contenu (validation conditionnelle If-None-Match)
+    response.set_etag(temperature_forecast_key(station.id, latest.timestamp, days_ahead=3))
+    return response.make_conditional(request)
 
 # Route pour obtenir les statistiques météo
 @api_bp.route('/statistics', methods=['GET'])
@@ -249,86 +288,19 @@ def get_statistics():
     # Calculer la date de début
     start_date = datetime.now() - timedelta(days=days)
     
+    # Agrégation par station effectuée par la base de données (GROUP BY)
+    aggregates = aggregate_station_statistics(start_date)
+    stations_stats, global_stats = summarize_statistics(aggregates)
+    
     # Construire la réponse statistique
     result = {
         "period": f"Derniers {days} jours",
         "start_date": start_date.strftime('%Y-%m-%d'),
         "end_date": datetime.now().strftime('%Y-%m-%d'),
-        "stations": {},
-        "global": {
-            "temperature": {
-                "avg": None,
-                "min": None,
-                "max": None
-            },
-            "precipitation": {
-                "total": None,
-                "avg": None,
-                "max": None
-            },
-            "humidity": {
-                "avg": None
-            }
-        }
+        "stations": stations_stats,
+        "global": global_stats
     }
     
-    # Variables pour les statistiques globales
-    all_temps = []
-    all_precips = []
-    all_humidity = []
-    
-    # Récupérer les statistiques par station
-    stations = WeatherStation.query.all()
-    
-    for station in stations:
-        # Récupérer les données de la période
-        data = WeatherData.query.filter_by(station_id=station.id).filter(
-            WeatherData.timestamp >= start_date
-        ).all()
-        
-        if data:
-            temps = [d.temperature for d in data if d.temperature is not None]
-            precips = [d.precipitation for d in data if d.precipitation is not None]
-            humidity = [d.humidity for d in data if d.humidity is not None]
-            
-            # Ajouter aux listes globales
-            all_temps.extend(temps)
-            all_precips.extend(precips)
-            all_humidity.extend(humidity)
-            
-            # Statistiques de station
-            station_stats = {
-                "temperature": {
-                    "avg": round(sum(temps) / len(temps), 1) if temps else None,
-                    "min": round(min(temps), 1) if temps else None,
-                    "max": round(max(temps), 1) if temps else None
-                },
-                "precipitation": {
-                    "total": round(sum(precips), 1) if precips else None,
-                    "avg": round(sum(precips) / len(precips), 1) if precips else None,
-                    "max": round(max(precips), 1) if precips else None
-                },
-                "humidity": {
-                    "avg": round(sum(humidity) / len(humidity), 1) if humidity else None
-                }
-            }
-            
-            result["stations"][station.name] = station_stats
-    
-    # Calculer les statistiques globales
-    if all_temps:
-        result["global"]["temperature"]["avg"] = round(sum(all_temps) / len(all_temps), 1)
-        result["global"]["temperature"]["min"] = round(min(all_temps), 1)
-        result["global"]["temperature"]["max"] = round(max(all_temps), 1)
-    
-    if all_precips:
-        result["global"]["precipitation"]["total"] = round(sum(all_precips), 1)
-        result["global"]["precipitation"]["avg"] = round(sum(all_precips) / len(all_precips), 1)
-        result["global"]["precipitation"]["max"] = round(max(all_precips), 1)
-    
-    if all_humidity:
-        result["global"]["humidity"]["avg"] = round(sum(all_humidity) / len(all_humidity), 1)
-    
     return jsonify({
         "status": "success",
         "statistics": result
@@ -4,6 +4,7 @@ from flask_login import login_required
 from app.modules.aviation.turbulence import TurbulenceIndex
 from app.models.aviation_data import TurbulenceData
 from app.models.weather_data import WeatherStation
+from app.utils.latest_observations import get_latest_observations
 from app.extensions import db
 from datetime import datetime, timedelta
 
@@ -93,10 +94,12 @@ def get_aviation_stations():
     try:
         stations = WeatherStation.query.all()
         
+        # Stations disposant de données de turbulence (une seule requête)
+        latest_turbulence = get_latest_observations(TurbulenceData)
+        
         stations_data = []
         for station in stations:
-            # Vérifier s'il y a des données de turbulence récentes
-            has_turbulence_data = TurbulenceData.query.filter_by(station_id=station.id).first() is not None
+            has_turbulence_data = station.id in latest_turbulence
             
             stations_data.append({
                 'id': station.id,
@@ -11,6 +11,11 @@ from app import db
 from app.models.agent import AgentDGM, Direction, Service, Prelevement
 from app.models.weather_data import WeatherStation, WeatherData
 from app.models.user import User
+from app.utils.permission_scopes import permission_scopes, agent_permission_scope
+from app.utils.data_quality import get_station_quality
+from app.utils.keyset_pagination import keyset_paginate, filter_args, COUNT_APPROXIMATE
+from app.utils.latest_observations import get_stale_stations
+from app.utils.prelevement_validation import validate_prelevements, result_errors, STATUS_VALIDATED
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 import logging
@@ -64,65 +69,32 @@ def requires_agent_or_admin(f):
     return decorated_function
 
 def hierarchy_access_control(f):
-    """Contrôle d'accès basé sur la hiérarchie DGM"""
+    """
+    Contrôle d'accès basé sur la hiérarchie DGM
+    
+    request.user_permissions reçoit le périmètre de l'utilisateur (identifiants
+    de stations et de services), servi par le cache des périmètres : aucune
+    requête tant que le rôle, la fonction ou les affectations ne changent pas.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Récupérer l'agent connecté
-        agent = AgentDGM.query.filter_by(user_id=current_user.id).first()
+        permissions = permission_scopes.get(current_user)
         
-        # Les admins ont accès à tout
-        if current_user.role in ['admin', 'superadmin']:
-            request.user_permissions = {
-                'can_validate': True,
-                'can_view_all_services': True,
-                'can_manage_agents': True,
-                'stations_access': WeatherStation.query.all(),
-                'services_access': Service.query.all()
-            }
-        elif agent:
-            # Permissions basées sur la position hiérarchique
-            request.user_permissions = calculate_agent_permissions(agent)
-        else:
+        if permissions is None:
             flash('Accès non autorisé.', 'danger')
             return redirect(url_for('main.index'))
         
+        request.user_permissions = permissions
         return f(*args, **kwargs)
     return decorated_function
 
+def current_agent(permissions):
+    """Agent DGM de l'utilisateur connecté (identifiant mis en cache dans le périmètre)"""
+    return db.session.get(AgentDGM, permissions['agent_id']) if permissions['agent_id'] else None
+
 def calculate_agent_permissions(agent):
-    """Calcule les permissions d'un agent selon sa position hiérarchique"""
-    permissions = {
-        'can_validate': False,
-        'can_view_all_services': False,
-        'can_manage_agents': False,
-        'stations_access': [],
-        'services_access': []
-    }
-    
-    # Fonction spécifique = permissions spéciales
-    fonction_lower = agent.fonction.lower()
-    
-    # Chef de service = peut valider dans son service
-    if 'chef' in fonction_lower and 'service' in fonction_lower:
-        permissions['can_validate'] = True
-        permissions['services_access'] = [agent.service]
-        permissions['stations_access'] = WeatherStation.query.filter_by(
-            region=agent.service.direction.name if agent.service.direction else None
-        ).all()
-    
-    # Directeur = peut tout voir dans sa direction
-    elif 'directeur' in fonction_lower:
-        permissions['can_validate'] = True
-        permissions['can_view_all_services'] = True
-        permissions['services_access'] = agent.service.direction.services.all()
-        permissions['stations_access'] = WeatherStation.query.all()
-    
-    # Agent normal = accès limité à sa station
-    else:
-        permissions['stations_access'] = [agent.station] if agent.station else []
-        permissions['services_access'] = [agent.service]
-    
-    return permissions
+    """Calcule les permissions d'un agent selon sa position hiérarchique (identifiants uniquement)"""
+    return agent_permission_scope(agent)
 
 # ================================
 # TABLEAU DE BORD HIÉRARCHIQUE
@@ -134,7 +106,7 @@ def calculate_agent_permissions(agent):
 def hierarchical_dashboard():
     """Tableau de bord adapté au niveau hiérarchique"""
     permissions = request.user_permissions
-    agent = AgentDGM.query.filter_by(user_id=current_user.id).first()
+    agent = current_agent(permissions)
     
     # Statistiques personnalisées selon le niveau
     stats = calculate_hierarchical_stats(agent, permissions)
@@ -160,17 +132,17 @@ def calculate_hierarchical_stats(agent, permissions):
         # Statistiques directeur/chef de service
         stats.update({
             'agents_sous_supervision': AgentDGM.query.filter(
-                AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                AgentDGM.service_id.in_(permissions['service_ids'])
             ).count(),
             'prelevements_a_valider': Prelevement.query.filter(
                 and_(
                     Prelevement.validated == False,
                     Prelevement.agent.has(
-                        AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                        AgentDGM.service_id.in_(permissions['service_ids'])
                     )
                 )
             ).count(),
-            'stations_supervisees': len(permissions['stations_access'])
+            'stations_supervisees': len(permissions['station_ids'])
         })
     else:
         # Statistiques agent standard
@@ -194,7 +166,7 @@ def get_relevant_recent_data(agent, permissions):
         return {
             'recent_prelevements': Prelevement.query.filter(
                 Prelevement.agent.has(
-                    AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                    AgentDGM.service_id.in_(permissions['service_ids'])
                 )
             ).order_by(Prelevement.timestamp.desc()).limit(10).all(),
             
@@ -202,7 +174,7 @@ def get_relevant_recent_data(agent, permissions):
                 and_(
                     Prelevement.validated == True,
                     Prelevement.agent.has(
-                        AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                        AgentDGM.service_id.in_(permissions['service_ids'])
                     )
                 )
             ).order_by(Prelevement.timestamp.desc()).limit(5).all()
@@ -228,7 +200,7 @@ def get_pending_tasks(agent, permissions):
             and_(
                 Prelevement.validated == False,
                 Prelevement.agent.has(
-                    AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                    AgentDGM.service_id.in_(permissions['service_ids'])
                 )
             )
         ).count()
@@ -243,20 +215,10 @@ def get_pending_tasks(agent, permissions):
             })
     
     # Stations sans données récentes
-    if permissions['stations_access']:
+    if permissions['station_ids']:
         yesterday = datetime.now() - timedelta(days=1)
-        stations_without_data = []
-        
-        for station in permissions['stations_access']:
-            recent_data = WeatherData.query.filter(
-                and_(
-                    WeatherData.station_id == station.id,
-                    WeatherData.timestamp >= yesterday
-                )
-            ).first()
-            
-            if not recent_data:
-                stations_without_data.append(station)
+        # Une seule requête groupée pour toutes les stations du périmètre
+        stations_without_data = get_stale_stations(yesterday, permissions['station_ids'])
         
         if stations_without_data:
             tasks.append({
@@ -289,21 +251,24 @@ def validation_center():
     station_id = request.args.get('station_id', type=int)
     urgency = request.args.get('urgency')  # high, medium, low
     
-    # Pagination
-    page = request.args.get('page', 1, type=int)
+    # Pagination par clé (date_prelevement, id), les plus anciens d'abord
     per_page = 20
     
     # Requête de base selon les permissions
     query = build_validation_query(permissions, service_id, station_id, urgency)
     
-    pagination = query.paginate(page=page, per_page=per_page)
+    pagination = keyset_paginate(query, per_page=per_page, descending=False,
+                                 after=request.args.get('after'), before=request.args.get('before'),
+                                 count_mode=request.args.get('count', COUNT_APPROXIMATE))
     
     return render_template('dgm/validation_center.html',
                           permissions=permissions,
                           pagination=pagination,
                           prelevements=pagination.items,
-                          services=permissions['services_access'],
-                          stations=permissions['stations_access'])
+                          current_filters=filter_args(request.args),
+                          services=Service.query.filter(Service.id.in_(permissions['service_ids'])).all(),
+                          stations=WeatherStation.query.filter(
+                              WeatherStation.id.in_(permissions['station_ids'])).all())
 
 def build_validation_query(permissions, service_id=None, station_id=None, urgency=None):
     """Construit la requête de validation selon les permissions"""
@@ -311,7 +276,7 @@ def build_validation_query(permissions, service_id=None, station_id=None, urgenc
         and_(
             Prelevement.validated == False,
             Prelevement.agent.has(
-                AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                AgentDGM.service_id.in_(permissions['service_ids'])
             )
         )
     )
@@ -342,7 +307,7 @@ def build_validation_query(permissions, service_id=None, station_id=None, urgenc
             cutoff = datetime.now() - timedelta(hours=12)
             query = query.filter(Prelevement.timestamp >= cutoff)
     
-    return query.order_by(Prelevement.timestamp.asc())
+    return query.order_by(Prelevement.date_prelevement.asc(), Prelevement.id.asc())
 
 # ================================
 # ACTIONS DE VALIDATION
@@ -361,7 +326,7 @@ def validate_prelevement(id):
     prelevement = Prelevement.query.get_or_404(id)
     
     # Vérifier que l'agent appartient aux services supervisés
-    if prelevement.agent.service not in permissions['services_access']:
+    if prelevement.agent.service_id not in permissions['service_ids']:
         return jsonify({'error': 'Prélèvement hors de votre périmètre'}), 403
     
     try:
@@ -398,54 +363,28 @@ def batch_validate():
     if not permissions['can_validate']:
         return jsonify({'error': 'Permissions insuffisantes'}), 403
     
-    prelevement_ids = request.json.get('prelevement_ids', [])
+    prelevement_ids = (request.get_json(silent=True) or {}).get('prelevement_ids', [])
     
-    if not prelevement_ids:
+    if not prelevement_ids or not isinstance(prelevement_ids, list):
         return jsonify({'error': 'Aucun prélèvement sélectionné'}), 400
     
-    validated_count = 0
-    errors = []
-    
-    for prelevement_id in prelevement_ids:
-        try:
-            prelevement = Prelevement.query.get(prelevement_id)
-            
-            if not prelevement:
-                errors.append(f'Prélèvement {prelevement_id} non trouvé')
-                continue
-            
-            # Vérifier les permissions
-            if prelevement.agent.service not in permissions['services_access']:
-                errors.append(f'Prélèvement {prelevement_id} hors périmètre')
-                continue
-            
-            if prelevement.validated:
-                errors.append(f'Prélèvement {prelevement_id} déjà validé')
-                continue
-            
-            # Valider
-            prelevement.validated = True
-            weather_data = prelevement.to_weather_data()
-            db.session.add(weather_data)
-            validated_count += 1
-            
-        except Exception as e:
-            errors.append(f'Erreur prélèvement {prelevement_id}: {str(e)}')
-    
     try:
-        db.session.commit()
-        logger.info(f'Validation en lot par {current_user.username}: '
-                   f'{validated_count} prélèvements validés')
-        
-        return jsonify({
-            'success': True,
-            'validated_count': validated_count,
-            'errors': errors
-        })
-        
+        # Sélection, contrôle de périmètre, UPDATE et INSERT groupés en une transaction
+        results = validate_prelevements(prelevement_ids, permissions['service_ids'])
     except Exception as e:
-        db.session.rollback()
+        logger.error(f'Erreur validation en lot par {current_user.username}: {str(e)}')
         return jsonify({'error': 'Erreur lors de la validation en lot'}), 500
+    
+    validated_count = sum(1 for item in results if item['status'] == STATUS_VALIDATED)
+    logger.info(f'Validation en lot par {current_user.username}: '
+               f'{validated_count} prélèvements validés')
+    
+    return jsonify({
+        'success': True,
+        'validated_count': validated_count,
+        'errors': result_errors(results),
+        'results': results
+    })
 
 # ================================
 # GESTION DES DÉLÉGATIONS
@@ -519,22 +458,20 @@ def generate_hierarchical_reports(permissions, period):
         # Rapports de supervision
         reports.update({
             'productivity_by_agent': get_agent_productivity_report(
-                permissions['services_access'], start_date
+                permissions['service_ids'], start_date
             ),
             'validation_delays': get_validation_delays_report(
-                permissions['services_access'], start_date
+                permissions['service_ids'], start_date
             ),
             'data_quality': get_data_quality_report(
-                permissions['stations_access'], start_date
+                permissions['station_ids'], start_date
             )
         })
     
     return reports
 
-def get_agent_productivity_report(services, start_date):
+def get_agent_productivity_report(service_ids, start_date):
     """Rapport de productivité des agents"""
-    service_ids = [s.id for s in services]
-    
     productivity = db.session.query(
         AgentDGM.matricule,
         AgentDGM.fonction,
@@ -558,10 +495,8 @@ def get_agent_productivity_report(services, start_date):
         for p in productivity
     ]
 
-def get_validation_delays_report(services, start_date):
+def get_validation_delays_report(service_ids, start_date):
     """Rapport des délais de validation"""
-    service_ids = [s.id for s in services]
-    
     # Calculer les délais moyens
     delays = db.session.query(
         Service.name,
@@ -585,42 +520,9 @@ def get_validation_delays_report(services, start_date):
         for d in delays
     ]
 
-def get_data_quality_report(stations, start_date):
-    """Rapport de qualité des données"""
-    quality_issues = []
-    
-    for station in stations:
-        # Vérifier la complétude des données
-        total_data = WeatherData.query.filter(
-            and_(
-                WeatherData.station_id == station.id,
-                WeatherData.timestamp >= start_date
-            )
-        ).count()
-        
-        # Données avec valeurs manquantes
-        incomplete_data = WeatherData.query.filter(
-            and_(
-                WeatherData.station_id == station.id,
-                WeatherData.timestamp >= start_date,
-                or_(
-                    WeatherData.temperature.is_(None),
-                    WeatherData.humidity.is_(None),
-                    WeatherData.precipitation.is_(None)
-                )
-            )
-        ).count()
-        
-        quality_issues.append({
-            'station': station.name,
-            'total_records': total_data,
-            'incomplete_records': incomplete_data,
-            'completeness_rate': round(
-                ((total_data - incomplete_data) / total_data * 100) if total_data > 0 else 0, 1
-            )
-        })
-    
-    return quality_issues
+def get_data_quality_report(station_ids, start_date):
+    """Rapport de qualité des données (une requête groupée pour toutes les stations)"""
+    return get_station_quality(station_ids, start_date)
 
 # ================================
 # API POUR INTERFACES DYNAMIQUES
@@ -637,8 +539,8 @@ def get_user_permissions():
         'can_validate': permissions['can_validate'],
         'can_view_all_services': permissions['can_view_all_services'],
         'can_manage_agents': permissions['can_manage_agents'],
-        'stations_count': len(permissions['stations_access']),
-        'services_count': len(permissions['services_access'])
+        'stations_count': len(permissions['station_ids']),
+        'services_count': len(permissions['service_ids'])
     })
 
 @dgm_bp.route('/api/stats/dashboard')
@@ -647,7 +549,7 @@ def get_user_permissions():
 def get_dashboard_stats():
     """API pour les statistiques du tableau de bord"""
     permissions = request.user_permissions
-    agent = AgentDGM.query.filter_by(user_id=current_user.id).first()
+    agent = current_agent(permissions)
     
     stats = calculate_hierarchical_stats(agent, permissions)
     
@@ -707,12 +609,12 @@ def build_export_data(permissions, start_date):
             and_(
                 Prelevement.timestamp >= start_date,
                 Prelevement.agent.has(
-                    AgentDGM.service_id.in_([s.id for s in permissions['services_access']])
+                    AgentDGM.service_id.in_(permissions['service_ids'])
                 )
             )
         ).all()
     else:
-        agent = AgentDGM.query.filter_by(user_id=current_user.id).first()
+        agent = current_agent(permissions)
         prelevements = Prelevement.query.filter(
             and_(
                 Prelevement.agent_id == agent.id,
@@ -1,13 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models.weather_data import WeatherStation, WeatherData
-from app.utils.weather_utils import predict_temperature
+from app.utils.forecast_cache import cached_temperature_forecast
+from app.utils.latest_observations import get_latest_observations
+from app.utils.data_export import build_export_query, iter_weather_csv, gzip_chunks
 from app.models.user import User
 from sqlalchemy import func
 from datetime import datetime, timedelta
-import csv
-import io
 
 main_bp = Blueprint('main', __name__)
 
@@ -17,11 +17,7 @@ def index():
     stations = WeatherStation.query.all()
     
     # Récupération des données météo les plus récentes pour chaque station
-    latest_data = {}
-    for station in stations:
-        data = WeatherData.query.filter_by(station_id=station.id).order_by(WeatherData.timestamp.desc()).first()
-        if data:
-            latest_data[station.id] = data
+    latest_data = get_latest_observations()
     
     # Calcul de la température moyenne sur toutes les stations
     avg_temp = 0
@@ -42,13 +38,13 @@ def forecasts():
     
     # Prévisions plus avancées
     forecasts = {}
+    latest_data = get_latest_observations()
     
     for station in stations:
-        # Récupérer les données des 10 derniers jours pour faire des prédictions
-        historical = WeatherData.query.filter_by(station_id=station.id).order_by(WeatherData.timestamp.desc()).limit(10).all()
-        
-        # Utiliser notre fonction de prédiction
-        station_forecast = predict_temperature(historical, days_ahead=3)
+        # Prévision des 10 dernières observations, recalculée seulement après une nouvelle mesure
+        latest = latest_data.get(station.id)
+        station_forecast, _ = cached_temperature_forecast(station.id, latest.timestamp if latest else None,
+                                                          days_ahead=3)
         
         # Ajouter quelques données supplémentaires aux prévisions
         for pred in station_forecast:
@@ -172,48 +168,48 @@ def export_data():
         flash('Accès non autorisé. Vous devez être administrateur pour accéder à cette page.', 'danger')
         return redirect(url_for('main.index'))
     
-    # Récupération des données à exporter
+    # Filtres : station, période (AAAA-MM-JJ, fin incluse), compression
     station_id = request.args.get('station_id', type=int)
-    
+    compress = request.args.get('compress') == 'gzip'
+
+    try:
+        start_date = _parse_export_date(request.args.get('start_date'))
+        end_date = _parse_export_date(request.args.get('end_date'))
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide (attendu AAAA-MM-JJ)'}), 400
+
+    if end_date is not None:
+        end_date += timedelta(days=1)
+
     if station_id:
         # Exporter les données d'une station spécifique
         station = WeatherStation.query.get_or_404(station_id)
-        weather_data = WeatherData.query.filter_by(station_id=station_id).order_by(WeatherData.timestamp).all()
         filename = f"data_{station.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     else:
         # Exporter toutes les données
-        weather_data = WeatherData.query.order_by(WeatherData.timestamp).all()
         filename = f"data_all_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    # Création du CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # En-têtes
-    writer.writerow(['ID', 'Station', 'Date', 'Température', 'Humidité', 'Pression', 'Vitesse du vent', 'Direction du vent', 'Précipitations'])
-    
-    # Données
-    for data in weather_data:
-        station = WeatherStation.query.get(data.station_id)
-        writer.writerow([
-            data.id,
-            station.name,
-            data.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            data.temperature,
-            data.humidity,
-            data.pressure,
-            data.wind_speed,
-            data.wind_direction,
-            data.precipitation
-        ])
-    
-    # Préparation de la réponse
-    output.seek(0)
-    
-    return jsonify({
-        'data': output.getvalue(),
-        'filename': filename
-    })
+
+    # Le CSV est produit en flux, lot par lot, sans être construit en mémoire
+    query = build_export_query(station_id or None, start_date, end_date)
+    chunks = iter_weather_csv(query)
+
+    if compress:
+        filename += '.gz'
+        body, mimetype = gzip_chunks(chunks), 'application/gzip'
+    else:
+        body, mimetype = chunks, 'text/csv; charset=utf-8'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+def _parse_export_date(value):
+    """Convertit un paramètre AAAA-MM-JJ en datetime (None si absent)"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d')
 
 @main_bp.route('/dashboard/add_station', methods=['POST'])
 @login_required
@@ -349,11 +345,7 @@ def statistics():
     stations = WeatherStation.query.all()
     
     # Récupérer les données météo les plus récentes pour chaque station
-    latest_data = {}
-    for station in stations:
-        data = WeatherData.query.filter_by(station_id=station.id).order_by(WeatherData.timestamp.desc()).first()
-        if data:
-            latest_data[station.id] = data
+    latest_data = get_latest_observations()
     
     return render_template('statistics.html', 
                            stations=stations, 
@@ -4,6 +4,7 @@ from flask_login import login_required
 from app.modules.maritime.sea_state import SeaStateCalculator, TidalCalculator
 from app.models.maritime_data import MaritimeData
 from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.latest_observations import get_latest_observations
 from app.extensions import db
 from datetime import datetime, timedelta
 import random
@@ -128,10 +129,12 @@ def get_maritime_stations():
         # Stations côtières (simplification: toutes les stations)
         stations = WeatherStation.query.all()
         
+        # Stations disposant de données maritimes (une seule requête)
+        latest_maritime = get_latest_observations(MaritimeData)
+        
         maritime_stations = []
         for station in stations:
-            # Vérifier s'il y a des données maritimes
-            has_data = MaritimeData.query.filter_by(station_id=station.id).first() is not None
+            has_data = station.id in latest_maritime
             
             maritime_stations.append({
                 'id': station.id,
@@ -11,6 +11,7 @@ from metpy.plots import SkewT
 import xarray as xr
 from app.models.weather_data import WeatherStation, WeatherData
 from app.extensions import db
+from app.utils.convective_indices import compute_convective_indices
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # Backend non-interactif
@@ -47,8 +48,11 @@ def atmospheric_stability(station_id):
         # Calculs de stabilité atmosphérique
         results = {}
         
+        # Indices convectifs vectorisés sur toute la série
+        indices = compute_convective_indices(temperatures.magnitude, humidities.magnitude, pressures.magnitude)
+        
         # 1. Point de rosée
-        dewpoints = mpcalc.dewpoint_from_relative_humidity(temperatures, humidities)
+        dewpoints = indices['dewpoint'] * units.celsius
         results['dewpoint_avg'] = float(np.mean(dewpoints.to('celsius').magnitude))
         
         # 2. Température potentielle
@@ -82,30 +86,19 @@ def atmospheric_stability(station_id):
             'description': stability_description
         }
         
-        # 5. Indice de soulèvement (Lifted Index approximé)
-        surface_temp = temperatures[-1]
-        surface_pressure = pressures[-1]
-        surface_dewpoint = dewpoints[-1]
-        
-        # Calcul température d'une parcelle soulevée à 500 hPa
-        lifted_temp = mpcalc.dry_lapse(surface_pressure, surface_temp, 500 * units.hPa)
-        lifted_index = 15 * units.celsius - lifted_temp  # Approximation simple
-        
+        # 5. Indice de soulèvement (Lifted Index approximé, conditions actuelles)
+        lifted_index = float(indices['lifted_index'][-1])
         results['lifted_index'] = {
-            'value': float(lifted_index.to('celsius').magnitude),
-            'interpretation': get_lifted_index_interpretation(lifted_index.magnitude)
+            'value': lifted_index,
+            'interpretation': get_lifted_index_interpretation(lifted_index)
         }
         
         # 6. Indice de convection (K-Index approximé)
         if len(temperatures) >= 3:
-            temp_850 = temperatures[-1]  # Approximation surface
-            temp_500 = temp_850 - 15 * units.celsius  # Estimation 500 hPa
-            dewpoint_850 = dewpoints[-1]
-            
-            k_index = (temp_850 - temp_500) + dewpoint_850 - 5 * units.celsius
+            k_index = float(indices['k_index'][-1])
             results['k_index'] = {
-                'value': float(k_index.to('celsius').magnitude),
-                'interpretation': get_k_index_interpretation(k_index.magnitude)
+                'value': k_index,
+                'interpretation': get_k_index_interpretation(k_index)
             }
         
         # 7. Indice de cisaillement de vent (approximé)
@@ -164,18 +157,9 @@ def convective_parameters(station_id):
         results = {}
         
         # 1. CAPE (Convective Available Potential Energy) - approximation
-        dewpoint = mpcalc.dewpoint_from_relative_humidity(temperature, humidity)
-        
-        # Simulation profil vertical (approximation pour surface unique)
-        surface_pressure = pressure
-        surface_temp = temperature
-        
-        # Estimation CAPE basique
-        virtual_temp = mpcalc.virtual_temperature(temperature, 
-                                                mpcalc.mixing_ratio_from_relative_humidity(pressure, temperature, humidity))
-        
-        # CAPE approximé (méthode simplifiée)
-        cape_approx = max(0, (virtual_temp.to('kelvin').magnitude - 273.15) * 100)
+        indices = compute_convective_indices(temperature.magnitude, humidity.magnitude, pressure.magnitude)
+        dewpoint = float(indices['dewpoint']) * units.celsius
+        cape_approx = float(indices['cape'])
         
         results['cape'] = {
             'value': cape_approx,
@@ -184,7 +168,7 @@ def convective_parameters(station_id):
         }
         
         # 2. CIN (Convective Inhibition) - approximation
-        cin_approx = max(0, 50 - cape_approx/10)
+        cin_approx = float(indices['cin'])
         results['cin'] = {
             'value': cin_approx,
             'units': 'J/kg',
@@ -7,6 +7,7 @@ Endpoints spécialisés pour analyses météorologiques du Gabon
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app.utils.metpy_gabon import GabonMetPyCore
+from app.utils.model_cache import model_cache
 from app.models.weather_data import WeatherStation, WeatherData
 from app.models.agent import AgentDGM
 from app import db
@@ -22,6 +23,17 @@ metpy_api_bp = Blueprint('metpy_api', __name__, url_prefix='/api/metpy')
 # Instance globale du calculateur MetPy
 gabon_metpy = GabonMetPyCore()
 
+# ============ ENDPOINTS MODÈLES ============
+
+@metpy_api_bp.route('/models/status')
+@login_required
+def models_status():
+    """État des modèles de prévision chargés et métriques du cache (latence de chargement)"""
+    return jsonify({
+        'models_loaded': gabon_metpy._load_models(),
+        'cache': model_cache.metrics()
+    })
+
 # ============ ENDPOINTS ANALYSES THERMIQUES ============
 
 @metpy_api_bp.route('/thermal-analysis/<int:station_id>')
@@ -29,7 +41,49 @@ def thermal_analysis_station(station_id):
     """
     Analyse thermique complète d'une station avec MetPy
     """
+    # Récupération station et données
+    station = WeatherStation.query.get_or_404(station_id)
+    
     try:
-        # Récupération station et données
-        station = WeatherStation.query.get_or_404(station_id)
-        latest_data = WeatherData.query.filter_
\ No newline at end of file
+        latest_data = WeatherData.query.filter_by(station_id=station_id)\
+                                       .order_by(WeatherData.timestamp.desc())\
+                                       .first()
+        
+        if not latest_data or latest_data.temperature is None:
+            return jsonify({'error': 'Aucune donnée disponible'}), 404
+        
+        climate_zone = get_climate_zone(station.region)
+        analysis = gabon_metpy.analyze_thermal_comfort(
+            latest_data.temperature,
+            latest_data.humidity or 80,
+            latest_data.wind_speed or 5,
+            region=climate_zone
+        )
+        
+        return jsonify({
+            'station': {
+                'id': station.id,
+                'name': station.name,
+                'region': station.region,
+                'coordinates': [station.latitude, station.longitude]
+            },
+            'observation': {
+                'timestamp': latest_data.timestamp.isoformat(),
+                'temperature': latest_data.temperature,
+                'humidity': latest_data.humidity,
+                'wind_speed': latest_data.wind_speed,
+                'pressure': latest_data.pressure
+            },
+            'thermal_analysis': analysis
+        })
+        
+    except Exception as e:
+        logger.error(f"Erreur analyse thermique station {station_id}: {e}")
+        return jsonify({'error': f'Erreur analyse thermique: {str(e)}'}), 500
+
+def get_climate_zone(region):
+    """Zone climatique gabonaise d'une région administrative (côtière par défaut)"""
+    for zone, characteristics in gabon_metpy.constants.CLIMATE_ZONES.items():
+        if region in characteristics['regions']:
+            return zone
+    return 'COASTAL'
@@ -1,10 +1,20 @@
 # app/routes/metpy_enhanced.py
 from flask import Blueprint, jsonify, request
 from app.utils.metpy_core import GabonMeteoCore
+from app.utils.metpy_gabon import GabonMetPyCore
 from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.latest_observations import get_latest_observations
+from datetime import datetime
 
 metpy_enhanced_bp = Blueprint('metpy_enhanced', __name__, url_prefix='/api/v2')
 
+# Analyseur partagé du processus (instancié une seule fois)
+meteo_core = GabonMeteoCore()
+
+# Prévisions nationales : modèles GabonMetPyCore persistés (travail d'entraînement
+# 'gabon_models'), lus via le cache de modèles du processus
+gabon_core = GabonMetPyCore()
+
 @metpy_enhanced_bp.route('/station/<int:station_id>/advanced-analysis')
 def advanced_station_analysis(station_id):
     """Analyse météorologique avancée d'une station"""
@@ -17,8 +27,6 @@ def advanced_station_analysis(station_id):
         if not latest_data:
             return jsonify({'error': 'Aucune donnée disponible'}), 404
         
-        meteo_core = GabonMeteoCore()
-        
         # Conditions actuelles
         current_conditions = {
             'temperature': latest_data.temperature,
@@ -59,40 +67,152 @@ def advanced_station_analysis(station_id):
 def national_thermal_comfort():
     """Carte nationale de confort thermique"""
     try:
-        stations = WeatherStation.query.all()
-        meteo_core = GabonMeteoCore()
-        
-        comfort_data = []
-        
-        for station in stations:
-            latest_data = WeatherData.query.filter_by(station_id=station.id)\
-                                          .order_by(WeatherData.timestamp.desc())\
-                                          .first()
-            
-            if latest_data:
-                thermal_analysis = meteo_core.analyze_thermal_stress(
-                    latest_data.temperature,
-                    latest_data.humidity or 80,
-                    latest_data.wind_speed or 8
-                )
-                
-                comfort_data.append({
-                    'station': {
-                        'id': station.id,
-                        'name': station.name,
-                        'latitude': station.latitude,
-                        'longitude': station.longitude,
-                        'region': station.region
-                    },
-                    'thermal_comfort': thermal_analysis,
-                    'timestamp': latest_data.timestamp.isoformat()
-                })
-        
         return jsonify({
-            'thermal_comfort_map': comfort_data,
+            'thermal_comfort_map': _thermal_comfort_batch(),
             'generated_at': datetime.now().isoformat(),
             'methodology': 'MetPy heat index + wind cooling factor'
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@metpy_enhanced_bp.route('/thermal-comfort/batch', methods=['GET', 'POST'])
+def thermal_comfort_batch():
+    """
+    Confort thermique de plusieurs stations en une requête
+    
+    Stations : ?station_ids=1,2,3 ou ?station_ids=all (GET),
+    {"station_ids": [1, 2, 3]} ou {"station_ids": "all"} (POST JSON)
+    """
+    try:
+        station_ids = _requested_station_ids()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        comfort_data = _thermal_comfort_batch(station_ids)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    found = {item['station']['id'] for item in comfort_data}
+    return jsonify({
+        'thermal_comfort': comfort_data,
+        'missing_station_ids': [sid for sid in station_ids if sid not in found] if station_ids else [],
+        'generated_at': datetime.now().isoformat(),
+        'methodology': 'MetPy heat index + wind cooling factor'
+    })
+
+@metpy_enhanced_bp.route('/forecasts/batch', methods=['GET', 'POST'])
+def forecasts_batch():
+    """
+    Prévisions avancées de plusieurs stations en une requête
+    
+    Mêmes sélecteurs de stations que /thermal-comfort/batch, horizon ?days=7
+    (ou {"days": 7}) entre 1 et 14 jours. Tout l'horizon de toutes les stations
+    est prédit en un appel par modèle entraîné (prévision nationale : station_ids=all) ;
+    sans modèle entraîné, prévisions climatologiques simples.
+    """
+    try:
+        station_ids = _requested_station_ids()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.method == 'POST':
+        days = (request.get_json(silent=True) or {}).get('days', 7)
+    else:
+        days = request.args.get('days', 7)
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        days = None
+    if days is None or not 1 <= days <= 14:
+        return jsonify({'error': 'days doit être compris entre 1 et 14'}), 400
+    
+    try:
+        forecasts = _forecast_batch(station_ids, days)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    found = {item['station']['id'] for item in forecasts}
+    return jsonify({
+        'forecasts': forecasts,
+        'days_ahead': days,
+        'missing_station_ids': [sid for sid in station_ids if sid not in found] if station_ids else [],
+        'generated_at': datetime.now().isoformat()
+    })
+
+def _requested_station_ids():
+    """
+    Stations demandées : ?station_ids=1,2,3 / all (GET) ou {"station_ids": ...} (POST JSON)
+    Retourne une liste triée d'identifiants, ou None pour toutes les stations
+    """
+    if request.method == 'POST':
+        requested = (request.get_json(silent=True) or {}).get('station_ids', 'all')
+    else:
+        requested = request.args.get('station_ids', 'all')
+    
+    if requested == 'all':
+        return None
+    try:
+        if isinstance(requested, str):
+            requested = [value for value in requested.split(',') if value.strip()]
+        return sorted({int(value) for value in requested})
+    except (TypeError, ValueError):
+        raise ValueError('station_ids doit être "all" ou une liste d\'identifiants')
+
+def _observed_stations(station_ids=None):
+    """[(station, dernière observation)] des stations ayant une température mesurée"""
+    query = WeatherStation.query
+    if station_ids is not None:
+        query = query.filter(WeatherStation.id.in_(station_ids))
+    stations = query.order_by(WeatherStation.id).all()
+    
+    # Instantané des dernières observations (une seule requête)
+    snapshot = get_latest_observations(station_ids=[station.id for station in stations])
+    return [(station, snapshot[station.id]) for station in stations
+            if station.id in snapshot and snapshot[station.id].temperature is not None]
+
+def _station_summary(station):
+    return {
+        'id': station.id,
+        'name': station.name,
+        'latitude': station.latitude,
+        'longitude': station.longitude,
+        'region': station.region
+    }
+
+def _forecast_batch(station_ids=None, days_ahead=7):
+    """Prévisions de toutes les stations observées (modèles Gabon persistés, un appel predict par modèle)"""
+    observed = _observed_stations(station_ids)
+    conditions_list = [{
+        'temperature': latest.temperature,
+        'humidity': latest.humidity or 80,
+        'pressure': latest.pressure or 1013,
+        'wind_speed': latest.wind_speed or 8,
+        'precipitation': latest.precipitation or 0
+    } for _, latest in observed]
+    
+    predictions = gabon_core.predict_gabon_weather_batch(conditions_list, days_ahead=days_ahead)
+    
+    return [{
+        'station': _station_summary(station),
+        'timestamp': latest.timestamp.isoformat(),
+        'advanced_forecasts': [dict(prediction, date=prediction['date'].isoformat())
+                               for prediction in station_predictions]
+    } for (station, latest), station_predictions in zip(observed, predictions)]
+
+def _thermal_comfort_batch(station_ids=None):
+    """Classifications de confort sur l'instantané des dernières observations (un passage vectorisé)"""
+    observed = _observed_stations(station_ids)
+    
+    analyses = meteo_core.analyze_thermal_stress_batch(
+        [latest.temperature for _, latest in observed],
+        [latest.humidity or 80 for _, latest in observed],
+        [latest.wind_speed or 8 for _, latest in observed]
+    )
+    
+    return [{
+        'station': _station_summary(station),
+        'thermal_comfort': analysis,
+        'timestamp': latest.timestamp.isoformat()
+    } for (station, latest), analysis in zip(observed, analyses)]
@@ -1,6 +1,6 @@
 # app/routes/metpy_ml_forecasting.py
-from flask import Blueprint, jsonify, request
-from flask_login import login_required
+from flask import Blueprint, jsonify, request, url_for
+from flask_login import login_required, current_user
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -14,108 +14,213 @@ import joblib
 import os
 from app.models.weather_data import WeatherStation, WeatherData
 from app.extensions import db
+from app.utils.ml_model_registry import model_registry
+from app.utils.latest_observations import get_latest_observations
+from app.utils.forecast_cache import forecast_cache
+from app.utils.training_jobs import (submit_training_job, get_job, list_jobs,
+                                     JOB_STATION_MODELS, JOB_GABON_MODELS, JOB_ALL_STATION_MODELS)
 
 metpy_ml_bp = Blueprint('metpy_ml', __name__, url_prefix='/api/metpy/ml')
 
+# Features dérivées calculées avec MetPy
+METPY_FEATURES = ('dewpoint', 'potential_temperature', 'equiv_potential_temp',
+                  'mixing_ratio', 'virtual_temperature', 'heat_index')
+
+def _metpy_features(t, rh, p):
+    """
+    Point de rosée, températures potentielles, rapport de mélange, température virtuelle et indice de chaleur
+    
+    Calcul sur les tableaux complets ; en cas d'échec, reprise ligne par ligne pour
+    que seules les lignes fautives reçoivent les valeurs par défaut.
+    """
+    try:
+        return _metpy_features_array(t, rh, p)
+    except Exception:
+        rows = [_metpy_features_row(t[i:i + 1], rh[i:i + 1], p[i:i + 1]) for i in range(len(t))]
+        return {name: np.concatenate([row[name] for row in rows]) for name in METPY_FEATURES}
+
+def _metpy_features_row(t, rh, p):
+    """Features MetPy d'une ligne (tableaux de longueur 1), valeurs par défaut si le calcul échoue"""
+    try:
+        return _metpy_features_array(t, rh, p)
+    except Exception:
+        # Valeurs par défaut si calculs échouent
+        return {
+            'dewpoint': t - 10,
+            'potential_temperature': t + 273.15,
+            'equiv_potential_temp': t + 280,
+            'mixing_ratio': np.full_like(t, 0.01),
+            'virtual_temperature': t,
+            'heat_index': t
+        }
+
+def _metpy_features_array(t, rh, p):
+    temp = t * units.celsius
+    humidity = rh * units.percent
+    pressure = p * units.hPa
+    
+    # Point de rosée
+    dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, humidity)
+    
+    # Rapport de mélange
+    mixing_ratio = mpcalc.mixing_ratio_from_relative_humidity(pressure, temp, humidity)
+    
+    # Indice de chaleur au-delà de 20°C ; hors domaine de validité (masqué) : température de l'air
+    heat_index = mpcalc.heat_index(temp, humidity).to('celsius').magnitude
+    heat_index = np.ma.filled(np.ma.asarray(heat_index, dtype=float), np.nan)
+    
+    return {
+        'dewpoint': np.asarray(dewpoint.to('celsius').magnitude, dtype=float),
+        'potential_temperature': np.asarray(mpcalc.potential_temperature(pressure, temp).to('kelvin').magnitude, dtype=float),
+        'equiv_potential_temp': np.asarray(mpcalc.equivalent_potential_temperature(pressure, temp, dewpoint).to('kelvin').magnitude, dtype=float),
+        'mixing_ratio': np.asarray(mixing_ratio.magnitude, dtype=float),
+        'virtual_temperature': np.asarray(mpcalc.virtual_temperature(temp, mixing_ratio).to('celsius').magnitude, dtype=float),
+        'heat_index': np.where((t > 20) & ~np.isnan(heat_index), heat_index, t)
+    }
+
+def _recent_trend(values):
+    """
+    Tendance moyenne (moyenne des différences successives) sur les 3 valeurs précédentes
+    
+    Les valeurs manquantes ou nulles sont ignorées ; 0 s'il reste moins de 2 valeurs
+    ou pour les 3 premières observations.
+    """
+    series = values.where(values.fillna(0) != 0)
+    window = pd.concat([series.shift(3), series.shift(2), series.shift(1)], axis=1).to_numpy()
+    
+    valid = ~np.isnan(window)
+    count = valid.sum(axis=1)
+    
+    # Moyenne des différences = (dernière - première valeur valide) / (n - 1)
+    first = np.take_along_axis(window, valid.argmax(axis=1)[:, None], axis=1)[:, 0]
+    last = np.take_along_axis(window, (2 - valid[:, ::-1].argmax(axis=1))[:, None], axis=1)[:, 0]
+    
+    trend = np.zeros(len(series))
+    enough = count >= 2
+    trend[enough] = (last[enough] - first[enough]) / (count[enough] - 1)
+    trend[:3] = 0
+    return trend
+
+# Targets : (variable observée, horizon en heures)
+FORECAST_TARGETS = {
+    'temperature_6h': ('temperature', 6),
+    'temperature_12h': ('temperature', 12),
+    'temperature_24h': ('temperature', 24),
+    'precipitation_6h': ('precipitation', 6),
+    'precipitation_12h': ('precipitation', 12),
+    'pressure_6h': ('pressure', 6)
+}
+
+# Écart maximal (exclu) entre l'échéance visée et l'observation retenue
+TARGET_TOLERANCE = np.timedelta64(1, 'h')
+
+def build_future_targets(training_data):
+    """
+    Construit les targets décalés (6h/12h/24h) pour des observations triées par date
+    
+    Pour chaque observation et chaque horizon, retient la première observation
+    postérieure dont l'horodatage est à moins d'une heure de l'échéance.
+    Recherche dichotomique (searchsorted) sur les horodatages : O(n log n)
+    au lieu d'un parcours de la fin de série pour chaque ligne.
+    Retourne un DataFrame (NaN si aucune observation ne correspond).
+    """
+    timestamps = np.array([d.timestamp for d in training_data], dtype='datetime64[us]')
+    values = {
+        'temperature': np.array([d.temperature for d in training_data], dtype=float),
+        'precipitation': np.array([d.precipitation or 0 for d in training_data], dtype=float),
+        'pressure': np.array([d.pressure for d in training_data], dtype=float)
+    }
+    positions = np.arange(len(timestamps))
+    
+    targets = {}
+    matches = {}
+    for target_name, (variable, hours) in FORECAST_TARGETS.items():
+        if hours not in matches:
+            target_times = timestamps + np.timedelta64(hours, 'h')
+            # Première observation strictement après (échéance - 1h), et postérieure à la ligne courante
+            candidate = np.maximum(np.searchsorted(timestamps, target_times - TARGET_TOLERANCE, side='right'),
+                                   positions + 1)
+            found = candidate < len(timestamps)
+            candidate = np.minimum(candidate, len(timestamps) - 1)
+            found &= timestamps[candidate] < target_times + TARGET_TOLERANCE
+            matches[hours] = (candidate, found)
+        
+        candidate, found = matches[hours]
+        targets[target_name] = np.where(found, values[variable][candidate], np.nan)
+    
+    return pd.DataFrame(targets)
+
 class WeatherMLPredictor:
-    """Classe pour prédictions météo avec ML et MetPy"""
+    """Classe pour prédictions météo avec ML et MetPy (modèles persistés par station)"""
     
-    def __init__(self):
-        self.models = {}
-        self.scalers = {}
-        self.is_trained = False
+    def __init__(self, registry=None):
+        self.registry = registry or model_registry
         
     def prepare_features(self, weather_data):
-        """Prépare les features avec calculs MetPy"""
-        features = []
+        """Prépare les features avec calculs MetPy (vectorisés sur toute la série)"""
+        if not weather_data:
+            return pd.DataFrame()
+        
+        raw = pd.DataFrame({
+            'timestamp': [d.timestamp for d in weather_data],
+            'temperature': [d.temperature for d in weather_data],
+            'humidity': [d.humidity for d in weather_data],
+            'pressure': [d.pressure for d in weather_data],
+            'wind_speed': [d.wind_speed for d in weather_data],
+            'wind_direction': [d.wind_direction for d in weather_data],
+            'precipitation': [d.precipitation for d in weather_data]
+        })
+        for column in ('temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction', 'precipitation'):
+            raw[column] = pd.to_numeric(raw[column], errors='coerce')
+        
+        # Features de tendance sur les 3 observations précédentes (avant filtrage)
+        temp_trend = _recent_trend(raw['temperature'])
+        pressure_trend = _recent_trend(raw['pressure'])
+        
+        # Observations exploitables : température, humidité et pression renseignées (non nulles)
+        usable = (raw[['temperature', 'humidity', 'pressure']].fillna(0) != 0).all(axis=1).to_numpy()
+        if not usable.any():
+            return pd.DataFrame()
+        
+        raw = raw[usable]
+        t = raw['temperature'].to_numpy(dtype=float)
+        rh = raw['humidity'].to_numpy(dtype=float)
+        p = raw['pressure'].to_numpy(dtype=float)
+        
+        # Features de base
+        features = pd.DataFrame({
+            'temperature': t,
+            'humidity': rh,
+            'pressure': p,
+            'wind_speed': raw['wind_speed'].fillna(0).to_numpy(),
+            'wind_direction': raw['wind_direction'].fillna(0).to_numpy(),
+            'precipitation': raw['precipitation'].fillna(0).to_numpy()
+        })
         
-        for i, data in enumerate(weather_data):
-            if not (data.temperature and data.humidity and data.pressure):
-                continue
-                
-            temp = data.temperature * units.celsius
-            humidity = data.humidity * units.percent
-            pressure = data.pressure * units.hPa
-            
-            # Features de base
-            feature_row = {
-                'temperature': temp.magnitude,
-                'humidity': humidity.magnitude,
-                'pressure': pressure.magnitude,
-                'wind_speed': data.wind_speed or 0,
-                'wind_direction': data.wind_direction or 0,
-                'precipitation': data.precipitation or 0
-            }
-            
-            # Features MetPy calculées
-            try:
-                # Point de rosée
-                dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, humidity)
-                feature_row['dewpoint'] = dewpoint.to('celsius').magnitude
-                
-                # Température potentielle
-                potential_temp = mpcalc.potential_temperature(pressure, temp)
-                feature_row['potential_temperature'] = potential_temp.to('kelvin').magnitude
-                
-                # Température équivalente potentielle
-                equiv_potential_temp = mpcalc.equivalent_potential_temperature(pressure, temp, dewpoint)
-                feature_row['equiv_potential_temp'] = equiv_potential_temp.to('kelvin').magnitude
-                
-                # Rapport de mélange
-                mixing_ratio = mpcalc.mixing_ratio_from_relative_humidity(pressure, temp, humidity)
-                feature_row['mixing_ratio'] = mixing_ratio.magnitude
-                
-                # Température virtuelle
-                virtual_temp = mpcalc.virtual_temperature(temp, mixing_ratio)
-                feature_row['virtual_temperature'] = virtual_temp.to('celsius').magnitude
-                
-                # Indice de chaleur (si applicable)
-                if temp.magnitude > 20:
-                    heat_index = mpcalc.heat_index(temp, humidity)
-                    feature_row['heat_index'] = heat_index.to('celsius').magnitude
-                else:
-                    feature_row['heat_index'] = temp.magnitude
-                    
-            except Exception as e:
-                # Valeurs par défaut si calculs échouent
-                feature_row.update({
-                    'dewpoint': temp.magnitude - 10,
-                    'potential_temperature': temp.magnitude + 273.15,
-                    'equiv_potential_temp': temp.magnitude + 280,
-                    'mixing_ratio': 0.01,
-                    'virtual_temperature': temp.magnitude,
-                    'heat_index': temp.magnitude
-                })
-            
-            # Features temporelles
-            feature_row['hour'] = data.timestamp.hour
-            feature_row['day_of_year'] = data.timestamp.timetuple().tm_yday
-            feature_row['month'] = data.timestamp.month
-            
-            # Features de tendance (si suffisamment de données)
-            if i >= 3:
-                recent_temps = [weather_data[j].temperature for j in range(i-3, i) if weather_data[j].temperature]
-                recent_pressures = [weather_data[j].pressure for j in range(i-3, i) if weather_data[j].pressure]
-                
-                if len(recent_temps) >= 2:
-                    feature_row['temp_trend'] = np.mean(np.diff(recent_temps))
-                else:
-                    feature_row['temp_trend'] = 0
-                    
-                if len(recent_pressures) >= 2:
-                    feature_row['pressure_trend'] = np.mean(np.diff(recent_pressures))
-                else:
-                    feature_row['pressure_trend'] = 0
-            else:
-                feature_row['temp_trend'] = 0
-                feature_row['pressure_trend'] = 0
-            
-            features.append(feature_row)
+        # Features MetPy calculées sur les tableaux complets
+        features = features.assign(**_metpy_features(t, rh, p))
+        
+        # Features temporelles
+        timestamps = pd.DatetimeIndex(raw['timestamp'])
+        features['hour'] = timestamps.hour.to_numpy()
+        features['day_of_year'] = timestamps.dayofyear.to_numpy()
+        features['month'] = timestamps.month.to_numpy()
         
-        return pd.DataFrame(features)
+        features['temp_trend'] = temp_trend[usable]
+        features['pressure_trend'] = pressure_trend[usable]
+        
+        # Index = position de l'observation dans la série d'entrée (alignement avec les targets)
+        features.index = np.flatnonzero(usable)
+        
+        return features
     
-    def train_models(self, station_id, days_back=90):
-        """Entraîne les modèles de prédiction"""
+    def train_models(self, station_id, days_back=90, progress_callback=None, n_jobs=-1):
+        """
+        Entraîne les modèles de prédiction
+        
+        progress_callback(fraction, message) : appelé après chaque modèle entraîné
+        n_jobs : parallélisme interne des forêts aléatoires (-1 = tous les cœurs)
+        """
         try:
             # Récupérer données d'entraînement
             end_time = datetime.utcnow()
@@ -138,75 +243,21 @@ class WeatherMLPredictor:
             if features_df.empty:
                 return False, "Impossible de calculer les features"
             
-            # Targets (variables à prédire)
-            targets = {
-                'temperature_6h': [],
-                'temperature_12h': [],
-                'temperature_24h': [],
-                'precipitation_6h': [],
-                'precipitation_12h': [],
-                'pressure_6h': []
-            }
+            # Targets (variables à prédire), décalés dans le temps
+            targets = build_future_targets(training_data)
             
-            # Créer les targets décalés dans le temps
-            for i in range(len(training_data)):
-                # Trouver les données futures
-                current_time = training_data[i].timestamp
-                
-                # 6h, 12h, 24h dans le futur
-                future_6h = current_time + timedelta(hours=6)
-                future_12h = current_time + timedelta(hours=12)
-                future_24h = current_time + timedelta(hours=24)
-                
-                # Chercher les données correspondantes
-                for target_time, suffix in [(future_6h, '6h'), (future_12h, '12h'), (future_24h, '24h')]:
-                    future_data = next((d for d in training_data[i+1:] 
-                                      if abs((d.timestamp - target_time).total_seconds()) < 3600), None)
-                    
-                    if future_data:
-                        if suffix in ['6h', '12h', '24h'] and 'temperature' in targets[f'temperature_{suffix}'] or len(targets[f'temperature_{suffix}']) <= i:
-                            if len(targets[f'temperature_{suffix}']) <= i:
-                                targets[f'temperature_{suffix}'].extend([None] * (i + 1 - len(targets[f'temperature_{suffix}'])))
-                            targets[f'temperature_{suffix}'][i] = future_data.temperature
-                        
-                        if suffix in ['6h', '12h'] and f'precipitation_{suffix}' in targets:
-                            if len(targets[f'precipitation_{suffix}']) <= i:
-                                targets[f'precipitation_{suffix}'].extend([None] * (i + 1 - len(targets[f'precipitation_{suffix}'])))
-                            targets[f'precipitation_{suffix}'][i] = future_data.precipitation or 0
-                        
-                        if suffix == '6h':
-                            if len(targets['pressure_6h']) <= i:
-                                targets['pressure_6h'].extend([None] * (i + 1 - len(targets['pressure_6h'])))
-                            targets['pressure_6h'][i] = future_data.pressure
-                    else:
-                        # Remplir avec None si pas de données futures
-                        for key in targets:
-                            if suffix in key:
-                                if len(targets[key]) <= i:
-                                    targets[key].extend([None] * (i + 1 - len(targets[key])))
-                                if len(targets[key]) <= i:
-                                    targets[key].append(None)
-            
-            # Nettoyer les données (enlever les None)
-            valid_indices = []
-            for i in range(min(len(features_df), min(len(v) for v in targets.values()))):
-                if all(targets[key][i] is not None for key in targets if i < len(targets[key])):
-                    valid_indices.append(i)
+            # Nettoyer les données : lignes disposant des features et de tous les targets
+            dataset = features_df.join(targets, how='inner').dropna(subset=list(targets.columns))
             
-            if len(valid_indices) < 50:
+            if len(dataset) < 50:
                 return False, "Pas assez de données valides"
             
-            X = features_df.iloc[valid_indices]
+            X = dataset[features_df.columns]
+            trained_targets = []
             
             # Entraîner un modèle pour chaque target
-            for target_name in targets:
-                if not targets[target_name]:
-                    continue
-                    
-                y = [targets[target_name][i] for i in valid_indices if i < len(targets[target_name])]
-                
-                if len(y) != len(X):
-                    continue
+            for target_name in targets.columns:
+                y = dataset[target_name].to_numpy()
                 
                 # Diviser données
                 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -217,7 +268,7 @@ class WeatherMLPredictor:
                 X_test_scaled = scaler.transform(X_test)
                 
                 # Modèle Random Forest
-                model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+                model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
                 model.fit(X_train_scaled, y_train)
                 
                 # Évaluation
@@ -225,27 +276,35 @@ class WeatherMLPredictor:
                 mae = mean_absolute_error(y_test, y_pred)
                 r2 = r2_score(y_test, y_pred)
                 
-                # Sauvegarder modèle et scaler
-                self.models[target_name] = {
-                    'model': model,
-                    'mae': mae,
-                    'r2': r2,
-                    'feature_names': list(X.columns)
-                }
-                self.scalers[target_name] = scaler
+                # Sauvegarder modèle et scaler dans le registre de la station
+                self.registry.save(station_id, target_name, model, scaler, {
+                    'training_start': training_data[0].timestamp.isoformat(),
+                    'training_end': training_data[-1].timestamp.isoformat(),
+                    'days_back': days_back,
+                    'samples': len(dataset),
+                    'feature_names': list(X.columns),
+                    'mae': float(mae),
+                    'r2': float(r2),
+                    'model_type': 'Random Forest'
+                })
+                trained_targets.append(target_name)
+                
+                if progress_callback:
+                    progress_callback(len(trained_targets) / len(targets.columns), f"{target_name} entraîné")
+            
+            if not trained_targets:
+                return False, "Aucun modèle entraîné"
             
-            self.is_trained = True
-            return True, f"Modèles entraînés avec succès sur {len(valid_indices)} échantillons"
+            return True, f"Modèles entraînés avec succès sur {len(dataset)} échantillons"
             
         except Exception as e:
             return False, f"Erreur entraînement: {str(e)}"
     
     def predict(self, current_data, station_id):
-        """Fait des prédictions"""
-        if not self.is_trained:
-            success, message = self.train_models(station_id)
-            if not success:
-                return None, message
+        """Fait des prédictions à partir des modèles enregistrés (jamais d'entraînement ici)"""
+        station_models = self.registry.load_station(station_id)
+        if not station_models:
+            return None, "Modèles non entraînés pour cette station"
         
         try:
             # Préparer features pour données actuelles
@@ -256,10 +315,11 @@ class WeatherMLPredictor:
             
             predictions = {}
             
-            for target_name, model_info in self.models.items():
+            for target_name, entry in station_models.items():
                 try:
-                    model = model_info['model']
-                    scaler = self.scalers[target_name]
+                    model = entry['model']
+                    scaler = entry['scaler']
+                    model_info = entry['metadata']
                     
                     # S'assurer que toutes les features sont présentes
                     missing_features = set(model_info['feature_names']) - set(features_df.columns)
@@ -276,7 +336,8 @@ class WeatherMLPredictor:
                     predictions[target_name] = {
                         'value': float(prediction),
                         'mae': model_info['mae'],
-                        'r2': model_info['r2']
+                        'r2': model_info['r2'],
+                        'version': model_info['version']
                     }
                     
                 except Exception as e:
@@ -312,7 +373,9 @@ def ml_forecast(station_id):
         predictions, message = weather_predictor.predict(current_data, station_id)
         
         if predictions is None:
-            return jsonify({'error': message}), 500
+            # 409 : modèles absents, à entraîner via /train-models (hors requête de prévision)
+            status = 409 if not model_registry.targets(station_id) else 500
+            return jsonify({'error': message}), status
         
         # Organiser les résultats par horizon temporel
         forecast_data = {
@@ -390,31 +453,90 @@ def ml_forecast(station_id):
 @metpy_ml_bp.route('/train-models/<int:station_id>', methods=['POST'])
 @login_required
 def train_station_models(station_id):
-    """Réentraîne les modèles pour une station"""
+    """Met en file le réentraînement des modèles d'une station (exécuté en arrière-plan)"""
     try:
         station = WeatherStation.query.get_or_404(station_id)
         
         days_back = request.json.get('days_back', 90) if request.is_json else 90
         
-        success, message = weather_predictor.train_models(station_id, days_back)
+        job, created = submit_training_job(JOB_STATION_MODELS, station_id,
+                                           params={'days_back': days_back}, user_id=current_user.id)
         
-        if success:
-            return jsonify({
-                'status': 'success',
-                'message': message,
-                'station_id': station_id,
-                'trained_models': list(weather_predictor.models.keys()),
-                'training_completed_at': datetime.utcnow().isoformat()
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': message
-            }), 400
+        return jsonify({
+            'status': 'queued' if created else 'already_queued',
+            'station_id': station_id,
+            'job': job.to_dict(),
+            'status_url': url_for('metpy_ml.training_job_status', job_id=job.id)
+        }), 202
             
     except Exception as e:
         return jsonify({'error': f'Erreur entraînement: {str(e)}'}), 500
 
+@metpy_ml_bp.route('/train-all', methods=['POST'])
+@login_required
+def train_all_models():
+    """Met en file le réentraînement parallèle de toutes les stations actives"""
+    try:
+        payload = request.json if request.is_json else {}
+        
+        job, created = submit_training_job(JOB_ALL_STATION_MODELS, params={
+            'days_back': payload.get('days_back', 90),
+            'max_workers': payload.get('max_workers')
+        }, user_id=current_user.id)
+        
+        return jsonify({
+            'status': 'queued' if created else 'already_queued',
+            'job': job.to_dict(),
+            'status_url': url_for('metpy_ml.training_job_status', job_id=job.id)
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Erreur entraînement: {str(e)}'}), 500
+
+@metpy_ml_bp.route('/train-gabon-models', methods=['POST'])
+@login_required
+def train_gabon_models():
+    """Met en file l'entraînement des modèles nationaux GabonMetPyCore"""
+    try:
+        payload = request.json if request.is_json else {}
+        station_id = payload.get('station_id')
+        
+        job, created = submit_training_job(JOB_GABON_MODELS, station_id,
+                                           params={'days_back': payload.get('days_back', 365)},
+                                           user_id=current_user.id)
+        
+        return jsonify({
+            'status': 'queued' if created else 'already_queued',
+            'job': job.to_dict(),
+            'status_url': url_for('metpy_ml.training_job_status', job_id=job.id)
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Erreur entraînement: {str(e)}'}), 500
+
+@metpy_ml_bp.route('/jobs/<int:job_id>')
+@login_required
+def training_job_status(job_id):
+    """État, progression et durée d'un travail d'entraînement"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Travail introuvable'}), 404
+    
+    return jsonify(job.to_dict())
+
+@metpy_ml_bp.route('/jobs')
+@login_required
+def training_jobs():
+    """Derniers travaux d'entraînement (filtres : station_id, status)"""
+    jobs = list_jobs(station_id=request.args.get('station_id', type=int),
+                     status=request.args.get('status'),
+                     limit=min(request.args.get('limit', 50, type=int), 200))
+    
+    return jsonify({
+        'jobs': [job.to_dict() for job in jobs],
+        'count': len(jobs)
+    })
+
 @metpy_ml_bp.route('/model-performance/<int:station_id>')
 @login_required
 def model_performance(station_id):
@@ -422,17 +544,26 @@ def model_performance(station_id):
     try:
         station = WeatherStation.query.get_or_404(station_id)
         
-        if not weather_predictor.is_trained:
+        metadata = model_registry.station_metadata(station_id)
+        
+        if not metadata:
             return jsonify({'error': 'Modèles non entraînés'}), 400
         
         performance_data = {}
         
-        for target_name, model_info in weather_predictor.models.items():
+        for target_name, model_info in metadata.items():
             performance_data[target_name] = {
                 'mean_absolute_error': model_info['mae'],
                 'r2_score': model_info['r2'],
                 'feature_count': len(model_info['feature_names']),
-                'model_type': 'Random Forest'
+                'model_type': model_info.get('model_type', 'Random Forest'),
+                'version': model_info['version'],
+                'training_window': {
+                    'start': model_info['training_start'],
+                    'end': model_info['training_end']
+                },
+                'samples': model_info['samples'],
+                'trained_at': model_info['saved_at']
             }
         
         return jsonify({
@@ -441,153 +572,175 @@ def model_performance(station_id):
                 'name': station.name
             },
             'model_performance': performance_data,
-            'training_status': 'trained' if weather_predictor.is_trained else 'not_trained',
+            'training_status': 'trained',
             'evaluation_timestamp': datetime.utcnow().isoformat()
         })
         
     except Exception as e:
         return jsonify({'error': f'Erreur évaluation modèles: {str(e)}'}), 500
 
+class ForecastDataError(Exception):
+    """Données insuffisantes pour une prévision (réponse 400, jamais mise en cache)"""
+
 @metpy_ml_bp.route('/ensemble-forecast/<int:station_id>')
 @login_required
 def ensemble_forecast(station_id):
-    """Prévision d'ensemble combinant ML et méthodes traditionnelles"""
+    """
+    Prévision d'ensemble combinant ML et méthodes traditionnelles
+    
+    Mise en cache par (station, dernière observation, version des modèles) :
+    recalculée seulement après une nouvelle observation ou un ré-entraînement.
+    """
     try:
         station = WeatherStation.query.get_or_404(station_id)
+        latest = get_latest_observations(station_ids=[station_id]).get(station_id)
         
-        # Récupérer données récentes
-        recent_data = WeatherData.query.filter_by(station_id=station_id)\
-                                     .order_by(WeatherData.timestamp.desc())\
-                                     .limit(48).all()  # 48h de données
-        
-        if len(recent_data) < 24:
-            return jsonify({'error': 'Données insuffisantes'}), 400
-        
-        current_data = recent_data[0]
-        
-        # 1. Prévision ML
-        ml_predictions, ml_message = weather_predictor.predict(current_data, station_id)
-        
-        # 2. Prévision statistique simple (moyennes mobiles)
-        statistical_forecast = {}
+        forecast, cached = forecast_cache.get_or_compute(
+            station_id, 'ensemble', '24h', latest.timestamp if latest else None,
+            lambda: _ensemble_forecast(station),
+            model_version=model_registry.station_version(station_id)
+        )
+        return jsonify(dict(forecast, cached=cached))
         
-        # Moyennes sur différentes périodes
-        temps_24h = [d.temperature for d in recent_data[:24] if d.temperature]
-        temps_7d = [d.temperature for d in recent_data if d.temperature]
+    except ForecastDataError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Erreur prévision ensemble: {str(e)}'}), 500
+
+def _ensemble_forecast(station):
+    """Calcul de la prévision d'ensemble d'une station (données JSON)"""
+    station_id = station.id
+    
+    # Récupérer données récentes
+    recent_data = WeatherData.query.filter_by(station_id=station_id)\
+                                 .order_by(WeatherData.timestamp.desc())\
+                                 .limit(48).all()  # 48h de données
+    
+    if len(recent_data) < 24:
+        raise ForecastDataError('Données insuffisantes')
+    
+    current_data = recent_data[0]
+    
+    # 1. Prévision ML
+    ml_predictions, ml_message = weather_predictor.predict(current_data, station_id)
+    
+    # 2. Prévision statistique simple (moyennes mobiles)
+    statistical_forecast = {}
+    
+    # Moyennes sur différentes périodes
+    temps_24h = [d.temperature for d in recent_data[:24] if d.temperature]
+    temps_7d = [d.temperature for d in recent_data if d.temperature]
+    
+    if len(temps_24h) >= 12:
+        # Tendance linéaire
+        hours = np.arange(len(temps_24h))
+        trend = np.polyfit(hours, temps_24h, 1)[0]
+        
+        statistical_forecast = {
+            '6h': current_data.temperature + trend * 6,
+            '12h': current_data.temperature + trend * 12,
+            '24h': current_data.temperature + trend * 24
+        }
+    
+    # 3. Prévision MetPy (persistence modifiée)
+    metpy_forecast = {}
+    
+    if current_data.temperature and current_data.humidity and current_data.pressure:
+        temp = current_data.temperature * units.celsius
+        humidity = current_data.humidity * units.percent
+        pressure = current_data.pressure * units.hPa
         
-        if len(temps_24h) >= 12:
-            # Tendance linéaire
-            hours = np.arange(len(temps_24h))
-            trend = np.polyfit(hours, temps_24h, 1)[0]
+        # Évolution basée sur tendances physiques
+        try:
+            dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, humidity)
             
-            statistical_forecast = {
-                '6h': current_data.temperature + trend * 6,
-                '12h': current_data.temperature + trend * 12,
-                '24h': current_data.temperature + trend * 24
-            }
-        
-        # 3. Prévision MetPy (persistence modifiée)
-        metpy_forecast = {}
-        
-        if current_data.temperature and current_data.humidity and current_data.pressure:
-            temp = current_data.temperature * units.celsius
-            humidity = current_data.humidity * units.percent
-            pressure = current_data.pressure * units.hPa
+            # Variation de température basée sur l'heure et la saison
+            hour = current_data.timestamp.hour
+            month = current_data.timestamp.month
             
-            # Évolution basée sur tendances physiques
-            try:
-                dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, humidity)
-                
-                # Variation de température basée sur l'heure et la saison
-                hour = current_data.timestamp.hour
-                month = current_data.timestamp.month
-                
-                # Cycle diurne approximatif
-                temp_variation = 3 * np.sin((hour - 6) * np.pi / 12)  # Max à 14h, min à 2h
-                
-                # Variation saisonnière (approximation)
-                seasonal_factor = np.sin((month - 1) * np.pi / 6) * 2  # Variation ±2°C
-                
-                metpy_forecast = {
-                    '6h': temp.magnitude + temp_variation * 0.3 + seasonal_factor * 0.1,
-                    '12h': temp.magnitude + temp_variation * 0.6 + seasonal_factor * 0.2,
-                    '24h': temp.magnitude + seasonal_factor * 0.4
-                }
-                
-            except:
-                metpy_forecast = {
-                    '6h': current_data.temperature,
-                    '12h': current_data.temperature,
-                    '24h': current_data.temperature
-                }
-        
-        # 4. Combinaison d'ensemble (moyenne pondérée)
-        ensemble_forecast = {}
-        
-        for horizon in ['6h', '12h', '24h']:
-            forecasts = []
-            weights = []
+            # Cycle diurne approximatif
+            temp_variation = 3 * np.sin((hour - 6) * np.pi / 12)  # Max à 14h, min à 2h
             
-            # ML (poids élevé si bon R²)
-            if ml_predictions and f'temperature_{horizon}' in ml_predictions:
-                ml_temp = ml_predictions[f'temperature_{horizon}'].get('value')
-                ml_r2 = ml_predictions[f'temperature_{horizon}'].get('r2', 0)
-                
-                if ml_temp is not None:
-                    forecasts.append(ml_temp)
-                    weights.append(max(0.2, ml_r2))  # Poids minimum 0.2
+            # Variation saisonnière (approximation)
+            seasonal_factor = np.sin((month - 1) * np.pi / 6) * 2  # Variation ±2°C
             
-            # Statistique
-            if horizon in statistical_forecast:
-                forecasts.append(statistical_forecast[horizon])
-                weights.append(0.3)
+            metpy_forecast = {
+                '6h': temp.magnitude + temp_variation * 0.3 + seasonal_factor * 0.1,
+                '12h': temp.magnitude + temp_variation * 0.6 + seasonal_factor * 0.2,
+                '24h': temp.magnitude + seasonal_factor * 0.4
+            }
             
-            # MetPy
-            if horizon in metpy_forecast:
-                forecasts.append(metpy_forecast[horizon])
-                weights.append(0.4)
+        except:
+            metpy_forecast = {
+                '6h': current_data.temperature,
+                '12h': current_data.temperature,
+                '24h': current_data.temperature
+            }
+    
+    # 4. Combinaison d'ensemble (moyenne pondérée)
+    ensemble_forecast = {}
+    
+    for horizon in ['6h', '12h', '24h']:
+        forecasts = []
+        weights = []
+        
+        # ML (poids élevé si bon R²)
+        if ml_predictions and f'temperature_{horizon}' in ml_predictions:
+            ml_temp = ml_predictions[f'temperature_{horizon}'].get('value')
+            ml_r2 = ml_predictions[f'temperature_{horizon}'].get('r2', 0)
             
-            # Moyenne pondérée
-            if forecasts and weights:
-                ensemble_temp = np.average(forecasts, weights=weights)
-                uncertainty = np.std(forecasts)  # Écart-type comme mesure d'incertitude
-                
-                ensemble_forecast[horizon] = {
-                    'temperature': float(ensemble_temp),
-                    'uncertainty': float(uncertainty),
-                    'methods_used': len(forecasts),
-                    'confidence': 1.0 - min(uncertainty / 5.0, 0.5)  # Confiance basée sur accord
-                }
-            else:
-                ensemble_forecast[horizon] = {
-                    'temperature': current_data.temperature,
-                    'uncertainty': 5.0,
-                    'methods_used': 0,
-                    'confidence': 0.3
-                }
-        
-        return jsonify({
-            'station': {
-                'id': station.id,
-                'name': station.name
-            },
-            'current_conditions': {
+            if ml_temp is not None:
+                forecasts.append(ml_temp)
+                weights.append(max(0.2, ml_r2))  # Poids minimum 0.2
+        
+        # Statistique
+        if horizon in statistical_forecast:
+            forecasts.append(statistical_forecast[horizon])
+            weights.append(0.3)
+        
+        # MetPy
+        if horizon in metpy_forecast:
+            forecasts.append(metpy_forecast[horizon])
+            weights.append(0.4)
+        
+        # Moyenne pondérée
+        if forecasts and weights:
+            ensemble_temp = np.average(forecasts, weights=weights)
+            uncertainty = np.std(forecasts)  # Écart-type comme mesure d'incertitude
+            
+            ensemble_forecast[horizon] = {
+                'temperature': float(ensemble_temp),
+                'uncertainty': float(uncertainty),
+                'methods_used': len(forecasts),
+                'confidence': 1.0 - min(uncertainty / 5.0, 0.5)  # Confiance basée sur accord
+            }
+        else:
+            ensemble_forecast[horizon] = {
                 'temperature': current_data.temperature,
-                'humidity': current_data.humidity,
-                'pressure': current_data.pressure,
-                'timestamp': current_data.timestamp.isoformat()
-            },
-            'ensemble_forecast': ensemble_forecast,
-            'individual_forecasts': {
-                'machine_learning': {horizon: ml_predictions.get(f'temperature_{horizon}', {}).get('value') 
-                                   for horizon in ['6h', '12h', '24h']} if ml_predictions else {},
-                'statistical': statistical_forecast,
-                'metpy_physical': metpy_forecast
-            },
-            'forecast_method': 'Ensemble (ML + Statistical + MetPy)',
-            'data_period': f'{len(recent_data)} heures',
-            'generated_at': datetime.utcnow().isoformat()
-        })
-        
-    except Exception as e:
-        return jsonify({'error': f'Erreur prévision ensemble: {str(e)}'}), 500
\ No newline at end of file
+                'uncertainty': 5.0,
+                'methods_used': 0,
+                'confidence': 0.3
+            }
+    
+    return {
+        'station': {
+            'id': station.id,
+            'name': station.name
+        },
+        'current_conditions': {
+            'temperature': current_data.temperature,
+            'humidity': current_data.humidity,
+            'pressure': current_data.pressure,
+            'timestamp': current_data.timestamp.isoformat()
+        },
+        'ensemble_forecast': ensemble_forecast,
+        'individual_forecasts': {
+            'machine_learning': {horizon: ml_predictions.get(f'temperature_{horizon}', {}).get('value') 
+                               for horizon in ['6h', '12h', '24h']} if ml_predictions else {},
+            'statistical': statistical_forecast,
+            'metpy_physical': metpy_forecast
+        },
+        'forecast_method': 'Ensemble (ML + Statistical + MetPy)',
+        'data_period': f'{len(recent_data)} heures',
+        'generated_at': datetime.utcnow().isoformat()
+    }
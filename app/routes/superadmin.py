@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session
 from flask_login import login_required, current_user
 from app import db
 from app.models.user import User
 from app.models.agent import AgentDGM, Direction, Service
 from app.models.weather_data import WeatherStation
+from app.utils.data_import import import_weather_file
 import os
 import json
 import datetime
@@ -237,24 +238,23 @@ def import_data():
             return redirect(request.url)
         
         try:
-            # Enregistrer le fichier temporairement
-            filepath = f"uploads/{file.filename}"
-            os.makedirs('uploads', exist_ok=True)
-            file.save(filepath)
-            
-            # Ici, normalement, on traiterait le fichier
-            # Pour cet exemple, on simule juste un traitement réussi
-            
-            flash(f'Le fichier {file.filename} a été importé avec succès!', 'success')
-            logger.info(f"Import de données depuis {file.filename} par {current_user.username}")
+            # Import en flux directement depuis le fichier reçu
+            report = import_weather_file(file.stream, filename=file.filename)
+            # Rapport conservé en session (cookie) : erreurs tronquées
+            session['last_import_report'] = dict(report.to_dict(), errors=report.errors[:10])
+
+            category = 'success' if report.rows_accepted else 'warning'
+            flash(f"Import terminé - {report.summary()}", category)
+            logger.info(f"Import de données depuis {file.filename} par {current_user.username}: {report.summary()}")
             
         except Exception as e:
+            db.session.rollback()
             flash(f'Erreur lors de l\'import: {str(e)}', 'danger')
             logger.error(f"Erreur lors de l'import de données: {str(e)}")
         
         return redirect(url_for('superadmin.import_data'))
     
-    return render_template('superadmin/import_data.html')
+    return render_template('superadmin/import_data.html', report=session.get('last_import_report'))
 
 @superadmin_bp.route('/system-logs')
 @login_required
@@ -0,0 +1,100 @@
+# app/utils/convective_indices.py
+"""
+Indices convectifs calculés sur des séries complètes (tableaux NumPy)
+
+Mêmes formules que MetPy pour le point de rosée (noyau thermo_kernel), le
+rapport de mélange et la température virtuelle, sans unités pint : un seul
+passage vectorisé remplace les appels MetPy ligne par ligne. Les indices (CAPE, CIN, Lifted Index,
+K-Index, probabilité d'orage) sont les approximations de surface utilisées par
+les diagrammes et l'API MetPy avancée.
+
+Entrées : température en °C, humidité relative en %, pression en hPa
+(scalaires ou tableaux de même forme). Les valeurs manquantes donnent NaN.
+"""
+
+import numpy as np
+from app.utils import thermo_kernel
+from app.utils.thermo_kernel import EPSILON, ZERO_DEGC
+
+
+def _as_float_array(values):
+    """Tableau float ; None devient NaN"""
+    return np.asarray(values, dtype=float)
+
+
+def saturation_vapor_pressure(temperature):
+    """Pression de vapeur saturante (hPa), formule de Bolton (1980)"""
+    return _as_float_array(thermo_kernel.saturation_vapor_pressure(temperature))
+
+
+def dewpoint_from_relative_humidity(temperature, humidity):
+    """Point de rosée (°C)"""
+    return _as_float_array(thermo_kernel.dewpoint(temperature, humidity))
+
+
+def mixing_ratio_from_relative_humidity(pressure, temperature, humidity):
+    """Rapport de mélange (kg/kg)"""
+    es = saturation_vapor_pressure(temperature)
+    return _as_float_array(humidity) / 100.0 * EPSILON * es / (_as_float_array(pressure) - es)
+
+
+def virtual_temperature(temperature, mixing_ratio):
+    """Température virtuelle (°C)"""
+    t_kelvin = _as_float_array(temperature) + ZERO_DEGC
+    w = _as_float_array(mixing_ratio)
+    return t_kelvin * (w + EPSILON) / (EPSILON * (1 + w)) - ZERO_DEGC
+
+
+def cape_approximation(virtual_temp):
+    """CAPE approximée (J/kg) à partir de la température virtuelle de surface"""
+    return np.maximum(0.0, _as_float_array(virtual_temp) * 100)
+
+
+def cin_approximation(cape):
+    """CIN approximée (J/kg), décroissante avec la CAPE"""
+    return np.maximum(0.0, 50 - _as_float_array(cape) / 10)
+
+
+def lifted_index(temperature):
+    """Lifted Index approximé (°C) : parcelle à 500 hPa estimée à T - 15 °C"""
+    return 15 - (_as_float_array(temperature) - 15)
+
+
+def k_index(temperature, dewpoint):
+    """K-Index approximé (°C) : T850 ≈ T surface, T500 ≈ 20 °C, Td700 ≈ 5 °C"""
+    return (_as_float_array(temperature) - 20) + _as_float_array(dewpoint) - 5
+
+
+def storm_probability(cape, humidity, k):
+    """Probabilité d'orage (%) combinant CAPE, humidité et K-Index"""
+    return np.clip(_as_float_array(cape) / 50 + (_as_float_array(humidity) - 50)
+                   + (_as_float_array(k) - 15), 0, 100)
+
+
+def compute_convective_indices(temperature, humidity, pressure):
+    """
+    Calcule tous les indices en un passage
+
+    Retourne un dictionnaire de tableaux : dewpoint, mixing_ratio,
+    virtual_temperature, cape, cin, lifted_index, k_index, storm_probability.
+    """
+    temperature = _as_float_array(temperature)
+    humidity = _as_float_array(humidity)
+    pressure = _as_float_array(pressure)
+
+    dewpoint = dewpoint_from_relative_humidity(temperature, humidity)
+    mixing_ratio = mixing_ratio_from_relative_humidity(pressure, temperature, humidity)
+    virtual_temp = virtual_temperature(temperature, mixing_ratio)
+    cape = cape_approximation(virtual_temp)
+    k = k_index(temperature, dewpoint)
+
+    return {
+        'dewpoint': dewpoint,
+        'mixing_ratio': mixing_ratio,
+        'virtual_temperature': virtual_temp,
+        'cape': cape,
+        'cin': cin_approximation(cape),
+        'lifted_index': lifted_index(temperature),
+        'k_index': k,
+        'storm_probability': storm_probability(cape, humidity, k)
+    }
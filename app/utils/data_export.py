@@ -0,0 +1,95 @@
+# app/utils/data_export.py
+"""
+Export CSV des observations en flux (mémoire constante quelle que soit la taille)
+
+Les lignes sont lues par lots (yield_per) et les noms de stations sont chargés
+une seule fois ; le CSV est produit morceau par morceau, éventuellement compressé en gzip.
+"""
+
+from sqlalchemy import and_
+from app import db
+from app.models.weather_data import WeatherStation, WeatherData
+import csv
+import io
+import zlib
+
+# Nombre de lignes lues par lot et écrites par morceau de réponse
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_HEADER = ['ID', 'Station', 'Date', 'Température', 'Humidité', 'Pression',
+                 'Vitesse du vent', 'Direction du vent', 'Précipitations']
+
+
+def build_export_query(station_id=None, start_date=None, end_date=None):
+    """
+    Requête (colonnes uniquement) des observations à exporter, triée par date
+
+    start_date inclus, end_date exclu
+    """
+    filters = []
+    if station_id is not None:
+        filters.append(WeatherData.station_id == station_id)
+    if start_date is not None:
+        filters.append(WeatherData.timestamp >= start_date)
+    if end_date is not None:
+        filters.append(WeatherData.timestamp < end_date)
+
+    query = db.session.query(
+        WeatherData.id,
+        WeatherData.station_id,
+        WeatherData.timestamp,
+        WeatherData.temperature,
+        WeatherData.humidity,
+        WeatherData.pressure,
+        WeatherData.wind_speed,
+        WeatherData.wind_direction,
+        WeatherData.precipitation
+    )
+    if filters:
+        query = query.filter(and_(*filters))
+
+    return query.order_by(WeatherData.timestamp, WeatherData.id)
+
+
+def iter_weather_csv(query, batch_size=EXPORT_BATCH_SIZE):
+    """Générateur de morceaux CSV (texte) pour une requête de build_export_query"""
+    station_names = dict(db.session.query(WeatherStation.id, WeatherStation.name).all())
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+
+    pending = 0
+    for row in query.yield_per(batch_size):
+        writer.writerow([
+            row.id,
+            station_names.get(row.station_id),
+            row.timestamp.strftime('%Y-%m-%d %H:%M:%S') if row.timestamp else None,
+            row.temperature,
+            row.humidity,
+            row.pressure,
+            row.wind_speed,
+            row.wind_direction,
+            row.precipitation
+        ])
+        pending += 1
+
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, encoding='utf-8'):
+    """Compresse en gzip un flux de morceaux texte, au fil de l'eau"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+
+    yield compressor.flush()
@@ -0,0 +1,238 @@
+# app/utils/data_import.py
+"""
+Import en masse d'observations (CSV/Excel) dans WeatherData
+
+- Lecture par blocs (chunks) pour une mémoire bornée
+- Validation vectorisée des types et des plages physiques
+- Résolution des stations par table nom → id chargée une seule fois
+- Détection des doublons (station_id, timestamp) dans le fichier et en base
+- Insertion groupée (bulk_insert_mappings) et rapport par fichier
+"""
+
+from types import SimpleNamespace
+from app import db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.weather_rollups import apply_observations
+from app.utils.forecast_cache import forecast_cache
+import pandas as pd
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes lues, validées et insérées par bloc
+IMPORT_CHUNK_SIZE = 5000
+
+# Nombre maximal de messages d'erreur conservés dans le rapport
+MAX_REPORTED_ERRORS = 50
+
+# Plages physiquement plausibles pour le Gabon (bornes incluses)
+VALID_RANGES = {
+    'temperature': (-10.0, 50.0),
+    'humidity': (0.0, 100.0),
+    'pressure': (850.0, 1100.0),
+    'wind_speed': (0.0, 100.0),
+    'wind_direction': (0.0, 360.0),
+    'precipitation': (0.0, 500.0),
+}
+
+# Noms de colonnes acceptés en entrée
+COLUMN_ALIASES = {
+    'station': 'station_name',
+    'date': 'timestamp',
+    'datetime': 'timestamp',
+}
+
+
+class ImportReport:
+    """Rapport d'import d'un fichier"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows_read = 0
+        self.rows_accepted = 0
+        self.rows_rejected = 0
+        self.rows_duplicated = 0
+        self.stations_created = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows_read / self.elapsed, 1) if self.elapsed else None
+
+    def add_error(self, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def to_dict(self):
+        return {
+            'filename': self.filename,
+            'rows_read': self.rows_read,
+            'rows_accepted': self.rows_accepted,
+            'rows_rejected': self.rows_rejected,
+            'rows_duplicated': self.rows_duplicated,
+            'stations_created': self.stations_created,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': self.rows_per_second,
+            'errors': self.errors
+        }
+
+    def summary(self):
+        return (f"{self.filename}: {self.rows_accepted} acceptées, {self.rows_rejected} rejetées, "
+                f"{self.rows_duplicated} doublons sur {self.rows_read} lignes "
+                f"({self.rows_per_second or 0} lignes/s)")
+
+
+def import_weather_file(source, filename=None, create_stations=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Importe un fichier CSV ou Excel d'observations
+
+    source: chemin ou objet fichier
+    filename: nom utilisé pour détecter le format (par défaut le chemin)
+    create_stations: crée les stations inconnues si le fichier contient
+                     latitude/longitude (sinon les lignes sont rejetées)
+    Retourne un ImportReport.
+    """
+    filename = filename or str(source)
+    report = ImportReport(filename)
+    started = time.perf_counter()
+
+    station_map = dict(db.session.query(WeatherStation.name, WeatherStation.id).all())
+    seen = set()
+    first_line = 2  # Ligne 1 = en-têtes
+
+    for chunk in iter_chunks(source, filename, chunk_size):
+        report.rows_read += len(chunk)
+        chunk.index = range(first_line, first_line + len(chunk))
+        first_line += len(chunk)
+
+        records = _prepare_chunk(chunk, station_map, seen, report, create_stations)
+        if records:
+            db.session.bulk_insert_mappings(WeatherData, records)
+            # Les insertions groupées ne passent pas par le flush ORM
+            apply_observations(db.session, [SimpleNamespace(**record) for record in records])
+            db.session.commit()
+            forecast_cache.invalidate({record['station_id'] for record in records})
+            report.rows_accepted += len(records)
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Import terminé - {report.summary()}")
+    return report
+
+
+def iter_chunks(source, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """Lit le fichier par blocs de DataFrames (le format Excel est lu en une fois puis découpé)"""
+    if filename.lower().endswith(('.xlsx', '.xls')):
+        frame = pd.read_excel(source, dtype=str)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size].copy()
+    else:
+        yield from pd.read_csv(source, dtype=str, chunksize=chunk_size, skipinitialspace=True)
+
+
+def _prepare_chunk(chunk, station_map, seen, report, create_stations):
+    """Valide un bloc et retourne les enregistrements à insérer"""
+    chunk = chunk.rename(columns=lambda c: COLUMN_ALIASES.get(c.strip().lower(), c.strip().lower()))
+
+    missing = {'station_name', 'timestamp'} - set(chunk.columns)
+    if missing:
+        report.rows_rejected += len(chunk)
+        report.add_error(f"Colonnes manquantes: {', '.join(sorted(missing))}")
+        return []
+
+    names = chunk['station_name'].fillna('').str.strip()
+    timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
+    valid = timestamps.notna()
+    _reject(report, ~valid, "date invalide")
+
+    values = {}
+    for variable, (low, high) in VALID_RANGES.items():
+        raw = chunk[variable] if variable in chunk.columns else pd.Series(None, index=chunk.index, dtype=object)
+        numeric = pd.to_numeric(raw, errors='coerce')
+
+        provided = raw.notna() & (raw.astype(str).str.strip() != '')
+        bad_type = valid & provided & numeric.isna()
+        _reject(report, bad_type, f"{variable} non numérique")
+        valid &= ~bad_type
+
+        out_of_range = valid & numeric.notna() & ~numeric.between(low, high)
+        _reject(report, out_of_range, f"{variable} hors plage [{low}, {high}]")
+        valid &= ~out_of_range
+
+        values[variable] = numeric
+
+    if create_stations:
+        _create_missing_stations(chunk[valid], names[valid], station_map, report)
+
+    station_ids = names.map(station_map)
+    unknown = valid & station_ids.isna()
+    _reject(report, unknown, "station inconnue")
+    valid &= ~unknown
+
+    if not valid.any():
+        return []
+
+    frame = pd.DataFrame({'station_id': station_ids[valid].astype(int), 'timestamp': timestamps[valid]})
+    for variable, numeric in values.items():
+        frame[variable] = numeric[valid]
+
+    # Doublons dans le fichier (y compris les blocs précédents) puis en base
+    keys = list(zip(frame['station_id'], frame['timestamp']))
+    existing = _existing_keys(frame)
+    duplicated = pd.Series([key in seen or key in existing for key in keys], index=frame.index)
+    duplicated |= frame.duplicated(['station_id', 'timestamp'])
+    report.rows_duplicated += int(duplicated.sum())
+    seen.update(keys)
+
+    frame = frame[~duplicated].astype(object).where(frame[~duplicated].notna(), None)
+    records = frame.to_dict('records')
+    for record in records:
+        record['station_id'] = int(record['station_id'])
+        record['timestamp'] = record['timestamp'].to_pydatetime()
+
+    return records
+
+
+def _reject(report, mask, reason):
+    """Comptabilise les lignes rejetées pour un motif donné"""
+    count = int(mask.sum())
+    if not count:
+        return
+    report.rows_rejected += count
+    lines = ', '.join(str(line) for line in mask[mask].index[:5])
+    report.add_error(f"{count} ligne(s) rejetée(s) - {reason} (lignes {lines}{'…' if count > 5 else ''})")
+
+
+def _existing_keys(frame):
+    """Couples (station_id, timestamp) déjà présents en base pour la plage du bloc"""
+    rows = db.session.query(WeatherData.station_id, WeatherData.timestamp).filter(
+        WeatherData.station_id.in_(frame['station_id'].unique().tolist()),
+        WeatherData.timestamp >= frame['timestamp'].min().to_pydatetime(),
+        WeatherData.timestamp <= frame['timestamp'].max().to_pydatetime()
+    ).all()
+    return {(station_id, pd.Timestamp(timestamp)) for station_id, timestamp in rows}
+
+
+def _create_missing_stations(chunk, names, station_map, report):
+    """Crée les stations absentes de la table nom → id à partir des colonnes du fichier"""
+    if not {'latitude', 'longitude'} <= set(chunk.columns):
+        return
+
+    for _, row in chunk.assign(station_name=names).drop_duplicates('station_name').iterrows():
+        if not row['station_name'] or row['station_name'] in station_map:
+            continue
+        try:
+            station = WeatherStation(
+                name=row['station_name'],
+                latitude=float(row['latitude']),
+                longitude=float(row['longitude']),
+                altitude=float(row['altitude']) if pd.notna(row.get('altitude')) else None,
+                region=row.get('region') if pd.notna(row.get('region')) else None
+            )
+        except (TypeError, ValueError):
+            continue
+        db.session.add(station)
+        db.session.flush()
+        station_map[station.name] = station.id
+        report.stations_created += 1
@@ -0,0 +1,94 @@
+# app/utils/data_quality.py
+"""
+Rapport de qualité des données par station, calculé côté base de données
+
+Une seule requête groupée (jointure externe stations -> observations de la
+période) fournit pour chaque station : nombre d'enregistrements, valeurs
+manquantes et hors plage par variable, enregistrements incomplets et heures
+sans aucune observation (lacunes).
+"""
+
+from datetime import datetime
+import math
+from sqlalchemy import func, case, and_, or_
+from app import db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.data_import import VALID_RANGES
+from app.utils.weather_rollups import bucket_expressions
+
+# Variables contrôlées (plages de validité de l'import)
+QUALITY_VARIABLES = tuple(VALID_RANGES)
+
+# Un enregistrement est incomplet si l'une de ces variables manque
+REQUIRED_VARIABLES = ('temperature', 'humidity', 'precipitation')
+
+
+def get_station_quality(station_ids, start_date, end_date=None):
+    """
+    Indicateurs de qualité par station sur [start_date, end_date[
+
+    Retourne une liste de dictionnaires ordonnée par nom de station ; les
+    stations sans observation sur la période y figurent avec des comptes nuls.
+    """
+    end_date = end_date or datetime.now()
+    station_ids = list(station_ids)
+    if not station_ids:
+        return []
+
+    hour_expr, _ = bucket_expressions()
+    in_window = and_(
+        WeatherData.station_id == WeatherStation.id,
+        WeatherData.timestamp >= start_date,
+        WeatherData.timestamp < end_date
+    )
+
+    columns = [
+        WeatherStation.id.label('station_id'),
+        WeatherStation.name.label('station_name'),
+        func.count(WeatherData.id).label('total_records'),
+        func.count(func.distinct(hour_expr)).label('observed_hours'),
+        # La jointure externe produit une ligne entièrement NULL pour une station
+        # sans observation : elle ne doit pas compter comme enregistrement incomplet
+        func.sum(case(
+            (and_(WeatherData.id.isnot(None),
+                  or_(*[getattr(WeatherData, variable).is_(None) for variable in REQUIRED_VARIABLES])), 1),
+            else_=0
+        )).label('incomplete_records')
+    ]
+    for variable, (low, high) in VALID_RANGES.items():
+        column = getattr(WeatherData, variable)
+        columns += [
+            (func.count(WeatherData.id) - func.count(column)).label(f'{variable}_nulls'),
+            func.sum(case((or_(column < low, column > high), 1), else_=0)).label(f'{variable}_out_of_range')
+        ]
+
+    rows = db.session.query(*columns).outerjoin(WeatherData, in_window)\
+                     .filter(WeatherStation.id.in_(station_ids))\
+                     .group_by(WeatherStation.id, WeatherStation.name)\
+                     .order_by(WeatherStation.name).all()
+
+    expected_hours = _hours_between(start_date, end_date)
+    return [_format_quality(row._asdict(), expected_hours) for row in rows]
+
+
+def _hours_between(start_date, end_date):
+    """Nombre d'heures civiles (entamées) couvertes par la période"""
+    first = start_date.replace(minute=0, second=0, microsecond=0)
+    return max(math.ceil((end_date - first).total_seconds() / 3600), 0)
+
+
+def _format_quality(row, expected_hours):
+    total = row['total_records']
+    incomplete = row['incomplete_records'] or 0
+
+    return {
+        'station_id': row['station_id'],
+        'station': row['station_name'],
+        'total_records': total,
+        'incomplete_records': incomplete,
+        'completeness_rate': round(((total - incomplete) / total * 100) if total > 0 else 0, 1),
+        'null_counts': {variable: row[f'{variable}_nulls'] or 0 for variable in QUALITY_VARIABLES},
+        'out_of_range': {variable: row[f'{variable}_out_of_range'] or 0 for variable in QUALITY_VARIABLES},
+        'out_of_range_values': sum(row[f'{variable}_out_of_range'] or 0 for variable in QUALITY_VARIABLES),
+        'missing_hours': max(expected_hours - row['observed_hours'], 0)
+    }
@@ -0,0 +1,121 @@
+# app/utils/diagram_cache.py
+"""
+Cache disque des diagrammes rendus (PNG), adressé par contenu
+
+La clé est une empreinte SHA-256 de (station, type de diagramme, dernière
+observation, paramètres) : une nouvelle observation produit une nouvelle clé,
+les anciennes entrées sont évincées par LRU quand la taille maximale est atteinte.
+La clé sert aussi d'ETag pour les réponses image/png.
+"""
+
+from flask import current_app
+import hashlib
+import json
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Incrémenter quand le rendu change pour invalider les images existantes
+DIAGRAM_RENDER_VERSION = 2
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def diagram_key(station_id, diagram_type, latest_timestamp, **params):
+    """Empreinte stable identifiant un rendu"""
+    parts = {
+        'version': DIAGRAM_RENDER_VERSION,
+        'station_id': station_id,
+        'diagram_type': diagram_type,
+        'latest_timestamp': latest_timestamp.isoformat() if latest_timestamp else None,
+        'params': params
+    }
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiagramCache:
+    """Fichiers <clé>.png + <clé>.json (métadonnées JSON du diagramme), bornés en taille"""
+
+    def __init__(self, base_dir=None, max_bytes=None):
+        self._base_dir = base_dir
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def base_dir(self):
+        if self._base_dir is None:
+            return current_app.config['DIAGRAM_CACHE_DIR']
+        return self._base_dir
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return current_app.config.get('DIAGRAM_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        return self._max_bytes
+
+    def _paths(self, key):
+        return os.path.join(self.base_dir, f'{key}.png'), os.path.join(self.base_dir, f'{key}.json')
+
+    def get(self, key):
+        """Retourne (png, métadonnées) ou None ; l'accès rafraîchit la position LRU"""
+        png_path, meta_path = self._paths(key)
+        try:
+            with open(png_path, 'rb') as f:
+                png = f.read()
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            os.utime(png_path)
+        except (OSError, ValueError):
+            return None
+        return png, metadata
+
+    def put(self, key, png, metadata):
+        """Enregistre un rendu puis évince les entrées les moins récemment utilisées si nécessaire"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        png_path, meta_path = self._paths(key)
+
+        suffix = f'.tmp.{os.getpid()}.{threading.get_ident()}'
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, default=str)
+        os.replace(meta_path + suffix, meta_path)
+        with open(png_path + suffix, 'wb') as f:
+            f.write(png)
+        os.replace(png_path + suffix, png_path)
+
+        self.evict()
+
+    def evict(self):
+        """Supprime les diagrammes les plus anciennement utilisés au-delà de max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.base_dir):
+                if not entry.name.endswith('.png'):
+                    continue
+                stat = entry.stat()
+                meta_path = entry.path[:-len('.png')] + '.json'
+                size = stat.st_size + (os.path.getsize(meta_path) if os.path.exists(meta_path) else 0)
+                entries.append((stat.st_mtime, entry.path, meta_path, size))
+                total += size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, png_path, meta_path, size in sorted(entries):
+                for path in (png_path, meta_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+            logger.info(f"Cache diagrammes réduit à {total} octets")
+
+
+# Cache partagé du processus
+diagram_cache = DiagramCache()
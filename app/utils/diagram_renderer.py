@@ -0,0 +1,202 @@
+# app/utils/diagram_renderer.py
+"""
+Pool de rendu des diagrammes matplotlib, hors des threads web
+
+Les rendus sont exécutés dans des processus dédiés (API objet Figure, backend
+Agg, pas d'état pyplot partagé). Chaque processus est préchauffé au démarrage :
+cache des polices et fond Skew-T (adiabatiques, lignes de rapport de mélange)
+déjà calculés. Les requêtes attendent au plus DIAGRAM_RENDER_TIMEOUT secondes
+et sont refusées quand la file dépasse DIAGRAM_RENDER_MAX_QUEUE. Un pool cassé
+(processus de rendu mort) est abandonné et recréé à la requête suivante.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+import multiprocessing
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_QUEUE = 32
+
+# Application Flask propre à chaque processus de rendu
+_worker_app = None
+
+
+class RenderTimeout(Exception):
+    """Rendu non terminé dans le délai imparti"""
+
+
+class RenderQueueFull(Exception):
+    """Trop de rendus en attente : la requête est refusée immédiatement"""
+
+
+def warm_up():
+    """Préchauffe le processus : backend Agg, polices, fond Skew-T"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+    from app.utils.skewt_background import skewt_template
+
+    font_manager.findfont('DejaVu Sans')
+
+    # Fond Skew-T rasterisé une fois pour le processus, puis rendu à blanc
+    skewt_template().render(lambda skew: skew.ax.set_title('Préchauffage'))
+
+
+def _init_worker():
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app()
+    started = time.perf_counter()
+    warm_up()
+    logger.info(f"Processus de rendu préchauffé en {time.perf_counter() - started:.2f} s")
+
+
+def _render_station(render, station_id):
+    """Charge la station puis exécute render(station) -> (png, données)"""
+    from app import db
+    from app.models.weather_data import WeatherStation
+
+    station = db.session.get(WeatherStation, station_id)
+    return render(station)
+
+
+def _render_in_worker(render, station_id):
+    with _worker_app.app_context():
+        started = time.perf_counter()
+        result = _render_station(render, station_id)
+        return result, time.perf_counter() - started
+
+
+class RenderPool:
+    """Pool de processus de rendu avec délai maximal et métriques de file"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._executor_lock = threading.Lock()
+        self._queue_depth = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timeouts': 0,
+                       'rejected': 0, 'render_seconds': 0.0}
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                workers = current_app.config.get('DIAGRAM_RENDER_WORKERS', DEFAULT_WORKERS)
+                # 'spawn' : pas de connexions ni de verrous hérités du processus web
+                self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker)
+            return self._executor
+
+    def _reset_executor(self, executor):
+        """Abandonne un pool cassé (s'il n'a pas déjà été remplacé)"""
+        with self._executor_lock:
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = None
+
+    def _submit(self, render, station_id):
+        """Soumet le rendu ; un pool cassé est recréé une fois"""
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(_render_in_worker, render, station_id)
+        except BrokenProcessPool:
+            logger.warning("Pool de rendu cassé à la soumission, recréation")
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(_render_in_worker, render, station_id)
+
+    def render(self, render, station_id, timeout=None):
+        """
+        Exécute render(station) dans le pool et retourne (png, données)
+
+        Lève RenderQueueFull si la file est saturée, RenderTimeout si le rendu
+        dépasse le délai ; les erreurs du rendu sont propagées telles quelles.
+        """
+        if current_app.config.get('DIAGRAM_RENDER_EAGER'):
+            # Exécution dans le processus courant (tests)
+            started = time.perf_counter()
+            result = _render_station(render, station_id)
+            self._record('completed', time.perf_counter() - started)
+            return result
+
+        timeout = timeout or current_app.config.get('DIAGRAM_RENDER_TIMEOUT', DEFAULT_TIMEOUT)
+        max_queue = current_app.config.get('DIAGRAM_RENDER_MAX_QUEUE', DEFAULT_MAX_QUEUE)
+
+        with self._lock:
+            if self._queue_depth >= max_queue:
+                self._stats['rejected'] += 1
+                raise RenderQueueFull(f"{self._queue_depth} rendus en attente")
+            self._queue_depth += 1
+            self._stats['submitted'] += 1
+
+        submitted = False
+        try:
+            executor, future = self._submit(render, station_id)
+            # Le rappel libère la place dans la file à la fin du rendu
+            future.add_done_callback(self._on_done)
+            submitted = True
+        finally:
+            if not submitted:
+                self._on_done(None)
+                self._record('failed')
+
+        try:
+            result, seconds = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Un rendu pas encore démarré est retiré de la file
+            future.cancel()
+            self._record('timeouts')
+            raise RenderTimeout(f"Rendu non terminé après {timeout} s")
+        except BrokenProcessPool:
+            # Processus de rendu mort : le pool est recréé à la prochaine requête
+            logger.error("Processus de rendu interrompu, le pool sera recréé")
+            self._reset_executor(executor)
+            self._record('failed')
+            raise
+        except Exception:
+            self._record('failed')
+            raise
+
+        self._record('completed', seconds)
+        return result
+
+    def _on_done(self, future):
+        with self._lock:
+            self._queue_depth -= 1
+
+    def _record(self, counter, seconds=None):
+        with self._lock:
+            self._stats[counter] += 1
+            if seconds is not None:
+                self._stats['render_seconds'] += seconds
+
+    @property
+    def queue_depth(self):
+        """Rendus soumis et non terminés (en attente ou en cours)"""
+        return self._queue_depth
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            queue_depth = self._queue_depth
+        render_seconds = stats.pop('render_seconds')
+        return {
+            'queue_depth': queue_depth,
+            'workers': current_app.config.get('DIAGRAM_RENDER_WORKERS', DEFAULT_WORKERS),
+            'max_queue': current_app.config.get('DIAGRAM_RENDER_MAX_QUEUE', DEFAULT_MAX_QUEUE),
+            'timeout_seconds': current_app.config.get('DIAGRAM_RENDER_TIMEOUT', DEFAULT_TIMEOUT),
+            **stats,
+            'avg_render_seconds': round(render_seconds / stats['completed'], 3) if stats['completed'] else None
+        }
+
+
+# Pool partagé du processus web
+render_pool = RenderPool()
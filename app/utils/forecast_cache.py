@@ -0,0 +1,291 @@
+# app/utils/forecast_cache.py
+"""
+Cache des prévisions calculées, invalidé par les données
+
+La clé est une empreinte de (station, méthode, horizon, dernière observation,
+version du modèle) : une nouvelle observation ou un modèle ré-entraîné produit
+une nouvelle clé. Les entrées expirent après FORECAST_CACHE_TTL secondes et
+sont supprimées explicitement à l'arrivée de nouvelles WeatherData d'une station
+(flush ORM ou import groupé) et après un ré-entraînement.
+
+Deux niveaux :
+- LRU en mémoire du processus (FORECAST_CACHE_MAX_ENTRIES entrées)
+- fichier SQLite optionnel (FORECAST_CACHE_DB) partagé entre les workers
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from app import db
+from app.models.weather_data import WeatherData
+from app.utils.weather_utils import predict_temperature, PREDICT_TEMPERATURE_VERSION
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def forecast_key(station_id, method, horizon, latest_timestamp, model_version=None):
+    """Empreinte stable identifiant une prévision"""
+    parts = {
+        'station_id': station_id,
+        'method': method,
+        'horizon': horizon,
+        'latest_timestamp': latest_timestamp.isoformat() if latest_timestamp else None,
+        'model_version': model_version
+    }
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteForecastStore:
+    """Niveau disque : table forecast_cache d'un fichier SQLite partagé"""
+
+    def __init__(self, path):
+        self.path = path
+        self._initialised = False
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte (une par opération, sûre entre threads et processus)"""
+        if not self._initialised:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            if not self._initialised:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS forecast_cache ('
+                    'key TEXT PRIMARY KEY, station_id INTEGER, method TEXT, '
+                    'expires_at REAL NOT NULL, payload BLOB NOT NULL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS ix_forecast_cache_station '
+                                   'ON forecast_cache (station_id, method)')
+                connection.commit()
+                self._initialised = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        """Retourne (expiration, station_id, méthode, valeur) ou None"""
+        with self._connect() as connection:
+            row = connection.execute('SELECT expires_at, station_id, method, payload '
+                                     'FROM forecast_cache WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0], row[1], row[2], pickle.loads(row[3])
+
+    def put(self, key, station_id, method, expires_at, value):
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO forecast_cache VALUES (?, ?, ?, ?, ?)',
+                               (key, station_id, method, expires_at, pickle.dumps(value)))
+            connection.execute('DELETE FROM forecast_cache WHERE expires_at <= ?', (time.time(),))
+
+    def delete(self, station_ids=None, method=None):
+        clauses, params = [], []
+        if station_ids is not None:
+            clauses.append(f"station_id IN ({','.join('?' * len(station_ids))})")
+            params.extend(station_ids)
+        if method is not None:
+            clauses.append('method = ?')
+            params.append(method)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._connect() as connection:
+            connection.execute(f'DELETE FROM forecast_cache{where}', params)
+
+
+class ForecastCache:
+    """LRU mémoire + niveau SQLite optionnel, avec durée de vie par entrée"""
+
+    def __init__(self, max_entries=None, ttl=None, db_path=None):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._db_path = db_path
+        self._entries = OrderedDict()  # clé -> (expiration, station_id, méthode, valeur)
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @property
+    def max_entries(self):
+        if self._max_entries is None and has_app_context():
+            return current_app.config.get('FORECAST_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        return self._max_entries or DEFAULT_MAX_ENTRIES
+
+    @property
+    def ttl(self):
+        if self._ttl is None and has_app_context():
+            return current_app.config.get('FORECAST_CACHE_TTL', DEFAULT_TTL)
+        return self._ttl or DEFAULT_TTL
+
+    @property
+    def store(self):
+        """Niveau SQLite configuré (None si désactivé)"""
+        path = self._db_path
+        if path is None and has_app_context():
+            path = current_app.config.get('FORECAST_CACHE_DB')
+        if not path:
+            return None
+        with self._lock:
+            if path not in self._stores:
+                self._stores[path] = SQLiteForecastStore(path)
+            return self._stores[path]
+
+    def get(self, key):
+        """Valeur en cache (copie) ou None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return copy.deepcopy(entry[3])
+            if entry is not None:
+                del self._entries[key]
+
+        store = self.store
+        cached = None
+        if store is not None:
+            try:
+                cached = store.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prévisions SQLite indisponible: {e}")
+
+        with self._lock:
+            if cached is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            expires_at, station_id, method, value = cached
+            self._remember(key, expires_at, station_id, method, value)
+        return copy.deepcopy(value)
+
+    def put(self, key, value, station_id=None, method=None):
+        expires_at = time.time() + self.ttl
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, expires_at, station_id, method, value)
+
+        store = self.store
+        if store is not None:
+            try:
+                store.put(key, station_id, method, expires_at, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prévisions SQLite indisponible: {e}")
+
+    def _remember(self, key, expires_at, station_id, method, value):
+        self._entries[key] = (expires_at, station_id, method, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, station_id, method, horizon, latest_timestamp, compute, model_version=None):
+        """
+        Retourne (prévision, en_cache)
+
+        compute() n'est appelé qu'en cas d'absence ; sans observation
+        (latest_timestamp None) rien n'est mis en cache.
+        """
+        if latest_timestamp is None:
+            return compute(), False
+
+        key = forecast_key(station_id, method, horizon, latest_timestamp, model_version)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        value = compute()
+        self.put(key, value, station_id, method)
+        return value, False
+
+    def invalidate(self, station_ids=None, method=None):
+        """Supprime les prévisions de ces stations (toutes si None), éventuellement d'une seule méthode"""
+        if station_ids is not None:
+            station_ids = sorted(set(station_ids))
+            if not station_ids:
+                return
+        with self._lock:
+            stale = [key for key, (_, station_id, entry_method, _) in self._entries.items()
+                     if (station_ids is None or station_id in station_ids)
+                     and (method is None or entry_method == method)]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += 1
+
+        store = self.store
+        if store is not None:
+            try:
+                store.delete(station_ids, method)
+            except sqlite3.Error as e:
+                logger.warning(f"Cache de prévisions SQLite indisponible: {e}")
+
+    def metrics(self):
+        with self._lock:
+            return {'entries': len(self._entries), **self._stats}
+
+
+# Cache partagé du processus
+forecast_cache = ForecastCache()
+
+
+def temperature_forecast_key(station_id, latest_timestamp, days_ahead=3, base_date=None):
+    """Clé (et ETag) de la prévision predict_temperature déterministe du jour"""
+    base_date = base_date or datetime.now().date()
+    return forecast_key(station_id, 'predict_temperature', [days_ahead, base_date.isoformat()],
+                        latest_timestamp, PREDICT_TEMPERATURE_VERSION)
+
+
+def cached_temperature_forecast(station_id, latest_timestamp, days_ahead=3):
+    """
+    Prévision predict_temperature déterministe d'une station (10 dernières observations), via le cache
+    Retourne (prévisions, en_cache)
+    """
+    base_date = datetime.now().date()
+
+    def compute():
+        historical = WeatherData.query.filter_by(station_id=station_id)\
+                                      .order_by(WeatherData.timestamp.desc())\
+                                      .limit(10).all()
+        return predict_temperature(historical, days_ahead=days_ahead, station_id=station_id,
+                                   base_date=base_date, deterministic=True)
+
+    # La date de référence fait partie de l'horizon : les prévisions glissent chaque jour
+    return forecast_cache.get_or_compute(station_id, 'predict_temperature', [days_ahead, base_date.isoformat()],
+                                         latest_timestamp, compute, model_version=PREDICT_TEMPERATURE_VERSION)
+
+
+# ================================
+# INVALIDATION SUR NOUVELLES DONNÉES
+# ================================
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_new_observations(session, flush_context):
+    stations = {obj.station_id for obj in session.new if isinstance(obj, WeatherData)}
+    if stations:
+        session.info.setdefault('forecast_stale_stations', set()).update(stations)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    stations = session.info.pop('forecast_stale_stations', None)
+    if stations:
+        forecast_cache.invalidate(stations)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('forecast_stale_stations', None)
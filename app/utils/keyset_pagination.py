@@ -0,0 +1,162 @@
+# app/utils/keyset_pagination.py
+"""
+Pagination par clé (seek) des listes de prélèvements
+
+Au lieu de OFFSET (qui parcourt toutes les lignes des pages précédentes) et
+d'un COUNT(*) complet à chaque page :
+- la page suivante/précédente est repérée par un curseur opaque encodant la
+  clé (date_prelevement, id) de la dernière/première ligne affichée
+- le total peut être compté exactement ou de façon approchée (comptage
+  plafonné à PAGINATION_COUNT_LIMIT lignes)
+"""
+
+from datetime import datetime, time, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import and_, or_
+from app.models.agent import Prelevement
+import base64
+import json
+
+DEFAULT_COUNT_LIMIT = 1000
+
+# Paramètres d'URL propres à la pagination (exclus des filtres propagés)
+CURSOR_ARGS = ('after', 'before', 'page')
+
+COUNT_EXACT = 'exact'
+COUNT_APPROXIMATE = 'approximate'
+
+
+def encode_cursor(date_prelevement, prelevement_id):
+    """Curseur opaque (base64 URL) d'une clé (date_prelevement, id)"""
+    payload = json.dumps([date_prelevement.isoformat(), prelevement_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Clé (date_prelevement, id) d'un curseur ; ValueError si le curseur est invalide"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_value, prelevement_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(date_value), int(prelevement_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Curseur de pagination invalide: {cursor}") from e
+
+
+def date_range_filters(date_from=None, date_to=None):
+    """
+    Prédicats de plage sur date_prelevement pour des dates de jour (bornes incluses)
+    Contrairement à func.date(...), ils restent utilisables par les index
+    """
+    filters = []
+    if date_from is not None:
+        filters.append(Prelevement.date_prelevement >= datetime.combine(date_from, time()))
+    if date_to is not None:
+        filters.append(Prelevement.date_prelevement < datetime.combine(date_to + timedelta(days=1), time()))
+    return filters
+
+
+def filter_args(args):
+    """Paramètres de la requête sans ceux de la pagination (pour construire les liens)"""
+    return {key: value for key, value in args.items() if key not in CURSOR_ARGS}
+
+
+class KeysetPage:
+    """Page de résultats et curseurs vers les pages voisines"""
+
+    def __init__(self, items, per_page, has_next, has_prev, total=None, total_is_approximate=False):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.total = total
+        self.total_is_approximate = total_is_approximate
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.items:
+            return None
+        last = self.items[-1]
+        return encode_cursor(last.date_prelevement, last.id)
+
+    @property
+    def prev_cursor(self):
+        if not self.has_prev or not self.items:
+            return None
+        first = self.items[0]
+        return encode_cursor(first.date_prelevement, first.id)
+
+    @property
+    def total_display(self):
+        """Total affichable ('1000+' en mode approché au-delà du plafond)"""
+        if self.total is None:
+            return ''
+        return f'{self.total}+' if self.total_is_approximate else str(self.total)
+
+
+def count_limit():
+    if has_app_context():
+        return current_app.config.get('PAGINATION_COUNT_LIMIT', DEFAULT_COUNT_LIMIT)
+    return DEFAULT_COUNT_LIMIT
+
+
+def keyset_paginate(query, per_page=20, after=None, before=None, descending=True, count_mode=COUNT_APPROXIMATE):
+    """
+    Pagine une requête de Prelevement triée par (date_prelevement, id)
+
+    after / before : curseurs de encode_cursor (page suivante / précédente).
+    Un curseur invalide ramène à la première page.
+    count_mode : 'exact' (COUNT complet), 'approximate' (comptage plafonné)
+    ou None (pas de total).
+    """
+    try:
+        after_key = decode_cursor(after) if after else None
+        before_key = decode_cursor(before) if before else None
+    except ValueError:
+        after_key = before_key = None
+
+    total, approximate = _count(query, count_mode)
+
+    # Vers l'arrière, on parcourt dans l'ordre inverse puis on remet la page à l'endroit
+    backward = before_key is not None
+    key = before_key if backward else after_key
+    forward_desc = descending != backward
+
+    if key is not None:
+        query = query.filter(_seek_predicate(key, forward_desc))
+
+    order = [Prelevement.date_prelevement.desc(), Prelevement.id.desc()] if forward_desc \
+        else [Prelevement.date_prelevement.asc(), Prelevement.id.asc()]
+    rows = query.order_by(None).order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+
+    if backward:
+        items.reverse()
+        return KeysetPage(items, per_page, has_next=True, has_prev=has_more,
+                          total=total, total_is_approximate=approximate)
+
+    return KeysetPage(items, per_page, has_next=has_more, has_prev=key is not None,
+                      total=total, total_is_approximate=approximate)
+
+
+def _seek_predicate(key, descending):
+    """Lignes strictement après la clé dans l'ordre de parcours (forme développée, indexable)"""
+    date_value, prelevement_id = key
+    if descending:
+        return or_(Prelevement.date_prelevement < date_value,
+                   and_(Prelevement.date_prelevement == date_value, Prelevement.id < prelevement_id))
+    return or_(Prelevement.date_prelevement > date_value,
+               and_(Prelevement.date_prelevement == date_value, Prelevement.id > prelevement_id))
+
+
+def _count(query, count_mode):
+    """Total (exact ou plafonné) et indicateur d'approximation"""
+    if count_mode == COUNT_EXACT:
+        return query.order_by(None).count(), False
+    if count_mode == COUNT_APPROXIMATE:
+        limit = count_limit()
+        # Le comptage s'arrête au plafond au lieu de parcourir toute la table
+        counted = query.order_by(None).limit(limit + 1).count()
+        return min(counted, limit), counted > limit
+    return None, False
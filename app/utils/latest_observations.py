@@ -0,0 +1,92 @@
+# app/utils/latest_observations.py
+"""
+Instantané des dernières observations par station
+Une seule requête (jointure sur MAX(timestamp) groupé) au lieu d'une requête par station,
+y compris pour la fraîcheur du réseau (stations silencieuses depuis une date)
+"""
+
+from sqlalchemy import func, and_, or_
+# Instance enregistrée par create_app, propriétaire de WeatherData (app.extensions.db n'a pas de moteur)
+from app import db
+from app.models.weather_data import WeatherStation, WeatherData
+
+
+def get_latest_observations(model=WeatherData, station_ids=None):
+    """
+    Retourne {station_id: dernier enregistrement} pour toutes les stations
+
+    model: modèle horodaté possédant station_id et timestamp
+           (WeatherData, MaritimeData, TurbulenceData)
+    station_ids: restreint l'instantané à ces stations (None = toutes)
+    """
+    latest = db.session.query(
+        model.station_id.label('station_id'),
+        func.max(model.timestamp).label('latest_timestamp')
+    )
+
+    if station_ids is not None:
+        station_ids = list(station_ids)
+        if not station_ids:
+            return {}
+        latest = latest.filter(model.station_id.in_(station_ids))
+
+    latest = latest.group_by(model.station_id).subquery()
+
+    rows = model.query.join(
+        latest,
+        and_(
+            model.station_id == latest.c.station_id,
+            model.timestamp == latest.c.latest_timestamp
+        )
+    ).all()
+
+    # En cas d'égalité d'horodatage, garder l'enregistrement le plus récent inséré
+    snapshot = {}
+    for row in rows:
+        current = snapshot.get(row.station_id)
+        if current is None or row.id > current.id:
+            snapshot[row.station_id] = row
+
+    return snapshot
+
+
+def get_station_freshness(station_ids=None, model=WeatherData):
+    """
+    Fraîcheur du réseau : dernière observation de chaque station, en une requête
+
+    Retourne une liste de lignes (id, name, region, last_observation) ordonnée
+    par nom ; last_observation vaut None pour une station sans aucune donnée.
+    """
+    query, _ = _freshness_query(station_ids, model)
+    return query.order_by(WeatherStation.name).all()
+
+
+def get_stale_stations(since, station_ids=None, model=WeatherData):
+    """Stations sans observation depuis `since` (ou jamais observées), en une requête"""
+    query, last_observation = _freshness_query(station_ids, model)
+    return query.filter(
+        or_(last_observation.is_(None), last_observation < since)
+    ).order_by(WeatherStation.name).all()
+
+
+def _freshness_query(station_ids, model):
+    """Stations jointes (externe) au MAX(timestamp) groupé par station"""
+    latest = db.session.query(
+        model.station_id.label('station_id'),
+        func.max(model.timestamp).label('latest_timestamp')
+    )
+    if station_ids is not None:
+        station_ids = list(station_ids)
+        latest = latest.filter(model.station_id.in_(station_ids))
+    latest = latest.group_by(model.station_id).subquery()
+
+    query = db.session.query(
+        WeatherStation.id,
+        WeatherStation.name,
+        WeatherStation.region,
+        latest.c.latest_timestamp.label('last_observation')
+    ).outerjoin(latest, latest.c.station_id == WeatherStation.id)
+
+    if station_ids is not None:
+        query = query.filter(WeatherStation.id.in_(station_ids))
+    return query, latest.c.latest_timestamp
@@ -1,14 +1,26 @@
-import metpy.calc as mpcalc
-import metpy.units as units
 import numpy as np
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import pandas as pd
+from app.utils import thermo_kernel
+
+# Classes de stress thermique selon la température effective (°C)
+THERMAL_STRESS_THRESHOLDS = [26, 30, 35, 40]
+THERMAL_STRESS_LEVELS = [
+    ("CONFORTABLE", "success", "Conditions idéales pour toutes activités"),
+    ("ACCEPTABLE", "info", "Conditions normales, hydratation régulière"),
+    ("ATTENTION", "warning", "Éviter efforts prolongés, boire fréquemment"),
+    ("DANGER", "danger", "Limiter exposition, risque de coup de chaleur"),
+    ("EXTRÊME", "danger", "Éviter toute activité extérieure"),
+]
 
 class GabonMeteoCore:
     """Cœur météorologique avancé pour le Gabon"""
     
+    # Colonnes des modèles de prévision (ordre d'entraînement)
+    PREDICTION_FEATURES = ['day_of_year', 'month', 'hour', 'pressure', 'humidity', 'wind_speed']
+    
     def __init__(self):
         self.scaler = StandardScaler()
         self.temp_model = None
@@ -18,68 +30,49 @@ class GabonMeteoCore:
     
     def calculate_heat_index(self, temp_c, humidity_pct):
         """Indice de chaleur - CRUCIAL pour le Gabon tropical"""
-        temp = temp_c * units.celsius
-        rh = humidity_pct * units.percent
-        heat_idx = mpcalc.heat_index(temp, rh)
-        return float(heat_idx.to('celsius').magnitude)
+        return thermo_kernel.heat_index(temp_c, humidity_pct)
     
     def calculate_dewpoint(self, temp_c, humidity_pct):
         """Point de rosée - indicateur de confort"""
-        temp = temp_c * units.celsius
-        rh = humidity_pct * units.percent
-        dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
-        return float(dewpoint.to('celsius').magnitude)
+        return thermo_kernel.dewpoint(temp_c, humidity_pct)
     
     def calculate_wet_bulb(self, temp_c, pressure_hpa, humidity_pct):
-        """Température humide - stress thermique"""
-        temp = temp_c * units.celsius
-        press = pressure_hpa * units.hPa
-        rh = humidity_pct * units.percent
-        
-        dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
-        wet_bulb = mpcalc.wet_bulb_temperature(press, temp, dewpoint)
-        return float(wet_bulb.to('celsius').magnitude)
+        """Température humide - stress thermique (approximation de Stull)"""
+        return thermo_kernel.wet_bulb_temperature(temp_c, humidity_pct)
     
     def analyze_thermal_stress(self, temp_c, humidity_pct, wind_kmh=5):
         """Analyse complète du stress thermique"""
-        heat_index = self.calculate_heat_index(temp_c, humidity_pct)
-        dewpoint = self.calculate_dewpoint(temp_c, humidity_pct)
+        return self.analyze_thermal_stress_batch([temp_c], [humidity_pct], [wind_kmh])[0]
+    
+    def analyze_thermal_stress_batch(self, temps_c, humidities_pct, winds_kmh):
+        """
+        Stress thermique de plusieurs points en un seul passage vectorisé
+        Retourne une liste de résultats (même format que analyze_thermal_stress)
+        """
+        temps = np.asarray(temps_c, dtype=float)
+        heat_index = thermo_kernel.heat_index(temps, humidities_pct)
+        dewpoint = thermo_kernel.dewpoint(temps, humidities_pct)
         
         # Facteur refroidissement du vent
-        wind_cooling = min(wind_kmh * 0.1, 2.0)
+        wind_cooling = np.minimum(np.asarray(winds_kmh, dtype=float) * 0.1, 2.0)
         effective_temp = heat_index - wind_cooling
         
-        # Classification du stress thermique
-        if effective_temp < 26:
-            level = "CONFORTABLE"
-            risk = "success"
-            advice = "Conditions idéales pour toutes activités"
-        elif effective_temp < 30:
-            level = "ACCEPTABLE"
-            risk = "info"
-            advice = "Conditions normales, hydratation régulière"
-        elif effective_temp < 35:
-            level = "ATTENTION"
-            risk = "warning" 
-            advice = "Éviter efforts prolongés, boire fréquemment"
-        elif effective_temp < 40:
-            level = "DANGER"
-            risk = "danger"
-            advice = "Limiter exposition, risque de coup de chaleur"
-        else:
-            level = "EXTRÊME"
-            risk = "danger"
-            advice = "Éviter toute activité extérieure"
-        
-        return {
-            'heat_index': round(heat_index, 1),
-            'dewpoint': round(dewpoint, 1),
-            'effective_temperature': round(effective_temp, 1),
-            'thermal_stress_level': level,
-            'risk_category': risk,
-            'health_advice': advice,
-            'wind_cooling_effect': round(wind_cooling, 1)
-        }
+        # Classification du stress thermique (seuils croissants)
+        level_index = np.searchsorted(THERMAL_STRESS_THRESHOLDS, effective_temp, side='right')
+        
+        results = []
+        for i in range(len(temps)):
+            level, risk, advice = THERMAL_STRESS_LEVELS[level_index[i]]
+            results.append({
+                'heat_index': round(float(heat_index[i]), 1),
+                'dewpoint': round(float(dewpoint[i]), 1),
+                'effective_temperature': round(float(effective_temp[i]), 1),
+                'thermal_stress_level': level,
+                'risk_category': risk,
+                'health_advice': advice,
+                'wind_cooling_effect': round(float(wind_cooling[i]), 1)
+            })
+        return results
     
     # ===== PRÉVISIONS INTELLIGENTES =====
     
@@ -94,7 +87,7 @@ class GabonMeteoCore:
         df['hour'] = df['date'].dt.hour
         
         # Features pour prédiction
-        features = ['day_of_year', 'month', 'hour', 'pressure', 'humidity', 'wind_speed']
+        features = list(self.PREDICTION_FEATURES)
         
         # Modèle température
         temp_features = df[features].dropna()
@@ -117,53 +110,64 @@ class GabonMeteoCore:
     
     def predict_advanced_weather(self, current_conditions, days_ahead=7):
         """Prévisions météo avancées avec MetPy + ML"""
-        
+        return self.predict_advanced_weather_batch([current_conditions], days_ahead)[0]
+    
+    def predict_advanced_weather_batch(self, conditions_list, days_ahead=7):
+        """
+        Prévisions de plusieurs stations : tout l'horizon de toutes les stations
+        forme une seule matrice, soit un appel predict par modèle
+        Retourne une liste de prévisions (même ordre que conditions_list)
+        """
         if not self.temp_model or not self.rain_model:
             # Fallback sur prédictions simples si modèles pas entraînés
-            return self._simple_predictions(current_conditions, days_ahead)
-        
-        predictions = []
-        base_date = datetime.now()
+            return [self._simple_predictions(conditions, days_ahead) for conditions in conditions_list]
         
-        for day in range(1, days_ahead + 1):
-            future_date = base_date + timedelta(days=day)
-            
-            # Features pour prédiction
-            features = [[
-                future_date.timetuple().tm_yday,  # day_of_year
-                future_date.month,
-                12,  # heure midi par défaut
-                current_conditions.get('pressure', 1013),
-                current_conditions.get('humidity', 80),
-                current_conditions.get('wind_speed', 8)
-            ]]
-            
-            # Prédictions ML
-            temp_pred = self.temp_model.predict(features)[0]
-            rain_pred = max(0, self.rain_model.predict(features)[0])
-            
-            # Ajustements saisonniers pour le Gabon
-            temp_pred = self._adjust_seasonal_temp(temp_pred, future_date)
-            rain_pred = self._adjust_seasonal_rain(rain_pred, future_date)
-            
-            # Calculs MetPy pour la prédiction
-            pred_humidity = current_conditions.get('humidity', 80) + np.random.normal(0, 5)
-            pred_humidity = max(60, min(95, pred_humidity))
-            
-            thermal_analysis = self.analyze_thermal_stress(
-                temp_pred, pred_humidity, current_conditions.get('wind_speed', 8)
-            )
-            
-            predictions.append({
-                'date': future_date.date(),
-                'temperature': round(temp_pred, 1),
-                'precipitation': round(rain_pred, 1),
-                'humidity': round(pred_humidity, 1),
-                'thermal_analysis': thermal_analysis,
-                'confidence': self._calculate_confidence(day)
-            })
+        if not conditions_list:
+            return []
         
-        return predictions
+        base_date = datetime.now()
+        future_dates = [base_date + timedelta(days=day) for day in range(1, days_ahead + 1)]
+        
+        # Une ligne par (station, jour), colonnes dans l'ordre de l'entraînement
+        rows = [[
+            future_date.timetuple().tm_yday,  # day_of_year
+            future_date.month,
+            12,  # heure midi par défaut
+            conditions.get('pressure', 1013),
+            conditions.get('humidity', 80),
+            conditions.get('wind_speed', 8)
+        ] for conditions in conditions_list for future_date in future_dates]
+        features = pd.DataFrame(rows, columns=self.PREDICTION_FEATURES)
+        
+        # Prédictions ML (un appel par modèle)
+        temp_preds = self.temp_model.predict(features)
+        rain_preds = np.maximum(0, self.rain_model.predict(features))
+        
+        # Calculs MetPy pour la prédiction
+        humidities = features['humidity'].to_numpy(dtype=float) + np.random.normal(0, 5, len(features))
+        humidities = np.clip(humidities, 60, 95)
+        winds = features['wind_speed'].to_numpy(dtype=float)
+        
+        # Ajustements saisonniers pour le Gabon
+        temps = np.array([self._adjust_seasonal_temp(temp, future_dates[i % days_ahead])
+                          for i, temp in enumerate(temp_preds)])
+        rains = [self._adjust_seasonal_rain(rain, future_dates[i % days_ahead])
+                 for i, rain in enumerate(rain_preds)]
+        
+        thermal_analyses = self.analyze_thermal_stress_batch(temps, humidities, winds)
+        
+        results = []
+        for offset in range(0, len(features), days_ahead):
+            results.append([{
+                'date': future_dates[day].date(),
+                'temperature': round(float(temps[offset + day]), 1),
+                'precipitation': round(float(rains[offset + day]), 1),
+                'humidity': round(float(humidities[offset + day]), 1),
+                'thermal_analysis': thermal_analyses[offset + day],
+                'confidence': self._calculate_confidence(day + 1)
+            } for day in range(days_ahead)])
+        
+        return results
     
     def _adjust_seasonal_temp(self, base_temp, date):
         """Ajustements saisonniers température pour Gabon"""
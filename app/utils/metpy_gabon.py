@@ -4,8 +4,6 @@ Module MetPy spécialisé pour le climat gabonais
 Calculs météorologiques avancés adaptés au contexte tropical équatorial
 """
 
-import metpy.calc as mpcalc
-import metpy.units as units
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -15,6 +13,8 @@ from sklearn.model_selection import train_test_split
 import joblib
 import os
 import logging
+from app.utils import thermo_kernel
+from app.utils.model_cache import model_cache, save_model
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -67,9 +67,23 @@ class GabonClimateConstants:
         'SHORT_RAINY': [3, 4, 5]  # Mar-Mai
     }
 
+# Code numérique de la saison de chaque mois, fixe d'un processus à l'autre
+# (hash() des chaînes varie selon le processus) : les modèles entraînés dans les
+# processus du pool et partagés sur disque voient les mêmes codes en prédiction
+SEASON_CODES = {month: code
+                for code, season in enumerate(sorted(GabonClimateConstants.SEASONS))
+                for month in GabonClimateConstants.SEASONS[season]}
+
 class GabonMetPyCore:
     """Cœur des calculs météorologiques MetPy pour le Gabon"""
-    
+
+    # Modèles sauvegardés : {nom}_gabon.pkl
+    MODELS_DIR = 'app/ml_models'
+    MODEL_NAMES = ('temperature', 'precipitation')
+    # Colonnes des modèles de prévision (ordre d'entraînement)
+    PREDICTION_FEATURES = ['day_of_year', 'month', 'hour', 'season_code',
+                           'pressure', 'humidity', 'wind_speed', 'heat_index_lag']
+
     def __init__(self):
         self.constants = GabonClimateConstants()
         self.models = {}
@@ -80,56 +94,27 @@ class GabonMetPyCore:
     
     def calculate_heat_index(self, temperature, humidity):
         """
-        Calcule l'indice de chaleur avec MetPy
+        Calcule l'indice de chaleur (régression de Rothfusz, noyau NumPy)
         Crucial pour le climat tropical gabonais
+        Accepte des scalaires ou des tableaux ; valeur non calculable : température
         """
-        try:
-            temp = temperature * units.celsius
-            rh = humidity * units.percent
-            heat_index = mpcalc.heat_index(temp, rh)
-            return float(heat_index.to('celsius').magnitude)
-        except Exception as e:
-            logger.warning(f"Erreur calcul heat index: {e}")
-            return temperature  # Fallback
+        heat_index = thermo_kernel.heat_index(temperature, humidity)
+        if np.ndim(heat_index) == 0:
+            return temperature if np.isnan(heat_index) else heat_index  # Fallback
+        return np.where(np.isnan(heat_index), temperature, heat_index)
     
     def calculate_dewpoint(self, temperature, humidity):
-        """Calcule le point de rosée"""
-        try:
-            temp = temperature * units.celsius
-            rh = humidity * units.percent
-            dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
-            return float(dewpoint.to('celsius').magnitude)
-        except Exception as e:
-            logger.warning(f"Erreur calcul dewpoint: {e}")
-            return temperature - 5  # Approximation simple
+        """Calcule le point de rosée (formule de Magnus)"""
+        return thermo_kernel.dewpoint(temperature, humidity)
     
     def calculate_wet_bulb_temperature(self, temperature, pressure, humidity):
-        """Calcule la température du thermomètre mouillé"""
-        try:
-            temp = temperature * units.celsius
-            press = pressure * units.hPa
-            rh = humidity * units.percent
-            
-            dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
-            wet_bulb = mpcalc.wet_bulb_temperature(press, temp, dewpoint)
-            return float(wet_bulb.to('celsius').magnitude)
-        except Exception as e:
-            logger.warning(f"Erreur calcul wet bulb: {e}")
-            return temperature - 2  # Approximation
+        """Calcule la température du thermomètre mouillé (approximation de Stull)"""
+        return thermo_kernel.wet_bulb_temperature(temperature, humidity)
     
     def calculate_equivalent_potential_temperature(self, temperature, pressure, humidity):
-        """Calcule la température potentielle équivalente"""
-        try:
-            temp = temperature * units.celsius
-            press = pressure * units.hPa
-            rh = humidity * units.percent
-            
-            dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
-            equiv_pot_temp = mpcalc.equivalent_potential_temperature(press, temp, dewpoint)
-            return float(equiv_pot_temp.to('kelvin').magnitude)
-        except Exception as e:
-            logger.warning(f"Erreur calcul EPT: {e}")
-            return temperature + 273.15
+        """Calcule la température potentielle équivalente (Bolton)"""
+        dewpoint = thermo_kernel.dewpoint(temperature, humidity)
+        return thermo_kernel.equivalent_potential_temperature(pressure, temperature, dewpoint)
     
     # ========= ANALYSES SPÉCIALISÉES GABON =========
     
@@ -288,8 +273,7 @@ class GabonMetPyCore:
             df = self._create_gabon_features(df)
             
             # Séparation des données
-            features = ['day_of_year', 'month', 'hour', 'season_code', 
-                       'pressure', 'humidity', 'wind_speed', 'heat_index_lag']
+            features = list(self.PREDICTION_FEATURES)
             
             # Préparation données température
             temp_data = df[features + ['temperature']].dropna()
@@ -361,17 +345,11 @@ class GabonMetPyCore:
         df['hour'] = df['timestamp'].dt.hour
         
         # Codage des saisons gabonaises
-        season_map = {}
-        for season, months in self.constants.SEASONS.items():
-            for month in months:
-                season_map[month] = hash(season) % 4  # Code numérique
-        
-        df['season_code'] = df['month'].map(season_map)
+        df['season_code'] = df['month'].map(SEASON_CODES)
         
-        # Features météorologiques dérivées
-        df['heat_index'] = df.apply(lambda row: self.calculate_heat_index(
-            row['temperature'], row.get('humidity', 80)
-        ), axis=1)
+        # Features météorologiques dérivées (calcul vectorisé sur toute la colonne)
+        humidity = df['humidity'].to_numpy(dtype=float) if 'humidity' in df else 80.0
+        df['heat_index'] = self.calculate_heat_index(df['temperature'].to_numpy(dtype=float), humidity)
         
         # Lag features (valeurs précédentes)
         df['heat_index_lag'] = df['heat_index'].shift(1).fillna(df['heat_index'].mean())
@@ -382,69 +360,82 @@ class GabonMetPyCore:
         """
         Prévisions météo spécialisées pour le Gabon
         """
-        if not self.models_trained:
-            # Charger les modèles sauvegardés ou utiliser prévisions simples
-            if not self._load_models():
-                return self._simple_gabon_predictions(current_conditions, days_ahead)
+        return self.predict_gabon_weather_batch([current_conditions], days_ahead)[0]
+    
+    def predict_gabon_weather_batch(self, conditions_list, days_ahead=7):
+        """
+        Prévisions de plusieurs stations en un passage
+        
+        L'horizon de toutes les stations forme une seule matrice de features :
+        un appel predict par modèle, quel que soit le nombre de stations/jours.
+        Retourne une liste de prévisions (même ordre que conditions_list).
+        """
+        # Modèles sauvegardés (cache process, rechargés après ré-entraînement) ou prévisions simples
+        if not self._load_models() and not self.models_trained:
+            return [self._simple_gabon_predictions(conditions, days_ahead) for conditions in conditions_list]
+        
+        if not conditions_list:
+            return []
         
         try:
-            predictions = []
             base_date = datetime.now()
+            future_dates = [base_date + timedelta(days=day) for day in range(1, days_ahead + 1)]
+            
+            # Préparation features : une ligne par (station, jour)
+            features = pd.DataFrame(
+                [self._prepare_prediction_features(future_date, conditions)
+                 for conditions in conditions_list for future_date in future_dates],
+                columns=self.PREDICTION_FEATURES
+            )
             
-            for day in range(1, days_ahead + 1):
-                future_date = base_date + timedelta(days=day)
-                
-                # Préparation features pour prédiction
-                features = self._prepare_prediction_features(future_date, current_conditions)
-                
-                # Prédictions
-                temp_pred = self.models['temperature'].predict([features])[0]
-                rain_pred = max(0, self.models['precipitation'].predict([features])[0])
-                
-                # Ajustements climatiques Gabon
-                temp_pred, rain_pred = self._apply_gabon_climate_adjustments(
-                    temp_pred, rain_pred, future_date
-                )
-                
-                # Estimation humidité (basée sur patterns gabonais)
-                humidity_pred = self._predict_humidity_gabon(temp_pred, rain_pred, future_date)
-                
-                # Analyse thermique de la prédiction
-                thermal_analysis = self.analyze_thermal_comfort(
-                    temp_pred, humidity_pred, 
-                    current_conditions.get('wind_speed', 6)
-                )
-                
-                predictions.append({
-                    'date': future_date.date(),
-                    'temperature': round(temp_pred, 1),
-                    'precipitation': round(rain_pred, 1),
-                    'humidity': round(humidity_pred, 1),
-                    'thermal_comfort': thermal_analysis,
-                    'confidence': self._calculate_prediction_confidence(day),
-                    'climate_factors': self._get_climate_factors(future_date)
-                })
+            # Prédictions (un appel par modèle)
+            temp_preds = self.models['temperature'].predict(features)
+            rain_preds = np.maximum(0, self.models['precipitation'].predict(features))
             
-            return predictions
+            results = []
+            for station_index, conditions in enumerate(conditions_list):
+                predictions = []
+                for day, future_date in enumerate(future_dates, start=1):
+                    row = station_index * days_ahead + day - 1
+                    
+                    # Ajustements climatiques Gabon
+                    temp_pred, rain_pred = self._apply_gabon_climate_adjustments(
+                        float(temp_preds[row]), float(rain_preds[row]), future_date
+                    )
+                    
+                    # Estimation humidité (basée sur patterns gabonais)
+                    humidity_pred = self._predict_humidity_gabon(temp_pred, rain_pred, future_date)
+                    
+                    # Analyse thermique de la prédiction
+                    thermal_analysis = self.analyze_thermal_comfort(
+                        temp_pred, humidity_pred, 
+                        conditions.get('wind_speed', 6)
+                    )
+                    
+                    predictions.append({
+                        'date': future_date.date(),
+                        'temperature': round(temp_pred, 1),
+                        'precipitation': round(rain_pred, 1),
+                        'humidity': round(humidity_pred, 1),
+                        'thermal_comfort': thermal_analysis,
+                        'confidence': self._calculate_prediction_confidence(day),
+                        'climate_factors': self._get_climate_factors(future_date)
+                    })
+                results.append(predictions)
+            
+            return results
             
         except Exception as e:
             logger.error(f"Erreur prédiction: {e}")
-            return self._simple_gabon_predictions(current_conditions, days_ahead)
+            return [self._simple_gabon_predictions(conditions, days_ahead) for conditions in conditions_list]
     
     def _prepare_prediction_features(self, future_date, current_conditions):
-        """Prépare les features pour la prédiction"""
-        
-        # Mapping des saisons
-        season_map = {}
-        for season, months in self.constants.SEASONS.items():
-            for month in months:
-                season_map[month] = hash(season) % 4
-        
+        """Prépare les features pour la prédiction (ordre de PREDICTION_FEATURES)"""
         return [
             future_date.timetuple().tm_yday,  # day_of_year
             future_date.month,
             12,  # heure midi par défaut
-            season_map.get(future_date.month, 0),  # season_code
+            SEASON_CODES.get(future_date.month, 0),  # season_code
             current_conditions.get('pressure', 1013),
             current_conditions.get('humidity', 80),
             current_conditions.get('wind_speed', 6),
@@ -566,31 +557,36 @@ class GabonMetPyCore:
         
         return predictions
     
+    def _model_path(self, model_name):
+        return os.path.join(self.MODELS_DIR, f'{model_name}_gabon.pkl')
+
     def _save_models(self):
-        """Sauvegarde les modèles entraînés"""
+        """Sauvegarde les modèles entraînés (écriture atomique : les lecteurs ne voient jamais un fichier partiel)"""
         try:
-            os.makedirs('app/ml_models', exist_ok=True)
             for model_name, model in self.models.items():
-                joblib.dump(model, f'app/ml_models/{model_name}_gabon.pkl')
+                save_model(model, self._model_path(model_name))
             logger.info("Modèles sauvegardés avec succès")
         except Exception as e:
             logger.error(f"Erreur sauvegarde modèles: {e}")
     
     def _load_models(self):
-        """Charge les modèles sauvegardés"""
+        """
+        Charge les modèles sauvegardés via le cache partagé du processus
+
+        Chaque fichier n'est lu qu'une fois ; un fichier réécrit par un
+        ré-entraînement est rechargé au prochain appel.
+        """
         try:
-            model_files = ['temperature_gabon.pkl', 'precipitation_gabon.pkl']
-            for model_file in model_files:
-                model_path = f'app/ml_models/{model_file}'
-                if os.path.exists(model_path):
-                    model_name = model_file.replace('_gabon.pkl', '')
-                    self.models[model_name] = joblib.load(model_path)
-            
-            if len(self.models) == 2:
-                self.models_trained = True
-                logger.info("Modèles chargés avec succès")
-                return True
-            return False
+            models = {}
+            for model_name in self.MODEL_NAMES:
+                model = model_cache.get(self._model_path(model_name))
+                if model is None:
+                    return False
+                models[model_name] = model
+
+            self.models.update(models)
+            self.models_trained = True
+            return True
         except Exception as e:
             logger.error(f"Erreur chargement modèles: {e}")
-            return False
\ No newline at end of file
+            return False
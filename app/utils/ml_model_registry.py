@@ -0,0 +1,174 @@
+# app/utils/ml_model_registry.py
+"""
+Registre persistant des modèles ML de prévision, par station et par variable cible
+
+Chaque modèle est sauvegardé sur disque (joblib) avec ses métadonnées
+(fenêtre d'entraînement, features, MAE/R², version). Les modèles sont chargés
+à la demande et conservés dans un cache LRU borné en mémoire ; la signature du
+fichier (inode, date de modification, taille) est vérifiée à chaque accès, si bien qu'un
+modèle ré-entraîné par un autre processus (pool d'entraînement) est rechargé.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from app.utils.model_cache import file_signature
+import joblib
+import json
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de modèles (station, cible) gardés en mémoire
+DEFAULT_MAX_LOADED = 64
+
+
+class ModelRegistry:
+    """Stockage disque + cache LRU des modèles (station_id, cible)"""
+
+    def __init__(self, base_dir=None, max_loaded=DEFAULT_MAX_LOADED):
+        self._base_dir = base_dir
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def base_dir(self):
+        """Répertoire des modèles (configuration ML_MODELS_DIR par défaut)"""
+        if self._base_dir is None:
+            return current_app.config['ML_MODELS_DIR']
+        return self._base_dir
+
+    def station_dir(self, station_id):
+        return os.path.join(self.base_dir, f'station_{station_id}')
+
+    def _paths(self, station_id, target):
+        base = os.path.join(self.station_dir(station_id), target)
+        return f'{base}.joblib', f'{base}.json'
+
+    # ================================
+    # ÉCRITURE
+    # ================================
+
+    def save(self, station_id, target, model, scaler, metadata):
+        """
+        Enregistre un modèle entraîné et retourne ses métadonnées complétées
+
+        La version est incrémentée à chaque nouvel enregistrement ; l'écriture
+        passe par un fichier temporaire pour ne jamais exposer un modèle partiel.
+        """
+        model_path, meta_path = self._paths(station_id, target)
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+
+        previous = self.get_metadata(station_id, target)
+        metadata = dict(
+            metadata,
+            station_id=station_id,
+            target=target,
+            version=(previous or {}).get('version', 0) + 1,
+            saved_at=datetime.utcnow().isoformat()
+        )
+
+        _atomic_write(model_path, lambda f: joblib.dump(
+            {'model': model, 'scaler': scaler, 'metadata': metadata}, f))
+        _atomic_write(meta_path, lambda f: f.write(json.dumps(metadata, default=str).encode('utf-8')))
+
+        with self._lock:
+            self._loaded.pop((station_id, target), None)
+
+        logger.info(f"Modèle {target} v{metadata['version']} enregistré pour la station {station_id}")
+        return metadata
+
+    def invalidate(self, station_id=None):
+        """Retire du cache mémoire les modèles d'une station (ou tous)"""
+        with self._lock:
+            for key in [k for k in self._loaded if station_id is None or k[0] == station_id]:
+                del self._loaded[key]
+
+    # ================================
+    # LECTURE
+    # ================================
+
+    def load(self, station_id, target):
+        """Retourne {'model', 'scaler', 'metadata'} ou None si aucun modèle n'est enregistré"""
+        key = (station_id, target)
+        model_path, _ = self._paths(station_id, target)
+        signature = file_signature(model_path)
+
+        with self._lock:
+            if signature is None:
+                self._loaded.pop(key, None)
+                return None
+            cached = self._loaded.get(key)
+            if cached is not None and cached[0] == signature:
+                self._loaded.move_to_end(key)
+                return cached[1]
+
+        entry = joblib.load(model_path)
+
+        with self._lock:
+            self._loaded[key] = (signature, entry)
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+        return entry
+
+    def targets(self, station_id):
+        """Cibles disposant d'un modèle enregistré pour la station"""
+        directory = self.station_dir(station_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len('.joblib')] for name in os.listdir(directory) if name.endswith('.joblib'))
+
+    def load_station(self, station_id):
+        """Tous les modèles d'une station : {cible: entrée}"""
+        models = {}
+        for target in self.targets(station_id):
+            entry = self.load(station_id, target)
+            if entry is not None:
+                models[target] = entry
+        return models
+
+    def get_metadata(self, station_id, target):
+        """Métadonnées d'un modèle sans charger le modèle lui-même"""
+        _, meta_path = self._paths(station_id, target)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def station_metadata(self, station_id):
+        """{cible: métadonnées} pour une station"""
+        return {target: self.get_metadata(station_id, target) for target in self.targets(station_id)}
+
+    def station_version(self, station_id):
+        """
+        Empreinte des modèles enregistrés d'une station (cibles et dates d'écriture)
+        Change à chaque ré-entraînement ; None si la station n'a aucun modèle
+        """
+        directory = self.station_dir(station_id)
+        parts = []
+        for target in self.targets(station_id):
+            signature = file_signature(os.path.join(directory, f'{target}.joblib'))
+            if signature is not None:
+                parts.append(f"{target}:{'-'.join(str(part) for part in signature)}")
+        return ','.join(parts) or None
+
+
+def _atomic_write(path, write):
+    """Écrit dans un fichier temporaire puis le renomme sur la destination"""
+    tmp_path = f'{path}.tmp.{os.getpid()}.{threading.get_ident()}'
+    try:
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Registre partagé du processus
+model_registry = ModelRegistry()
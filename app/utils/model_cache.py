@@ -0,0 +1,128 @@
+# app/utils/model_cache.py
+"""
+Cache des fichiers de modèles (joblib/pickle) partagé par tout le processus
+
+Chaque fichier est lu une seule fois puis servi depuis la mémoire. L'inode, la date
+de modification et la taille du fichier sont vérifiés à chaque accès : après un
+ré-entraînement (nouveau fichier), le modèle est rechargé automatiquement.
+Les tableaux NumPy peuvent être projetés en mémoire (joblib mmap_mode, option
+ML_MODEL_MMAP_MODE) pour partager les pages entre processus.
+"""
+
+from flask import current_app, has_app_context
+import joblib
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCache:
+    """Modèles chargés une fois par processus, rechargés si le fichier change"""
+
+    def __init__(self, mmap_mode=None):
+        self._mmap_mode = mmap_mode
+        self._entries = {}       # chemin -> (signature, modèle)
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._stats = {'hits': 0, 'loads': 0, 'reloads': 0, 'missing': 0, 'load_seconds_total': 0.0}
+        self._last_loads = {}    # chemin -> {'seconds', 'loaded_at'}
+
+    @property
+    def mmap_mode(self):
+        if self._mmap_mode is None and has_app_context():
+            return current_app.config.get('ML_MODEL_MMAP_MODE')
+        return self._mmap_mode
+
+    def get(self, path):
+        """Modèle stocké dans path, ou None si le fichier n'existe pas"""
+        path = os.path.abspath(path)
+        signature = file_signature(path)
+        if signature is None:
+            with self._lock:
+                self._stats['missing'] += 1
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._stats['hits'] += 1
+                return entry[1]
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        # Un seul chargement par fichier, même sous requêtes concurrentes
+        with path_lock:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == signature:
+                    self._stats['hits'] += 1
+                    return entry[1]
+                reload = entry is not None
+
+            started = time.perf_counter()
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+            seconds = time.perf_counter() - started
+
+            with self._lock:
+                self._entries[path] = (signature, model)
+                self._stats['reloads' if reload else 'loads'] += 1
+                self._stats['load_seconds_total'] += seconds
+                self._last_loads[path] = {'seconds': round(seconds, 4), 'loaded_at': time.time()}
+
+        logger.info(f"Modèle {'rechargé' if reload else 'chargé'} depuis {path} en {seconds * 1000:.1f} ms")
+        return model
+
+    def invalidate(self, path=None):
+        """Oublie un modèle (ou tous) : le prochain accès relit le disque"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def metrics(self):
+        """Compteurs du cache et latence du dernier chargement de chaque fichier"""
+        with self._lock:
+            stats = dict(self._stats)
+            last_loads = {path: dict(info) for path, info in self._last_loads.items()}
+            cached = len(self._entries)
+        loads = stats['loads'] + stats['reloads']
+        return {
+            'cached_models': cached,
+            'mmap_mode': self.mmap_mode,
+            **stats,
+            'load_seconds_total': round(stats['load_seconds_total'], 4),
+            'avg_load_seconds': round(stats['load_seconds_total'] / loads, 4) if loads else None,
+            'files': last_loads
+        }
+
+
+def save_model(model, path):
+    """Écrit un modèle de façon atomique (fichier temporaire puis renommage)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp.{os.getpid()}.{threading.get_ident()}'
+    try:
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def file_signature(path):
+    """
+    Signature (inode, date de modification, taille) d'un fichier, None s'il n'existe pas
+    L'inode change à chaque écriture atomique (renommage), même si la date est identique
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+# Cache partagé du processus
+model_cache = ModelCache()
@@ -0,0 +1,205 @@
+# app/utils/permission_scopes.py
+"""
+Périmètres de permission DGM mis en cache par utilisateur
+
+Un périmètre ne contient que des identifiants (ensembles de stations et de
+services), jamais d'objets ORM : il peut être partagé entre requêtes. Les
+entrées expirent après PERMISSION_SCOPE_TTL secondes et sont invalidées au
+commit d'un changement de fonction, service ou station d'un agent, de rôle
+d'un utilisateur, ou de la structure (services, directions, stations).
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from app import db
+from app.models.agent import AgentDGM, Direction, Service
+from app.models.weather_data import WeatherStation
+from app.models.user import User
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+
+ADMIN_ROLES = ('admin', 'superadmin')
+
+
+def compute_permission_scope(user):
+    """
+    Périmètre d'un utilisateur selon son rôle et sa position hiérarchique
+    Retourne None si l'utilisateur n'est ni administrateur ni agent DGM
+    """
+    agent_row = db.session.query(AgentDGM.id, AgentDGM.fonction, AgentDGM.service_id,
+                                 AgentDGM.station_id).filter(AgentDGM.user_id == user.id).first()
+
+    # Les admins ont accès à tout
+    if user.role in ADMIN_ROLES:
+        return {
+            'role': user.role,
+            'agent_id': agent_row.id if agent_row else None,
+            'can_validate': True,
+            'can_view_all_services': True,
+            'can_manage_agents': True,
+            'station_ids': _all_ids(WeatherStation.id),
+            'service_ids': _all_ids(Service.id)
+        }
+    if agent_row is None:
+        return None
+
+    scope = agent_permission_scope(agent_row)
+    scope['role'] = user.role
+    return scope
+
+
+def agent_permission_scope(agent):
+    """Permissions d'un agent (objet ou ligne avec id, fonction, service_id, station_id)"""
+    scope = {
+        'agent_id': agent.id,
+        'can_validate': False,
+        'can_view_all_services': False,
+        'can_manage_agents': False,
+        'station_ids': frozenset(),
+        'service_ids': frozenset()
+    }
+
+    # Fonction spécifique = permissions spéciales
+    fonction_lower = agent.fonction.lower()
+
+    # Chef de service = peut valider dans son service (stations de la région de sa direction)
+    if 'chef' in fonction_lower and 'service' in fonction_lower:
+        direction_name = db.session.query(Direction.name).join(Service)\
+                                   .filter(Service.id == agent.service_id).scalar()
+        scope['can_validate'] = True
+        scope['service_ids'] = frozenset([agent.service_id])
+        scope['station_ids'] = _all_ids(WeatherStation.id, WeatherStation.region == direction_name)
+
+    # Directeur = peut tout voir dans sa direction
+    elif 'directeur' in fonction_lower:
+        direction_id = db.session.query(Service.direction_id).filter(Service.id == agent.service_id).scalar()
+        scope['can_validate'] = True
+        scope['can_view_all_services'] = True
+        scope['service_ids'] = _all_ids(Service.id, Service.direction_id == direction_id)
+        scope['station_ids'] = _all_ids(WeatherStation.id)
+
+    # Agent normal = accès limité à sa station
+    else:
+        scope['station_ids'] = frozenset([agent.station_id]) if agent.station_id else frozenset()
+        scope['service_ids'] = frozenset([agent.service_id])
+
+    return scope
+
+
+def _all_ids(column, *criteria):
+    return frozenset(row[0] for row in db.session.query(column).filter(*criteria).all())
+
+
+class PermissionScopeCache:
+    """Périmètres {user_id: (expiration, périmètre)}, protégés par un verrou"""
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @property
+    def ttl(self):
+        if self._ttl is None and has_app_context():
+            return current_app.config.get('PERMISSION_SCOPE_TTL', DEFAULT_TTL)
+        return self._ttl or DEFAULT_TTL
+
+    def get(self, user):
+        """Périmètre de l'utilisateur (copie), calculé au premier accès ; None si aucun accès"""
+        now = time.time()
+        with self._lock:
+            entry = self._scopes.get(user.id)
+            # Un changement de rôle est détecté sans requête (utilisateur déjà chargé)
+            if entry is not None and entry[0] > now and (entry[1] is None or entry[1]['role'] == user.role):
+                self._stats['hits'] += 1
+                return dict(entry[1]) if entry[1] is not None else None
+            self._stats['misses'] += 1
+
+        scope = compute_permission_scope(user)
+        with self._lock:
+            self._scopes[user.id] = (now + self.ttl, scope)
+        return dict(scope) if scope is not None else None
+
+    def invalidate(self, user_ids=None):
+        """Oublie les périmètres de ces utilisateurs (tous si None)"""
+        with self._lock:
+            if user_ids is None:
+                self._scopes.clear()
+            else:
+                for user_id in user_ids:
+                    self._scopes.pop(user_id, None)
+            self._stats['invalidations'] += 1
+
+    def metrics(self):
+        with self._lock:
+            return {'entries': len(self._scopes), **self._stats}
+
+
+# Cache partagé du processus
+permission_scopes = PermissionScopeCache()
+
+
+# ================================
+# INVALIDATION SUR CHANGEMENTS
+# ================================
+
+# Attributs d'un agent qui déterminent son périmètre
+AGENT_SCOPE_ATTRIBUTES = ('fonction', 'service_id', 'station_id', 'user_id')
+
+# Changements structurels : tous les périmètres sont recalculés
+STRUCTURE_MODELS = (Service, Direction, WeatherStation)
+
+
+def _changed(obj, attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_scope_changes(session, flush_context, instances):
+    stale = session.info.setdefault('stale_permission_scopes', set())
+
+    for obj in session.new | session.deleted:
+        if isinstance(obj, STRUCTURE_MODELS):
+            stale.add(None)
+        elif isinstance(obj, AgentDGM):
+            stale.add(obj.user_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, AgentDGM) and _changed(obj, AGENT_SCOPE_ATTRIBUTES):
+            stale.add(obj.user_id)
+            previous = inspect(obj).attrs.user_id.history.deleted
+            stale.update(previous or ())
+        elif isinstance(obj, User) and _changed(obj, ('role',)):
+            stale.add(obj.id)
+        elif isinstance(obj, Service) and _changed(obj, ('direction_id',)):
+            stale.add(None)
+        elif isinstance(obj, Direction) and _changed(obj, ('name',)):
+            stale.add(None)
+        elif isinstance(obj, WeatherStation) and _changed(obj, ('region',)):
+            stale.add(None)
+
+    if not stale:
+        session.info.pop('stale_permission_scopes', None)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_scopes_after_commit(session):
+    stale = session.info.pop('stale_permission_scopes', None)
+    if not stale:
+        return
+    if None in stale:
+        permission_scopes.invalidate()
+    else:
+        permission_scopes.invalidate(stale)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_scopes_after_rollback(session):
+    session.info.pop('stale_permission_scopes', None)
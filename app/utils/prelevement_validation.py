@@ -0,0 +1,167 @@
+# app/utils/prelevement_validation.py
+"""
+Validation ensembliste des prélèvements (centre de validation DGM)
+
+Au lieu d'un chargement ORM par identifiant :
+- une requête de sélection jointe à l'agent, le périmètre (services) étant
+  évalué en SQL, par bloc d'identifiants
+- un UPDATE groupé de validated
+- un INSERT groupé des WeatherData dérivées, intégrées aux agrégats
+- un résultat détaillé par identifiant, le tout dans une seule transaction
+"""
+
+from types import SimpleNamespace
+from sqlalchemy import case, select, update
+from app import db
+from app.models.agent import AgentDGM, Prelevement
+from app.models.weather_data import WeatherData
+from app.utils.weather_rollups import apply_observations
+from app.utils.forecast_cache import forecast_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'identifiants par clause IN (limite de paramètres des bases)
+VALIDATION_CHUNK_SIZE = 500
+
+# Statuts par identifiant
+STATUS_VALIDATED = 'validated'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_OUT_OF_SCOPE = 'out_of_scope'
+STATUS_ALREADY_VALIDATED = 'already_validated'
+STATUS_INVALID = 'invalid'
+
+STATUS_MESSAGES = {
+    STATUS_NOT_FOUND: 'Prélèvement {} non trouvé',
+    STATUS_OUT_OF_SCOPE: 'Prélèvement {} hors périmètre',
+    STATUS_ALREADY_VALIDATED: 'Prélèvement {} déjà validé',
+    STATUS_INVALID: 'Identifiant {} invalide',
+}
+
+# Colonnes recopiées du prélèvement vers WeatherData
+MEASUREMENT_COLUMNS = ('temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction', 'precipitation')
+
+
+def validate_prelevements(prelevement_ids, service_ids):
+    """
+    Valide un lot de prélèvements appartenant aux services autorisés
+
+    Retourne une liste [{'id', 'status'}] dans l'ordre de la demande
+    (doublons ignorés). L'appelant n'a pas à committer ; en cas d'erreur la
+    transaction est annulée et l'exception propagée.
+    """
+    ids, results = _normalise_ids(prelevement_ids)
+    rows = {}
+    for start in range(0, len(ids), VALIDATION_CHUNK_SIZE):
+        rows.update(_select_rows(ids[start:start + VALIDATION_CHUNK_SIZE], service_ids))
+
+    to_validate = []
+    for prelevement_id in ids:
+        row = rows.get(prelevement_id)
+        if row is None:
+            status = STATUS_NOT_FOUND
+        elif not row.in_scope:
+            status = STATUS_OUT_OF_SCOPE
+        elif row.validated:
+            status = STATUS_ALREADY_VALIDATED
+        else:
+            status = STATUS_VALIDATED
+            to_validate.append(row)
+        results[prelevement_id] = status
+
+    try:
+        updated = _apply_validation(to_validate) if to_validate else set()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Validés entre la sélection et l'UPDATE par une autre requête
+    for row in to_validate:
+        if row.id not in updated:
+            results[row.id] = STATUS_ALREADY_VALIDATED
+
+    if updated:
+        forecast_cache.invalidate({row.station_id for row in to_validate if row.id in updated})
+
+    return [{'id': prelevement_id, 'status': status} for prelevement_id, status in results.items()]
+
+
+def result_errors(results):
+    """Messages d'erreur (format historique de batch_validate) des éléments non validés"""
+    return [STATUS_MESSAGES[item['status']].format(item['id'])
+            for item in results if item['status'] != STATUS_VALIDATED]
+
+
+def _normalise_ids(prelevement_ids):
+    """Identifiants entiers uniques (ordre conservé) ; les valeurs invalides sont signalées"""
+    ids, results = [], {}
+    for value in prelevement_ids:
+        try:
+            prelevement_id = int(value)
+        except (TypeError, ValueError):
+            results.setdefault(value if isinstance(value, (int, str)) else str(value), STATUS_INVALID)
+            continue
+        if prelevement_id not in results:
+            results[prelevement_id] = None
+            ids.append(prelevement_id)
+    return ids, results
+
+
+def _select_rows(ids, service_ids):
+    """Prélèvements demandés avec leur appartenance au périmètre, en une requête"""
+    in_scope = case((AgentDGM.service_id.in_(service_ids), True), else_=False)
+    rows = db.session.query(
+        Prelevement.id,
+        Prelevement.validated,
+        Prelevement.station_id,
+        Prelevement.date_prelevement,
+        *[getattr(Prelevement, column) for column in MEASUREMENT_COLUMNS],
+        in_scope.label('in_scope')
+    ).join(AgentDGM, Prelevement.agent_id == AgentDGM.id)\
+     .filter(Prelevement.id.in_(ids)).all()
+    return {row.id: row for row in rows}
+
+
+def _apply_validation(rows):
+    """
+    UPDATE groupé des prélèvements puis INSERT groupé des observations dérivées
+
+    Seuls les prélèvements effectivement passés à validated par l'UPDATE
+    produisent une observation : une validation concurrente entre la sélection
+    et l'UPDATE ne crée pas de doublon. Retourne l'ensemble des identifiants mis à jour.
+    """
+    ids = [row.id for row in rows]
+    updated = set()
+    for start in range(0, len(ids), VALIDATION_CHUNK_SIZE):
+        updated.update(_update_validated(ids[start:start + VALIDATION_CHUNK_SIZE]))
+
+    records = [{
+        'station_id': row.station_id,
+        'timestamp': row.date_prelevement,
+        **{column: getattr(row, column) for column in MEASUREMENT_COLUMNS}
+    } for row in rows if row.id in updated]
+    if records:
+        db.session.bulk_insert_mappings(WeatherData, records)
+        # Les insertions groupées ne passent pas par le flush ORM
+        apply_observations(db.session, [SimpleNamespace(**record) for record in records])
+    return updated
+
+
+def _update_validated(ids):
+    """Identifiants réellement mis à jour (RETURNING, sinon lignes verrouillées avant l'UPDATE)"""
+    pending = Prelevement.validated.isnot(True)
+    if db.session.get_bind().dialect.update_returning:
+        statement = update(Prelevement).where(Prelevement.id.in_(ids), pending)\
+                                        .values(validated=True).returning(Prelevement.id)
+        return set(db.session.execute(statement, execution_options={'synchronize_session': False}).scalars())
+
+    # Sans RETURNING : les lignes encore à valider sont verrouillées (FOR UPDATE)
+    # jusqu'au commit, l'UPDATE porte alors exactement sur elles
+    locked = set(db.session.execute(
+        select(Prelevement.id).where(Prelevement.id.in_(ids), pending).with_for_update()
+    ).scalars())
+    if locked:
+        db.session.execute(update(Prelevement).where(Prelevement.id.in_(locked)).values(validated=True),
+                           execution_options={'synchronize_session': False})
+    return locked
@@ -0,0 +1,140 @@
+# app/utils/skewt_background.py
+"""
+Fond statique des diagrammes Skew-T (adiabatiques sèches, pseudo-adiabatiques,
+lignes de rapport de mélange, axes et graduations)
+
+Le fond ne dépend pas de la station. Les courbes sont calculées une seule fois
+par processus (background_lines) ; le gabarit SkewTTemplate va plus loin : le
+fond complet est rasterisé une fois, puis chaque rendu restaure ces pixels et
+ne dessine que les éléments propres à la station (profil, parcelle, CAPE/CIN,
+vent, légende, titre).
+"""
+
+from functools import lru_cache
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from metpy.plots import SkewT
+from PIL import Image
+import numpy as np
+import threading
+import io
+import metpy.calc as mpcalc
+from metpy.units import units
+
+# Domaine des diagrammes Skew-T de l'application
+PRESSURE_TOP = 100
+PRESSURE_BOTTOM = 1000
+TEMPERATURE_LIMITS = (-40, 60)
+
+DRY_ADIABAT_T0 = np.arange(233, 533, 10)      # K
+MOIST_ADIABAT_T0 = np.arange(233, 400, 5)     # K
+MIXING_LINE_PRESSURES = np.arange(1000, 99, -100)  # hPa
+MIXING_RATIOS = np.array([0.0004, 0.001, 0.002, 0.004, 0.007, 0.01, 0.016, 0.024, 0.032])
+
+
+def _segments(temperatures, pressure):
+    """Liste de tableaux (N, 2) [température °C, pression hPa], en lecture seule"""
+    segments = []
+    for t in temperatures:
+        segment = np.column_stack((t, pressure))
+        segment.flags.writeable = False
+        segments.append(segment)
+    return segments
+
+
+@lru_cache(maxsize=None)
+def background_lines():
+    """Courbes du fond en coordonnées de données, calculées une fois par processus"""
+    pressure = units.Quantity(np.linspace(PRESSURE_BOTTOM, PRESSURE_TOP), 'hPa')
+    reference = units.Quantity(1000., 'hPa')
+
+    dry = mpcalc.dry_lapse(pressure, units.Quantity(DRY_ADIABAT_T0, 'K')[:, np.newaxis], reference)
+    moist = mpcalc.moist_lapse(pressure, units.Quantity(MOIST_ADIABAT_T0, 'K'), reference)
+
+    mixing_pressure = units.Quantity(MIXING_LINE_PRESSURES, 'hPa')
+    mixing = mpcalc.dewpoint(mpcalc.vapor_pressure(mixing_pressure, MIXING_RATIOS.reshape(-1, 1)))
+
+    return {
+        'dry_adiabats': _segments(dry.to('degC').magnitude, pressure.magnitude),
+        'moist_adiabats': _segments(moist.to('degC').magnitude, pressure.magnitude),
+        'mixing_lines': _segments(mixing.to('degC').magnitude, mixing_pressure.magnitude),
+    }
+
+
+def draw_background(skew, alpha=0.25):
+    """Ajoute le fond précalculé à un SkewT (mêmes styles que les méthodes MetPy)"""
+    lines = background_lines()
+    zorder = Line2D.zorder - 0.001
+
+    skew.dry_adiabats = skew.ax.add_collection(LineCollection(
+        lines['dry_adiabats'], colors='r', linestyles='dashed', alpha=alpha, zorder=zorder))
+    skew.moist_adiabats = skew.ax.add_collection(LineCollection(
+        lines['moist_adiabats'], colors='b', linestyles='dashed', alpha=alpha, zorder=zorder))
+    skew.mixing_lines = skew.ax.add_collection(LineCollection(
+        lines['mixing_lines'], colors='g', linestyles='dashed', alpha=alpha, zorder=zorder))
+
+
+class SkewTTemplate:
+    """Diagramme Skew-T dont le fond est rasterisé une fois puis réutilisé"""
+
+    def __init__(self, figsize=(9, 12), dpi=150, rotation=45, alpha=0.25):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.skew = SkewT(self.figure, rotation=rotation)
+        self.skew.ax.set_ylim(PRESSURE_BOTTOM, PRESSURE_TOP)
+        self.skew.ax.set_xlim(*TEMPERATURE_LIMITS)
+        draw_background(self.skew, alpha=alpha)
+
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._crop = self._crop_box(pad_inches=0.6)
+        self._static = set(self.skew.ax.get_children())
+        self._lock = threading.Lock()
+
+    def _crop_box(self, pad_inches):
+        """Zone utile de l'image (équivalent de bbox_inches='tight'), marge pour titre et barbes"""
+        bbox = self.skew.ax.get_tightbbox(self.canvas.get_renderer())
+        pad = pad_inches * self.figure.dpi
+        width, height = self.canvas.get_width_height()
+        return (max(0, int(bbox.x0 - pad)), max(0, int(height - bbox.y1 - pad)),
+                min(width, int(bbox.x1 + pad)), min(height, int(height - bbox.y0 + pad)))
+
+    def render(self, draw):
+        """
+        Appelle draw(skew) pour ajouter les éléments dynamiques puis retourne le PNG
+
+        Les limites des axes sont celles du gabarit ; les artistes ajoutés sont
+        retirés après le rendu pour laisser le gabarit intact.
+        """
+        ax = self.skew.ax
+        with self._lock:
+            self.canvas.restore_region(self._background)
+            try:
+                result = draw(self.skew)
+
+                dynamic = [artist for artist in ax.get_children() if artist not in self._static]
+                for artist in sorted(dynamic, key=lambda a: a.get_zorder()):
+                    self.figure.draw_artist(artist)
+                self.figure.draw_artist(ax.title)
+
+                buffer = io.BytesIO()
+                width, height = self.canvas.get_width_height()
+                image = Image.frombuffer('RGBA', (width, height), self.canvas.buffer_rgba(),
+                                         'raw', 'RGBA', 0, 1)
+                image.crop(self._crop).save(buffer, format='png')
+            finally:
+                for artist in ax.get_children():
+                    if artist not in self._static:
+                        artist.remove()
+                ax.legend_ = None
+                ax.set_title('')
+
+        return buffer.getvalue(), result
+
+
+@lru_cache(maxsize=None)
+def skewt_template():
+    """Gabarit partagé du processus (créé au premier rendu ou au préchauffage)"""
+    return SkewTTemplate()
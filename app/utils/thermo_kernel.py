@@ -0,0 +1,119 @@
+# app/utils/thermo_kernel.py
+"""
+Noyau thermodynamique sans unités (NumPy pur)
+
+Formules usuelles de MetPy réécrites sur des flottants : aucun objet pint,
+aucun appel par ligne. Chaque fonction accepte des scalaires ou des tableaux
+(ou séries pandas) et retourne un float pour une entrée scalaire.
+
+Unités : température et point de rosée en °C, humidité relative en %,
+pression en hPa. Les valeurs manquantes (None/NaN) donnent NaN.
+
+- point de rosée : formule de Magnus (coefficients de Bolton 1980, comme MetPy)
+- indice de chaleur : régression de Rothfusz avec les ajustements NWS
+- thermomètre mouillé : approximation de Stull (2011)
+- température potentielle équivalente : Bolton (1980), équation 39
+"""
+
+import numpy as np
+
+# Constantes MetPy (metpy.constants)
+SAT_PRESSURE_0C = 6.112                 # hPa
+EPSILON = 0.6219569100577033            # Mw / Md
+KAPPA = 0.28571428571428564             # Rd / Cp
+ZERO_DEGC = 273.15                      # K
+
+MAGNUS_A = 17.67
+MAGNUS_B = 243.5                        # °C
+
+
+def _array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _result(values):
+    """float pour une entrée scalaire, tableau sinon"""
+    return float(values) if np.ndim(values) == 0 else values
+
+
+def saturation_vapor_pressure(temperature):
+    """Pression de vapeur saturante (hPa)"""
+    t = _array(temperature)
+    return _result(SAT_PRESSURE_0C * np.exp(MAGNUS_A * t / (t + MAGNUS_B)))
+
+
+def dewpoint_from_vapor_pressure(vapor_pressure):
+    """Point de rosée (°C) à partir de la pression de vapeur (hPa)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        val = np.log(_array(vapor_pressure) / SAT_PRESSURE_0C)
+    return _result(MAGNUS_B * val / (MAGNUS_A - val))
+
+
+def dewpoint(temperature, humidity):
+    """Point de rosée (°C), formule de Magnus"""
+    return dewpoint_from_vapor_pressure(_array(humidity) / 100.0 * saturation_vapor_pressure(temperature))
+
+
+def saturation_mixing_ratio(pressure, temperature):
+    """Rapport de mélange saturant (kg/kg)"""
+    es = _array(saturation_vapor_pressure(temperature))
+    return _result(EPSILON * es / (_array(pressure) - es))
+
+
+def heat_index(temperature, humidity):
+    """
+    Indice de chaleur (°C), régression de Rothfusz (NWS)
+
+    Mêmes branches que mpcalc.heat_index ; en dessous de 80 °F (26,7 °C),
+    où l'indice n'est pas défini, la température de l'air est retournée.
+    """
+    t_c = _array(temperature)
+    rh = _array(humidity) / 100.0
+    t_f = t_c * 9.0 / 5.0 + 32.0
+    t_f2 = t_f ** 2
+    rh2 = rh ** 2
+
+    simple = -10.3 + 1.1 * t_f + 4.7 * rh
+    rothfusz = (-42.379 + 2.04901523 * t_f + 1014.333127 * rh - 22.475541 * t_f * rh
+                - 6.83783e-3 * t_f2 - 5.481717e2 * rh2 + 1.22874e-1 * t_f2 * rh
+                + 8.5282 * t_f * rh2 - 1.99e-2 * t_f2 * rh2)
+
+    hi = np.where(t_f <= 40.0, t_f, np.where(simple < 79.0, simple, rothfusz))
+
+    in_range = (t_f >= 80.0) & (t_f <= 112.0)
+    with np.errstate(invalid='ignore'):
+        dry_adjustment = (13.0 - rh * 100.0) / 4.0 * np.sqrt((17.0 - np.abs(t_f - 95.0)) / 17.0)
+    hi = np.where((rh <= 0.13) & in_range, hi - dry_adjustment, hi)
+    hi = np.where((rh > 0.85) & (t_f >= 80.0) & (t_f <= 87.0),
+                  hi + 0.02 * (rh * 100.0 - 85.0) * (87.0 - t_f), hi)
+
+    hi_c = (hi - 32.0) * 5.0 / 9.0
+    return _result(np.where(t_f < 80.0, t_c, hi_c))
+
+
+def wet_bulb_temperature(temperature, humidity):
+    """
+    Température du thermomètre mouillé (°C), approximation de Stull (2011)
+
+    Valable près de 1013 hPa, pour 5 % < HR < 99 % et -20 °C < T < 50 °C
+    (écart typique inférieur à 0,3 °C avec le calcul psychrométrique complet).
+    """
+    t = _array(temperature)
+    rh = _array(humidity)
+    return _result(t * np.arctan(0.151977 * np.sqrt(rh + 8.313659))
+                   + np.arctan(t + rh) - np.arctan(rh - 1.676331)
+                   + 0.00391838 * rh ** 1.5 * np.arctan(0.023101 * rh)
+                   - 4.686035)
+
+
+def equivalent_potential_temperature(pressure, temperature, dewpoint_c):
+    """Température potentielle équivalente (K), Bolton (1980)"""
+    p = _array(pressure)
+    t = _array(temperature) + ZERO_DEGC
+    td = _array(dewpoint_c) + ZERO_DEGC
+    r = _array(saturation_mixing_ratio(p, dewpoint_c))
+    e = _array(saturation_vapor_pressure(dewpoint_c))
+
+    t_l = 56 + 1.0 / (1.0 / (td - 56) + np.log(t / td) / 800.0)
+    theta_l = t * (1000.0 / (p - e)) ** KAPPA * (t / t_l) ** (0.28 * r)
+    return _result(theta_l * np.exp(r * (1 + 0.448 * r) * (3036.0 / t_l - 1.78)))
@@ -0,0 +1,503 @@
+# app/utils/training_jobs.py
+"""
+Exécution des entraînements ML en arrière-plan
+
+Les demandes sont enregistrées dans la table training_job (file locale) puis
+exécutées par un pool de processus, hors du thread de la requête HTTP.
+Une seule demande active par type et par station : les doublons renvoient
+le travail déjà en file. Chaque travail enregistre son processus responsable
+(hôte:pid) et, pendant l'exécution, une pulsation (updated_at). Un travail
+actif dont le processus n'existe plus (serveur redémarré, pool interrompu),
+muet depuis TRAINING_JOB_HEARTBEAT_TIMEOUT ou actif au-delà de
+TRAINING_JOB_TIMEOUT est marqué en échec au démarrage et à chaque demande,
+pour ne pas bloquer la station.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.utils.forecast_cache import forecast_cache
+from app.models.training_job import (TrainingJob, ACTIVE_STATUSES, JOB_QUEUED, JOB_RUNNING,
+                                     JOB_SUCCEEDED, JOB_FAILED)
+import multiprocessing
+import threading
+import time
+import os
+import socket
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Types de travaux
+JOB_STATION_MODELS = 'station_models'   # WeatherMLPredictor.train_models (une station)
+JOB_GABON_MODELS = 'gabon_models'       # GabonMetPyCore.train_gabon_forecast_models
+JOB_ALL_STATION_MODELS = 'all_station_models'  # train_all_stations (toutes les stations actives)
+
+DEFAULT_WORKERS = 2
+
+# Durée (secondes) au-delà de laquelle un travail actif est considéré abandonné
+DEFAULT_JOB_TIMEOUT = 2 * 3600
+# Intervalle des pulsations d'un travail en cours et silence toléré (secondes)
+DEFAULT_HEARTBEAT_INTERVAL = 30
+DEFAULT_HEARTBEAT_TIMEOUT = 5 * 60
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Travaux confiés au pool par ce processus : {job_id: future}
+_dispatched = {}
+
+# Application Flask propre à chaque processus de travail
+_worker_app = None
+
+
+def submit_training_job(kind, station_id=None, params=None, user_id=None):
+    """
+    Met en file un entraînement et retourne (travail, créé)
+
+    Si un travail du même type est déjà actif pour la station, il est retourné
+    tel quel (créé = False) au lieu d'en lancer un second.
+    """
+    if kind not in JOB_RUNNERS:
+        raise ValueError(f"Type de travail inconnu: {kind}")
+
+    dedupe_key = f"{kind}:{station_id if station_id is not None else 'all'}"
+
+    # Un travail orphelin ne doit pas bloquer indéfiniment les nouvelles demandes
+    recover_orphaned_jobs(dedupe_key)
+    existing = _active_job(dedupe_key)
+    if existing is not None:
+        return existing, False
+
+    job = TrainingJob(
+        kind=kind,
+        station_id=station_id,
+        dedupe_key=dedupe_key,
+        status=JOB_QUEUED,
+        params=json.dumps(params or {}),
+        requested_by=user_id,
+        owner=process_identity()
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Demande concurrente enregistrée entre-temps (index unique sur les travaux actifs)
+        db.session.rollback()
+        return _active_job(dedupe_key), False
+
+    _dispatch(job.id)
+    return job, True
+
+
+def get_job(job_id):
+    return db.session.get(TrainingJob, job_id)
+
+
+def list_jobs(station_id=None, status=None, limit=50):
+    query = TrainingJob.query
+    if station_id is not None:
+        query = query.filter_by(station_id=station_id)
+    if status:
+        query = query.filter_by(status=status)
+    return query.order_by(TrainingJob.created_at.desc(), TrainingJob.id.desc()).limit(limit).all()
+
+
+def _active_job(dedupe_key):
+    return TrainingJob.query.filter(
+        TrainingJob.dedupe_key == dedupe_key,
+        TrainingJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+
+def process_identity():
+    """Identifiant du processus courant (hôte:pid), enregistré comme responsable des travaux"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_lost(job):
+    """
+    Vrai si le processus responsable du travail a disparu
+
+    Vérifiable seulement sur la même machine. Un travail en file attribué au
+    processus courant mais absent de _dispatched vient d'un processus précédent
+    de même pid (redémarrage).
+    """
+    if not job.owner:
+        return False
+    host, _, pid = job.owner.rpartition(':')
+    if host != socket.gethostname():
+        return False
+    if job.owner == process_identity():
+        return job.status == JOB_QUEUED and job.id not in _dispatched
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (ValueError, OSError):
+        # PermissionError : le processus existe (autre utilisateur)
+        return False
+    return False
+
+
+def recover_orphaned_jobs(dedupe_key=None):
+    """
+    Marque en échec les travaux actifs abandonnés et retourne leur liste
+
+    Abandonné :
+    - confié par ce processus à un pool dont le future est terminé sans que le
+      travail ait enregistré son résultat (processus tué, pool interrompu)
+    - processus responsable disparu (serveur ou processus de travail arrêté)
+    - en cours sans pulsation depuis TRAINING_JOB_HEARTBEAT_TIMEOUT secondes
+    - démarré (ou en file) depuis plus de TRAINING_JOB_TIMEOUT secondes
+    """
+    timeout = current_app.config.get('TRAINING_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+    heartbeat_timeout = current_app.config.get('TRAINING_JOB_HEARTBEAT_TIMEOUT', DEFAULT_HEARTBEAT_TIMEOUT)
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=timeout)
+    heartbeat_cutoff = now - timedelta(seconds=heartbeat_timeout)
+
+    query = TrainingJob.query.filter(TrainingJob.status.in_(ACTIVE_STATUSES))
+    if dedupe_key is not None:
+        query = query.filter(TrainingJob.dedupe_key == dedupe_key)
+
+    orphaned = []
+    for job in query.all():
+        future = _dispatched.get(job.id)
+        if future is not None and future.done():
+            _mark_failed(job, "Processus d'entraînement interrompu")
+        elif future is None and _owner_lost(job):
+            _mark_failed(job, f"Travail abandonné (processus {job.owner} arrêté)")
+        elif job.status == JOB_RUNNING and (job.updated_at or job.started_at or job.created_at) < heartbeat_cutoff:
+            _mark_failed(job, f"Travail abandonné (aucune pulsation depuis {heartbeat_timeout} s)")
+        elif (job.started_at or job.created_at) < cutoff:
+            _mark_failed(job, f"Travail abandonné (toujours actif après {timeout} s)")
+        else:
+            continue
+        orphaned.append(job)
+
+    if orphaned:
+        db.session.commit()
+        logger.warning(f"Travaux d'entraînement orphelins marqués en échec: {[job.id for job in orphaned]}")
+    return orphaned
+
+
+def _mark_failed(job, message):
+    job.status = JOB_FAILED
+    job.message = message[:255]
+    job.finished_at = datetime.utcnow()
+    _dispatched.pop(job.id, None)
+
+
+def _dispatch(job_id):
+    """Exécute le travail dans le pool (ou immédiatement si TRAINING_JOBS_EAGER, pour les tests)"""
+    if current_app.config.get('TRAINING_JOBS_EAGER'):
+        run_job(job_id)
+        return
+
+    try:
+        future = _get_executor().submit(_run_job_in_worker, job_id)
+    except BrokenProcessPool:
+        # Pool interrompu (processus tué) : on en recrée un
+        _reset_executor()
+        future = _get_executor().submit(_run_job_in_worker, job_id)
+
+    _dispatched[job_id] = future
+    app = current_app._get_current_object()
+    future.add_done_callback(lambda f: _job_finished(app, job_id, f))
+
+
+def _job_finished(app, job_id, future):
+    """Fin d'un future du pool : un travail interrompu avant d'enregistrer son résultat passe en échec"""
+    _dispatched.pop(job_id, None)
+    error = future.exception()
+    if error is None:
+        return
+
+    logger.error(f"Travail d'entraînement #{job_id} interrompu: {error}")
+    if isinstance(error, BrokenProcessPool):
+        _reset_executor()
+
+    with app.app_context():
+        job = db.session.get(TrainingJob, job_id)
+        if job is not None and job.is_active:
+            _mark_failed(job, f"Processus d'entraînement interrompu: {error}")
+            db.session.commit()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = current_app.config.get('TRAINING_WORKERS', DEFAULT_WORKERS)
+            # 'spawn' : pas de connexions ni de verrous hérités du processus web
+            _executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _get_worker_app():
+    """Application Flask du processus de travail (créée une seule fois)"""
+    global _worker_app
+    if _worker_app is None:
+        from app import create_app
+        _worker_app = create_app()
+    return _worker_app
+
+
+def _run_job_in_worker(job_id):
+    """Point d'entrée dans un processus du pool"""
+    with _get_worker_app().app_context():
+        run_job(job_id)
+
+
+# ================================
+# ENTRAÎNEMENT DE TOUTES LES STATIONS
+# ================================
+
+def plan_workers(station_count, max_workers=None, cpu_count=None):
+    """
+    Répartit les cœurs entre processus (stations en parallèle) et n_jobs des forêts
+
+    Le produit processus x n_jobs ne dépasse pas le nombre de cœurs (ou le budget
+    du travail) pour éviter la sur-souscription.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = max(1, min(station_count, max_workers or cpu_count, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+
+def job_core_budget(job=None, cpu_count=None):
+    """
+    Cœurs attribués à un travail d'entraînement
+
+    Le pool exécute jusqu'à TRAINING_WORKERS travaux simultanés : chacun reçoit
+    une part égale de la machine (au moins autant de parts que de travaux en
+    cours), si bien que la somme des budgets ne dépasse pas le nombre de cœurs.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    running = TrainingJob.query.filter(TrainingJob.status == JOB_RUNNING)
+    if job is not None:
+        running = running.filter(TrainingJob.id != job.id)
+    slots = max(current_app.config.get('TRAINING_WORKERS', DEFAULT_WORKERS), running.count() + 1, 1)
+    return max(1, cpu_count // slots)
+
+
+def train_all_stations(station_ids=None, days_back=90, max_workers=None, progress_callback=None,
+                       cpu_budget=None):
+    """
+    Entraîne les modèles de plusieurs stations en parallèle (un processus par station)
+
+    Chaque processus enregistre ses modèles dans le registre dès la fin de son
+    entraînement. cpu_budget limite processus x n_jobs (tous les cœurs par défaut,
+    budget du travail quand l'appel vient du pool d'entraînement).
+    Retourne un rapport : résultats par station, durée réelle (mur), somme des
+    durées par station et accélération estimée. Les durées par station étant
+    mesurées en parallèle (cœurs partagés), cette somme n'est qu'une estimation
+    de la durée séquentielle, pas une mesure.
+    """
+    from app.models.weather_data import WeatherStation
+
+    if station_ids is None:
+        station_ids = [s.id for s in WeatherStation.query.filter_by(active=True).order_by(WeatherStation.id).all()]
+
+    workers, n_jobs = plan_workers(len(station_ids), max_workers, cpu_count=cpu_budget)
+    results = []
+    started = time.perf_counter()
+
+    if station_ids:
+        if workers == 1:
+            for station_id in station_ids:
+                results.append(_train_station(station_id, days_back, n_jobs))
+                if progress_callback:
+                    progress_callback(len(results) / len(station_ids), f"Station {station_id} terminée")
+        else:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {executor.submit(_train_station_in_worker, station_id, days_back, n_jobs): station_id
+                           for station_id in station_ids}
+
+                for future in as_completed(futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        results.append({'station_id': futures[future], 'success': False,
+                                        'message': f"Erreur: {str(e)}", 'seconds': None})
+                    if progress_callback:
+                        progress_callback(len(results) / len(station_ids),
+                                          f"Station {futures[future]} terminée")
+
+    wall_time = time.perf_counter() - started
+    station_seconds = sum(r['seconds'] or 0 for r in results)
+
+    report = {
+        'stations': len(station_ids),
+        'succeeded': sum(1 for r in results if r['success']),
+        'failed': sum(1 for r in results if not r['success']),
+        'workers': workers,
+        'n_jobs_per_model': n_jobs,
+        'wall_time_seconds': round(wall_time, 2),
+        'station_seconds_total': round(station_seconds, 2),
+        'estimated_speedup': round(station_seconds / wall_time, 2) if wall_time else None,
+        'results': sorted(results, key=lambda r: r['station_id'])
+    }
+    logger.info(f"Entraînement de {len(station_ids)} stations: {report['wall_time_seconds']} s "
+                f"(somme par station {report['station_seconds_total']} s, {workers} processus x {n_jobs} cœurs)")
+    return report
+
+
+def _train_station(station_id, days_back, n_jobs):
+    """Entraîne une station et mesure la durée"""
+    from app.routes.metpy_ml_forecasting import weather_predictor
+
+    started = time.perf_counter()
+    success, message = weather_predictor.train_models(station_id, days_back, n_jobs=n_jobs)
+    return {
+        'station_id': station_id,
+        'success': success,
+        'message': message,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def _train_station_in_worker(station_id, days_back, n_jobs):
+    with _get_worker_app().app_context():
+        return _train_station(station_id, days_back, n_jobs)
+
+
+# ================================
+# EXÉCUTION
+# ================================
+
+def run_job(job_id):
+    """Exécute un travail (dans le contexte d'application courant) et enregistre son résultat"""
+    job = db.session.get(TrainingJob, job_id)
+    if job is None or job.status != JOB_QUEUED:
+        logger.warning(f"Travail d'entraînement #{job_id} ignoré: "
+                       f"{'introuvable' if job is None else f'état {job.status}'}")
+        return
+
+    job.status = JOB_RUNNING
+    job.started_at = job.updated_at = datetime.utcnow()
+    job.owner = process_identity()
+    job.message = 'Entraînement en cours'
+    db.session.commit()
+
+    def report_progress(fraction, message=None):
+        job.progress = max(0.0, min(1.0, fraction))
+        job.updated_at = datetime.utcnow()
+        if message:
+            job.message = message[:255]
+        db.session.commit()
+
+    # Pulsation entre deux progressions (un ajustement de forêt peut durer longtemps)
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=_heartbeat, daemon=True,
+                     args=(current_app._get_current_object(), job.id, stop_heartbeat,
+                           current_app.config.get('TRAINING_JOB_HEARTBEAT', DEFAULT_HEARTBEAT_INTERVAL))).start()
+
+    try:
+        success, message, result = JOB_RUNNERS[job.kind](job, report_progress)
+        job.status = JOB_SUCCEEDED if success else JOB_FAILED
+        job.message = message[:255] if message else None
+        job.result = json.dumps(result, default=str) if result is not None else None
+        if success:
+            job.progress = 1.0
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur travail d'entraînement #{job_id}: {e}")
+        job.status = JOB_FAILED
+        job.message = f"Erreur: {str(e)}"[:255]
+    finally:
+        stop_heartbeat.set()
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"Travail d'entraînement #{job.id} ({job.kind}) terminé: {job.status} en {job.duration} s")
+
+
+def _heartbeat(app, job_id, stop, interval):
+    """Rafraîchit updated_at du travail en cours (connexion propre au thread)"""
+    table = TrainingJob.__table__
+    while not stop.wait(interval):
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                connection.execute(update(table).where(table.c.id == job_id, table.c.status == JOB_RUNNING)
+                                   .values(updated_at=datetime.utcnow()))
+        except Exception as e:
+            logger.warning(f"Pulsation du travail d'entraînement #{job_id} impossible: {e}")
+
+
+def _train_station_models(job, report_progress):
+    """Modèles ML par station (registre persistant)"""
+    from app.routes.metpy_ml_forecasting import weather_predictor
+    from app.utils.ml_model_registry import model_registry
+
+    days_back = job.get_params().get('days_back', 90)
+    success, message = weather_predictor.train_models(job.station_id, days_back,
+                                                      progress_callback=report_progress,
+                                                      n_jobs=job_core_budget(job))
+    result = model_registry.station_metadata(job.station_id) if success else None
+    if success:
+        forecast_cache.invalidate([job.station_id])
+    return success, message, result
+
+
+def _train_gabon_models(job, report_progress):
+    """Modèles nationaux GabonMetPyCore (toutes stations ou une station)"""
+    from app.models.weather_data import WeatherData
+    from app.utils.metpy_gabon import GabonMetPyCore
+
+    days_back = job.get_params().get('days_back', 365)
+    query = db.session.query(
+        WeatherData.timestamp, WeatherData.temperature, WeatherData.humidity,
+        WeatherData.pressure, WeatherData.wind_speed, WeatherData.precipitation
+    ).filter(WeatherData.timestamp >= datetime.utcnow() - timedelta(days=days_back))
+    if job.station_id is not None:
+        query = query.filter(WeatherData.station_id == job.station_id)
+
+    historical = [row._asdict() for row in query.order_by(WeatherData.timestamp).all()]
+    report_progress(0.2, f"{len(historical)} observations chargées")
+
+    if not historical:
+        return False, "Aucune donnée d'entraînement", None
+
+    result = GabonMetPyCore().train_gabon_forecast_models(historical)
+    if not result or not result.get('success'):
+        error = result.get('error') if result else None
+        return False, error or "Données insuffisantes pour l'entraînement", result
+
+    return True, "Modèles Gabon entraînés", result
+
+
+def _train_all_station_models(job, report_progress):
+    """Toutes les stations actives, en parallèle"""
+    params = job.get_params()
+    report = train_all_stations(days_back=params.get('days_back', 90),
+                                max_workers=params.get('max_workers'),
+                                progress_callback=report_progress,
+                                cpu_budget=job_core_budget(job))
+    forecast_cache.invalidate([result['station_id'] for result in report['results'] if result['success']])
+    message = (f"{report['succeeded']}/{report['stations']} stations entraînées en "
+               f"{report['wall_time_seconds']} s (accélération estimée x{report['estimated_speedup']})")
+    return report['succeeded'] > 0, message, report
+
+
+JOB_RUNNERS = {
+    JOB_STATION_MODELS: _train_station_models,
+    JOB_GABON_MODELS: _train_gabon_models,
+    JOB_ALL_STATION_MODELS: _train_all_station_models,
+}
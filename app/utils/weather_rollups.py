@@ -0,0 +1,371 @@
+# app/utils/weather_rollups.py
+"""
+Maintenance des tables de cumul horaires/journalières (WeatherDataHourly, WeatherDataDaily)
+
+- Mise à jour incrémentale : chaque WeatherData ajouté à la session est intégré
+  aux agrégats avant le flush (saisie manuelle, validation de prélèvements, scripts)
+  par upsert atomique, sûr entre processus concurrents
+- Observations modifiées ou supprimées : leurs périodes sont recalculées après le flush
+- Reconstruction complète : rebuild_rollups() recalcule les agrégats par requêtes groupées
+"""
+
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import event, func, inspect, insert, update, case, and_, literal
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.weather_data import WeatherData
+from app.models.weather_rollup import WeatherDataHourly, WeatherDataDaily, ROLLUP_VARIABLES
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def hour_bucket(timestamp):
+    """Début de l'heure contenant l'horodatage"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def apply_observations(session, observations):
+    """
+    Intègre une liste d'observations (WeatherData) dans les agrégats horaires et journaliers
+
+    Les contributions sont cumulées par (station, période) puis écrites par un
+    upsert atomique (INSERT ... ON CONFLICT DO UPDATE ou équivalent) : deux
+    processus alimentant la même période ne se marchent pas dessus.
+    """
+    observations = [obs for obs in observations if obs.station_id is not None]
+    if not observations:
+        return
+
+    for model, bucket_column, bucket_of in (
+        (WeatherDataHourly, WeatherDataHourly.hour, lambda obs: hour_bucket(obs.timestamp)),
+        (WeatherDataDaily, WeatherDataDaily.day, lambda obs: obs.timestamp.date()),
+    ):
+        deltas = {}
+        for obs in observations:
+            key = (obs.station_id, bucket_of(obs))
+            if key not in deltas:
+                deltas[key] = _empty_rollup(obs.station_id)
+                deltas[key][bucket_column.key] = key[1]
+            _add_to_delta(deltas[key], obs)
+
+        _upsert_rollups(session, model, bucket_column, list(deltas.values()))
+        _expire_cached_rollups(session, model, bucket_column, set(deltas))
+
+
+def _add_to_delta(delta, observation):
+    """Ajoute une observation à une contribution (mêmes colonnes qu'une ligne d'agrégat)"""
+    delta['record_count'] += 1
+    for variable in ROLLUP_VARIABLES:
+        value = getattr(observation, variable)
+        if value is None:
+            delta[f'{variable}_nulls'] += 1
+            continue
+        current_sum = delta[f'{variable}_sum']
+        current_min = delta[f'{variable}_min']
+        current_max = delta[f'{variable}_max']
+        delta[f'{variable}_sum'] = value if current_sum is None else current_sum + value
+        delta[f'{variable}_min'] = value if current_min is None else min(current_min, value)
+        delta[f'{variable}_max'] = value if current_max is None else max(current_max, value)
+
+
+def _merged_columns(table, incoming):
+    """
+    Expressions SET fusionnant une contribution (incoming[colonne]) dans la ligne existante
+
+    Calculées par la base à partir de la valeur courante : aucune valeur absolue
+    lue auparavant n'est réécrite.
+    """
+    values = {'record_count': table.c.record_count + incoming['record_count']}
+    for variable in ROLLUP_VARIABLES:
+        current_sum, new_sum = table.c[f'{variable}_sum'], incoming[f'{variable}_sum']
+        current_min, new_min = table.c[f'{variable}_min'], incoming[f'{variable}_min']
+        current_max, new_max = table.c[f'{variable}_max'], incoming[f'{variable}_max']
+        values.update({
+            f'{variable}_nulls': table.c[f'{variable}_nulls'] + incoming[f'{variable}_nulls'],
+            f'{variable}_sum': case((new_sum.is_(None), current_sum),
+                                    else_=func.coalesce(current_sum, 0) + new_sum),
+            f'{variable}_min': case((new_min.is_(None), current_min), (current_min.is_(None), new_min),
+                                    (new_min < current_min, new_min), else_=current_min),
+            f'{variable}_max': case((new_max.is_(None), current_max), (current_max.is_(None), new_max),
+                                    (new_max > current_max, new_max), else_=current_max),
+        })
+    return values
+
+
+def _upsert_rollups(session, model, bucket_column, deltas):
+    """Écrit les contributions par upsert du dialecte (mise à jour puis insertion sinon)"""
+    if not deltas:
+        return
+
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    conflict_columns = ['station_id', bucket_column.key]
+
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(index_elements=conflict_columns,
+                                                    set_=_merged_columns(table, statement.excluded))
+        session.execute(statement, deltas)
+        return
+    if dialect == 'mysql':
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update(_merged_columns(table, statement.inserted))
+        session.execute(statement, deltas)
+        return
+
+    # Autres bases : UPDATE atomique (colonne = colonne + contribution), INSERT si
+    # la ligne n'existe pas ; une insertion concurrente fait rejouer l'UPDATE
+    for delta in deltas:
+        key_filter = and_(table.c.station_id == delta['station_id'],
+                          table.c[bucket_column.key] == delta[bucket_column.key])
+        incoming = {name: literal(value, table.c[name].type) for name, value in delta.items()}
+        merge = update(table).where(key_filter).values(_merged_columns(table, incoming))
+        if session.execute(merge).rowcount:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(insert(table).values(**delta))
+        except IntegrityError:
+            session.execute(merge)
+
+
+def _expire_cached_rollups(session, model, bucket_column, keys):
+    """Expire les lignes d'agrégat déjà chargées dans la session (valeurs modifiées en base)"""
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, model) and (obj.station_id, getattr(obj, bucket_column.key)) in keys:
+            session.expire(obj)
+
+
+# Attributs d'une observation qui déterminent ses agrégats
+ROLLUP_ATTRIBUTES = ('station_id', 'timestamp') + ROLLUP_VARIABLES
+
+
+@event.listens_for(db.session, 'before_flush')
+def _update_rollups_before_flush(session, flush_context, instances):
+    """
+    Met à jour les agrégats pour les observations de la session
+
+    Les nouvelles observations sont intégrées incrémentalement ; les périodes
+    des observations modifiées ou supprimées (anciennes et nouvelles valeurs)
+    sont recalculées après le flush, les extrêmes ne pouvant être soustraits.
+    """
+    new_observations = [obj for obj in session.new if isinstance(obj, WeatherData)]
+    for obs in new_observations:
+        # Même valeur par défaut que la colonne, nécessaire pour calculer la période
+        if obs.timestamp is None:
+            obs.timestamp = datetime.utcnow()
+
+    if new_observations:
+        apply_observations(session, new_observations)
+
+    stale = set()
+    for obj in session.dirty:
+        if isinstance(obj, WeatherData) and _rollup_attributes_changed(obj):
+            stale.update(_observation_keys(obj, previous=True))
+            stale.update(_observation_keys(obj, previous=False))
+    for obj in session.deleted:
+        if isinstance(obj, WeatherData):
+            stale.update(_observation_keys(obj, previous=True))
+
+    if stale:
+        session.info.setdefault('stale_rollup_keys', set()).update(stale)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _recompute_stale_rollups(session, flush_context):
+    """Recalcule, depuis les observations brutes, les périodes touchées par des modifications"""
+    stale = session.info.pop('stale_rollup_keys', None)
+    if stale:
+        recompute_rollups(session, stale)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale_rollups(session):
+    session.info.pop('stale_rollup_keys', None)
+
+
+def _rollup_attributes_changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_ATTRIBUTES)
+
+
+def _observation_keys(obj, previous):
+    """Clés (modèle, station_id, période) d'une observation, avant ou après modification"""
+    state = inspect(obj)
+
+    def value(name):
+        history = state.attrs[name].history
+        if previous and history.deleted:
+            return history.deleted[0]
+        return getattr(obj, name)
+
+    station_id, timestamp = value('station_id'), value('timestamp')
+    if station_id is None or timestamp is None:
+        return set()
+    return {(WeatherDataHourly, station_id, hour_bucket(timestamp)),
+            (WeatherDataDaily, station_id, timestamp.date())}
+
+
+def recompute_rollups(session, keys):
+    """
+    Recalcule les agrégats des clés (modèle, station_id, période) à partir des observations brutes
+
+    Les lignes existantes sont mises à jour sur place (une période vidée garde une
+    ligne à zéro) et les objets correspondants de la session sont expirés.
+    """
+    hour_expr, day_expr = bucket_expressions()
+
+    for model, bucket_column, bucket_expr, as_bucket, span in (
+        (WeatherDataHourly, WeatherDataHourly.hour, hour_expr, _as_datetime, timedelta(hours=1)),
+        (WeatherDataDaily, WeatherDataDaily.day, day_expr, _as_date, timedelta(days=1)),
+    ):
+        model_keys = {(station_id, bucket) for key_model, station_id, bucket in keys if key_model is model}
+        if not model_keys:
+            continue
+
+        buckets = [bucket for _, bucket in model_keys]
+        start = min(buckets) if model is WeatherDataHourly else datetime.combine(min(buckets), time())
+        end = (max(buckets) if model is WeatherDataHourly else datetime.combine(max(buckets), time())) + span
+
+        aggregates = {
+            (row['station_id'], as_bucket(row.pop('bucket'))): row
+            for row in _grouped_aggregates(
+                bucket_expr, start, end,
+                WeatherData.station_id.in_({station_id for station_id, _ in model_keys}),
+                session=session
+            )
+        }
+        existing = {
+            (row.station_id, row.bucket): row.id
+            for row in session.query(model.station_id, bucket_column.label('bucket'), model.id).filter(
+                model.station_id.in_({station_id for station_id, _ in model_keys}),
+                bucket_column >= min(buckets),
+                bucket_column <= max(buckets)
+            ).all()
+        }
+
+        for station_id, bucket in model_keys:
+            values = aggregates.get((station_id, bucket)) or _empty_rollup(station_id)
+            values.pop('station_id', None)
+            row_id = existing.get((station_id, bucket))
+            if row_id is not None:
+                session.execute(update(model).where(model.id == row_id).values(**values))
+                cached = session.identity_map.get(session.identity_key(model, row_id))
+                if cached is not None:
+                    session.expire(cached)
+            elif values['record_count']:
+                session.execute(insert(model).values(station_id=station_id,
+                                                     **{bucket_column.key: bucket}, **values))
+
+
+def _empty_rollup(station_id):
+    values = {'station_id': station_id, 'record_count': 0}
+    for variable in ROLLUP_VARIABLES:
+        values.update({f'{variable}_sum': None, f'{variable}_min': None,
+                       f'{variable}_max': None, f'{variable}_nulls': 0})
+    return values
+
+
+# ================================
+# RECONSTRUCTION (BACKFILL)
+# ================================
+
+def rebuild_rollups(since=None):
+    """
+    Recalcule les agrégats à partir des observations brutes
+
+    since: date de début (None = tout l'historique). Les agrégats existants
+           à partir de cette date sont supprimés puis recalculés.
+    Retourne le nombre de lignes horaires et journalières écrites.
+    """
+    if since is not None and not isinstance(since, datetime):
+        since = datetime.combine(since, time())
+
+    hourly_query = WeatherDataHourly.query
+    daily_query = WeatherDataDaily.query
+    if since is not None:
+        since = hour_bucket(since)
+        hourly_query = hourly_query.filter(WeatherDataHourly.hour >= since)
+        daily_query = daily_query.filter(WeatherDataDaily.day >= since.date())
+        # La journée de départ est recalculée entièrement
+        since_day = datetime.combine(since.date(), time())
+    else:
+        since_day = None
+
+    hourly_query.delete(synchronize_session=False)
+    daily_query.delete(synchronize_session=False)
+
+    hour_expr, day_expr = bucket_expressions()
+
+    hourly_rows = _grouped_aggregates(hour_expr, since)
+    daily_rows = _grouped_aggregates(day_expr, since_day)
+
+    db.session.bulk_insert_mappings(
+        WeatherDataHourly,
+        [dict(row, hour=_as_datetime(row.pop('bucket'))) for row in hourly_rows]
+    )
+    db.session.bulk_insert_mappings(
+        WeatherDataDaily,
+        [dict(row, day=_as_date(row.pop('bucket'))) for row in daily_rows]
+    )
+    db.session.commit()
+
+    logger.info(f"Agrégats reconstruits: {len(hourly_rows)} horaires, {len(daily_rows)} journaliers")
+    return len(hourly_rows), len(daily_rows)
+
+
+def bucket_expressions():
+    """Expressions SQL de troncature à l'heure et au jour selon le dialecte"""
+    dialect = db.engine.dialect.name
+    timestamp = WeatherData.timestamp
+
+    if dialect == 'postgresql':
+        return func.date_trunc('hour', timestamp), func.date(timestamp)
+    if dialect == 'mysql':
+        return func.date_format(timestamp, '%Y-%m-%d %H:00:00'), func.date(timestamp)
+    # SQLite
+    return func.strftime('%Y-%m-%d %H:00:00', timestamp), func.date(timestamp)
+
+
+def _grouped_aggregates(bucket_expr, since=None, until=None, *criteria, session=None):
+    """Agrégats par (station, période) calculés par la base de données"""
+    columns = [
+        WeatherData.station_id.label('station_id'),
+        bucket_expr.label('bucket'),
+        func.count(WeatherData.id).label('record_count')
+    ]
+    for variable in ROLLUP_VARIABLES:
+        column = getattr(WeatherData, variable)
+        columns += [
+            func.sum(column).label(f'{variable}_sum'),
+            func.min(column).label(f'{variable}_min'),
+            func.max(column).label(f'{variable}_max'),
+            (func.count(WeatherData.id) - func.count(column)).label(f'{variable}_nulls')
+        ]
+
+    query = (session or db.session).query(*columns).filter(WeatherData.timestamp.isnot(None), *criteria)
+    if since is not None:
+        query = query.filter(WeatherData.timestamp >= since)
+    if until is not None:
+        query = query.filter(WeatherData.timestamp < until)
+
+    return [row._asdict() for row in query.group_by(WeatherData.station_id, bucket_expr).all()]
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
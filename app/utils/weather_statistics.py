@@ -0,0 +1,198 @@
+# app/utils/weather_statistics.py
+"""
+Agrégations statistiques des observations calculées côté base de données
+(GROUP BY station) pour éviter de charger les enregistrements en mémoire
+"""
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, and_, or_
+from app import db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.weather_rollup import WeatherDataDaily
+
+# Champs d'agrégat additifs (les extrêmes sont combinés séparément)
+ADDITIVE_FIELDS = ('records', 'temperature_count', 'temperature_sum', 'precipitation_count',
+                   'precipitation_sum', 'humidity_count', 'humidity_sum')
+
+
+def aggregate_station_statistics(start_date):
+    """
+    Agrège température, précipitations et humidité par station depuis start_date
+
+    Les journées complètes sont lues dans les agrégats journaliers (WeatherDataDaily),
+    seule la fraction de la première journée est calculée sur les observations brutes.
+    Les journées antérieures au premier agrégat d'une station (historique d'une base
+    existante non encore reconstruit par scripts/backfill_rollups.py) sont elles
+    aussi calculées sur les observations brutes.
+    """
+    first_full_day = datetime.combine(start_date.date(), time()) + timedelta(days=1)
+
+    partial = aggregate_raw_statistics(start_date, first_full_day)
+    full_days = aggregate_daily_rollups(first_full_day.date())
+
+    uncovered = _uncovered_history(first_full_day)
+    if uncovered:
+        partial += aggregate_raw_statistics(first_full_day, None, or_(*uncovered))
+
+    return merge_aggregates(partial + full_days)
+
+
+def _uncovered_history(first_full_day):
+    """
+    Critères sur WeatherData des journées (à partir de first_full_day) non couvertes
+    par les agrégats : stations sans agrégat, ou antérieures à leur premier agrégat
+    """
+    first_rollup_days = dict(db.session.query(
+        WeatherDataDaily.station_id, func.min(WeatherDataDaily.day)
+    ).group_by(WeatherDataDaily.station_id).all())
+
+    criteria = []
+    for (station_id,) in db.session.query(WeatherStation.id).all():
+        first_day = first_rollup_days.get(station_id)
+        if first_day is None:
+            criteria.append(WeatherData.station_id == station_id)
+        elif first_day > first_full_day.date():
+            criteria.append(and_(WeatherData.station_id == station_id,
+                                 WeatherData.timestamp < datetime.combine(first_day, time())))
+    return criteria
+
+
+def aggregate_raw_statistics(start_date, end_date=None, *criteria):
+    """
+    Agrège les observations brutes par station sur une période
+
+    Retourne une liste de dictionnaires (une entrée par station ayant des données)
+    contenant les sommes, comptes, minima et maxima par variable.
+    criteria: filtres supplémentaires sur WeatherData
+    """
+    query = db.session.query(
+        WeatherStation.id.label('station_id'),
+        WeatherStation.name.label('station_name'),
+        func.count(WeatherData.id).label('records'),
+        func.count(WeatherData.temperature).label('temperature_count'),
+        func.sum(WeatherData.temperature).label('temperature_sum'),
+        func.min(WeatherData.temperature).label('temperature_min'),
+        func.max(WeatherData.temperature).label('temperature_max'),
+        func.count(WeatherData.precipitation).label('precipitation_count'),
+        func.sum(WeatherData.precipitation).label('precipitation_sum'),
+        func.max(WeatherData.precipitation).label('precipitation_max'),
+        func.count(WeatherData.humidity).label('humidity_count'),
+        func.sum(WeatherData.humidity).label('humidity_sum')
+    ).join(
+        WeatherData, WeatherData.station_id == WeatherStation.id
+    ).filter(
+        WeatherData.timestamp >= start_date
+    )
+
+    if end_date is not None:
+        query = query.filter(WeatherData.timestamp < end_date)
+    if criteria:
+        query = query.filter(*criteria)
+
+    rows = query.group_by(WeatherStation.id, WeatherStation.name).all()
+
+    return [row._asdict() for row in rows]
+
+
+def aggregate_daily_rollups(start_day):
+    """Agrège les cumuls journaliers par station à partir de start_day (inclus)"""
+    daily = WeatherDataDaily
+    rows = db.session.query(
+        WeatherStation.id.label('station_id'),
+        WeatherStation.name.label('station_name'),
+        func.sum(daily.record_count).label('records'),
+        func.sum(daily.record_count - daily.temperature_nulls).label('temperature_count'),
+        func.sum(daily.temperature_sum).label('temperature_sum'),
+        func.min(daily.temperature_min).label('temperature_min'),
+        func.max(daily.temperature_max).label('temperature_max'),
+        func.sum(daily.record_count - daily.precipitation_nulls).label('precipitation_count'),
+        func.sum(daily.precipitation_sum).label('precipitation_sum'),
+        func.max(daily.precipitation_max).label('precipitation_max'),
+        func.sum(daily.record_count - daily.humidity_nulls).label('humidity_count'),
+        func.sum(daily.humidity_sum).label('humidity_sum')
+    ).join(
+        daily, daily.station_id == WeatherStation.id
+    ).filter(
+        daily.day >= start_day
+    ).group_by(WeatherStation.id, WeatherStation.name).all()
+
+    return [row._asdict() for row in rows]
+
+
+def merge_aggregates(aggregates):
+    """Fusionne des agrégats partiels d'une même station (sommes, comptes et extrêmes)"""
+    merged = {}
+
+    for agg in aggregates:
+        current = merged.get(agg['station_id'])
+        if current is None:
+            merged[agg['station_id']] = dict(agg)
+            continue
+
+        for key in ADDITIVE_FIELDS:
+            if agg[key] is not None:
+                current[key] = agg[key] if current[key] is None else current[key] + agg[key]
+
+        current['temperature_min'] = _combine(min, current['temperature_min'], agg['temperature_min'])
+        current['temperature_max'] = _combine(max, current['temperature_max'], agg['temperature_max'])
+        current['precipitation_max'] = _combine(max, current['precipitation_max'], agg['precipitation_max'])
+
+    return list(merged.values())
+
+
+def summarize_statistics(aggregates):
+    """
+    Construit les blocs de statistiques (par station et global) au format de /api/statistics
+    à partir des agrégats de aggregate_station_statistics
+    """
+    stations = {}
+    totals = {
+        'temperature_count': 0, 'temperature_sum': 0.0,
+        'temperature_min': None, 'temperature_max': None,
+        'precipitation_count': 0, 'precipitation_sum': 0.0, 'precipitation_max': None,
+        'humidity_count': 0, 'humidity_sum': 0.0
+    }
+
+    for agg in aggregates:
+        stations[agg['station_name']] = _format_statistics(agg)
+
+        for key in ADDITIVE_FIELDS[1:]:
+            totals[key] += agg[key] or 0
+
+        totals['temperature_min'] = _combine(min, totals['temperature_min'], agg['temperature_min'])
+        totals['temperature_max'] = _combine(max, totals['temperature_max'], agg['temperature_max'])
+        totals['precipitation_max'] = _combine(max, totals['precipitation_max'], agg['precipitation_max'])
+
+    return stations, _format_statistics(totals)
+
+
+def _format_statistics(agg):
+    """Met en forme un agrégat (sommes/comptes/extrêmes) en moyennes arrondies"""
+    temp_count = agg['temperature_count']
+    precip_count = agg['precipitation_count']
+    humidity_count = agg['humidity_count']
+
+    return {
+        "temperature": {
+            "avg": round(agg['temperature_sum'] / temp_count, 1) if temp_count else None,
+            "min": round(agg['temperature_min'], 1) if temp_count else None,
+            "max": round(agg['temperature_max'], 1) if temp_count else None
+        },
+        "precipitation": {
+            "total": round(agg['precipitation_sum'], 1) if precip_count else None,
+            "avg": round(agg['precipitation_sum'] / precip_count, 1) if precip_count else None,
+            "max": round(agg['precipitation_max'], 1) if precip_count else None
+        },
+        "humidity": {
+            "avg": round(agg['humidity_sum'] / humidity_count, 1) if humidity_count else None
+        }
+    }
+
+
+def _combine(func_, current, value):
+    """Combine deux extrêmes en ignorant les valeurs manquantes"""
+    if value is None:
+        return current
+    if current is None:
+        return value
+    return func_(current, value)
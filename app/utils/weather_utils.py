@@ -1,6 +1,9 @@
 import numpy as np
 from datetime import datetime, timedelta
 
+# Incrémenter quand l'algorithme de predict_temperature change (invalide les prévisions en cache)
+PREDICT_TEMPERATURE_VERSION = 2
+
 def calculate_average_temperature(data_list):
     """Calcule la température moyenne à partir d'une liste de données météo"""
     if not data_list:
@@ -13,109 +16,83 @@ def calculate_average_temperature(data_list):
     
     return sum(temperatures) / len(temperatures)
 
-def predict_temperature(historical_data, days_ahead=3):
-    """Prédit les températures futures en utilisant une régression polynomiale"""
+def forecast_rng(station_id, base_date):
+    """Générateur aléatoire reproductible pour une station et une date de référence"""
+    return np.random.default_rng([station_id or 0, base_date.toordinal()])
+
+def predict_temperature(historical_data, days_ahead=3, station_id=None, base_date=None, deterministic=False):
+    """
+    Prédit les températures futures en utilisant une régression polynomiale
+    
+    Mode déterministe : le tirage (pluie, humidité, vent) utilise un générateur
+    initialisé sur (station, date de référence) ; des entrées identiques donnent
+    la même prévision, qui peut alors être mise en cache et servie avec un ETag.
+    base_date : date de référence (aujourd'hui par défaut)
+    """
     if not historical_data or len(historical_data) < 5:
         return []
     
-    # Extraire les températures et les dates (converties en nombres)
-    x = []  # Jours depuis aujourd'hui
-    y_temp = []  # Températures
-    y_humidity = []  # Humidité
-    y_precip = []  # Précipitations
-    
-    base_date = datetime.now().date()
-    
-    for data in historical_data:
-        days_diff = (data.timestamp.date() - base_date).days
-        x.append(days_diff)
-        y_temp.append(data.temperature)
-        
-        # Récupérer également l'humidité et la précipitation pour des prévisions plus complètes
-        if hasattr(data, 'humidity') and data.humidity is not None:
-            y_humidity.append(data.humidity)
-        else:
-            y_humidity.append(75)  # Valeur par défaut
-            
-        if hasattr(data, 'precipitation') and data.precipitation is not None:
-            y_precip.append(data.precipitation)
-        else:
-            y_precip.append(0)  # Valeur par défaut
+    base_date = base_date or datetime.now().date()
+    rng = forecast_rng(station_id, base_date) if deterministic else np.random.default_rng()
+    
+    # Jours depuis la date de référence, températures, humidité et précipitations
+    x = np.array([(data.timestamp.date() - base_date).days for data in historical_data], dtype=float)
+    y_temp = np.array([data.temperature for data in historical_data], dtype=float)
+    
+    # Récupérer également l'humidité et la précipitation pour des prévisions plus complètes
+    y_humidity = np.array([data.humidity if getattr(data, 'humidity', None) is not None else 75
+                           for data in historical_data], dtype=float)  # 75 : valeur par défaut
+    y_precip = np.array([data.precipitation if getattr(data, 'precipitation', None) is not None else 0
+                         for data in historical_data], dtype=float)
     
     # Utiliser numpy pour la régression polynomiale (degré 2)
-    temp_coeffs = np.polyfit(x, y_temp, 2)
-    temp_polynomial = np.poly1d(temp_coeffs)
+    temp_polynomial = np.poly1d(np.polyfit(x, y_temp, 2))
     
     # Calculer des tendances simples pour l'humidité et les précipitations
     # (ne pas utiliser de régression polynomiale car ces données sont plus stochastiques)
-    avg_humidity = sum(y_humidity) / len(y_humidity)
-    
-    # Calculer la probabilité de pluie à partir des données historiques
-    rain_days = sum(1 for precip in y_precip if precip > 0)
-    rain_probability = rain_days / len(y_precip) if y_precip else 0.2
-    
-    # Calculer l'intensité moyenne des précipitations les jours de pluie
-    rain_intensity = sum(precip for precip in y_precip if precip > 0) / max(1, rain_days)
-    
-    # Prédire pour les jours futurs
-    predictions = []
-    for i in range(1, days_ahead + 1):
-        # Prédire la température avec la régression polynomiale
-        predicted_temp = temp_polynomial(i)
-        
-        # Ajouter un facteur saisonnier (simulation d'une tendance journalière)
-        # Plus chaud en milieu de journée, plus frais le matin et le soir
-        day_factor = 0.5 * np.sin(np.pi * (i % 1))
-        predicted_temp += day_factor
-        
-        # Limiter la température à des valeurs réalistes pour le Gabon
-        predicted_temp = max(18, min(38, predicted_temp))
-        
-        # Déterminer s'il va pleuvoir ce jour-là
-        # La probabilité augmente légèrement pour les jours plus éloignés (incertitude)
-        daily_rain_probability = rain_probability + (i * 0.02)
-        daily_rain_probability = min(0.75, daily_rain_probability)  # Limiter à 75% max
-        
-        is_rainy_day = np.random.random() < daily_rain_probability
-        
-        # Déterminer la quantité de précipitations
-        if is_rainy_day:
-            # Varier autour de l'intensité moyenne avec une distribution normale
-            precipitation = max(0, np.random.normal(rain_intensity, rain_intensity/2))
-            
-            # Les jours de pluie ont généralement une humidité plus élevée
-            humidity = min(100, avg_humidity + np.random.uniform(5, 15))
-        else:
-            precipitation = 0
-            # Les jours sans pluie ont généralement une humidité plus basse
-            humidity = max(50, avg_humidity - np.random.uniform(5, 15))
-        
-        # Ajuster l'humidité en fonction de la température
-        # Les jours plus chauds tendent à être moins humides
-        temp_humidity_factor = (30 - predicted_temp) / 10
-        humidity += temp_humidity_factor * 5
-        humidity = max(50, min(95, humidity))
-        
-        # Calculer la vitesse du vent (simpliste)
-        if precipitation > 5:
-            # Vents plus forts pendant les fortes pluies
-            wind_speed = np.random.uniform(10, 20)
-        else:
-            wind_speed = np.random.uniform(5, 12)
-        
-        # Déterminer la direction du vent (simpliste)
-        wind_direction = np.random.uniform(0, 360)
-        
-        predictions.append({
-            'date': base_date + timedelta(days=i),
-            'temperature': round(predicted_temp, 1),
-            'precipitation': round(precipitation, 1),
-            'humidity': round(humidity, 1),
-            'wind_speed': round(wind_speed, 1),
-            'wind_direction': round(wind_direction, 0)
-        })
-    
-    return predictions
+    avg_humidity = y_humidity.mean()
+    
+    # Probabilité de pluie et intensité moyenne les jours de pluie (données historiques)
+    rainy_history = y_precip > 0
+    rain_probability = rainy_history.mean()
+    rain_intensity = y_precip[rainy_history].sum() / max(1, rainy_history.sum())
+    
+    # Prédire tout l'horizon en un passage
+    days = np.arange(1, days_ahead + 1)
+    
+    # Température (régression) + facteur de cycle journalier, limitée aux valeurs réalistes pour le Gabon
+    predicted_temp = temp_polynomial(days) + 0.5 * np.sin(np.pi * (days % 1))
+    predicted_temp = np.clip(predicted_temp, 18, 38)
+    
+    # La probabilité de pluie augmente légèrement pour les jours éloignés (incertitude), 75 % max
+    daily_rain_probability = np.minimum(0.75, rain_probability + days * 0.02)
+    is_rainy_day = rng.random(days_ahead) < daily_rain_probability
+    
+    # Quantité de précipitations : distribution normale autour de l'intensité moyenne
+    precipitation = np.where(is_rainy_day,
+                             np.maximum(0, rng.normal(rain_intensity, rain_intensity / 2, days_ahead)), 0)
+    
+    # Jours de pluie plus humides, jours secs moins humides
+    humidity_shift = rng.uniform(5, 15, days_ahead)
+    humidity = np.where(is_rainy_day,
+                        np.minimum(100, avg_humidity + humidity_shift),
+                        np.maximum(50, avg_humidity - humidity_shift))
+    
+    # Les jours plus chauds tendent à être moins humides
+    humidity = np.clip(humidity + (30 - predicted_temp) / 10 * 5, 50, 95)
+    
+    # Vent (simpliste) : plus fort pendant les fortes pluies
+    wind_speed = np.where(precipitation > 5, rng.uniform(10, 20, days_ahead), rng.uniform(5, 12, days_ahead))
+    wind_direction = rng.uniform(0, 360, days_ahead)
+    
+    return [{
+        'date': base_date + timedelta(days=int(day)),
+        'temperature': round(float(predicted_temp[i]), 1),
+        'precipitation': round(float(precipitation[i]), 1),
+        'humidity': round(float(humidity[i]), 1),
+        'wind_speed': round(float(wind_speed[i]), 1),
+        'wind_direction': round(float(wind_direction[i]), 0)
+    } for i, day in enumerate(days)]
 
 def calculate_weather_alert_level(weather_data):
     """Calcule le niveau d'alerte météo en fonction des données"""
@@ -0,0 +1,27 @@
+# scripts/backfill_rollups.py
+"""
+Reconstruit les agrégats horaires/journaliers (WeatherDataHourly, WeatherDataDaily)
+à partir des observations brutes
+
+Usage: python scripts/backfill_rollups.py [AAAA-MM-JJ]
+Sans date, tout l'historique est recalculé.
+"""
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.utils.weather_rollups import rebuild_rollups
+
+app = create_app()
+
+with app.app_context():
+    since = datetime.strptime(sys.argv[1], '%Y-%m-%d') if len(sys.argv) > 1 else None
+
+    # Les tables de cumul peuvent ne pas encore exister sur une base ancienne
+    db.create_all()
+
+    print(f"🔧 Reconstruction des agrégats depuis {since.date() if since else 'le début'}...")
+    hourly, daily = rebuild_rollups(since)
+    print(f"✅ {hourly} agrégats horaires, {daily} agrégats journaliers")
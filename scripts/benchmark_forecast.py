@@ -0,0 +1,47 @@
+# scripts/benchmark_forecast.py
+"""
+Benchmark de régression du chemin de prévision (weather_utils.predict_temperature)
+
+Mode déterministe : pour un historique synthétique fixe, la prévision est
+identique d'une exécution à l'autre ; son empreinte permet de détecter un
+changement de résultat, le temps moyen de détecter une régression de performance.
+
+Usage: python scripts/benchmark_forecast.py [répétitions] [jours]  (1000 et 7 par défaut)
+"""
+import sys
+import os
+import json
+import hashlib
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.weather_utils import predict_temperature
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+days_ahead = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+base_date = date(2024, 3, 15)
+history = [SimpleNamespace(timestamp=datetime.combine(base_date - timedelta(days=day), datetime.min.time()),
+                           temperature=26.0 + (day % 4) * 0.7, humidity=70.0 + day,
+                           precipitation=4.0 if day % 2 else 0.0)
+           for day in range(10)]
+
+
+def run(station_id):
+    return predict_temperature(history, days_ahead=days_ahead, station_id=station_id,
+                               base_date=base_date, deterministic=True)
+
+
+reference = run(1)
+digest = hashlib.sha256(json.dumps(reference, default=str, sort_keys=True).encode('utf-8')).hexdigest()
+
+started = time.perf_counter()
+for i in range(repeats):
+    run(i % 10 + 1)
+elapsed = time.perf_counter() - started
+
+print(f"predict_temperature ({days_ahead} jours, {repeats} appels): "
+      f"{elapsed / repeats * 1000:.3f} ms par prévision")
+print(f"Empreinte de la prévision de référence: {digest[:16]}")
@@ -0,0 +1,36 @@
+# scripts/benchmark_ml_features.py
+"""
+Compare la préparation des features ML : implémentation ligne à ligne d'origine
+et version vectorisée de WeatherMLPredictor.prepare_features
+
+Usage: python scripts/benchmark_ml_features.py [jours]  (90 jours horaires par défaut)
+"""
+import sys
+import os
+import time
+import warnings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routes.metpy_ml_forecasting import WeatherMLPredictor
+from ml_feature_reference import make_observations, reference_prepare_features  # scripts/, voisin du benchmark
+
+warnings.filterwarnings('ignore')
+
+days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+observations = make_observations(days * 24)
+predictor = WeatherMLPredictor(registry=object())
+
+
+def timed(func):
+    started = time.perf_counter()
+    func(observations)
+    return time.perf_counter() - started
+
+
+vectorised = min(timed(predictor.prepare_features) for _ in range(3))
+reference = timed(reference_prepare_features)
+
+print(f"📊 {len(observations)} observations horaires ({days} jours)")
+print(f"   Ligne à ligne : {reference:.3f} s")
+print(f"   Vectorisé     : {vectorised:.3f} s")
+print(f"   Accélération  : x{reference / vectorised:.0f}")
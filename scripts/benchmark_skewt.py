@@ -0,0 +1,74 @@
+# scripts/benchmark_skewt.py
+"""
+Compare le rendu d'un diagramme Skew-T : figure complète redessinée à chaque
+requête (plot_dry_adiabats / plot_moist_adiabats / plot_mixing_lines, axes,
+graduations) et gabarit dont le fond est rasterisé une fois par processus
+(app.utils.skewt_background.SkewTTemplate)
+
+Usage: python scripts/benchmark_skewt.py [répétitions]  (10 par défaut)
+"""
+import sys
+import os
+import io
+import time
+import warnings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import metpy.calc as mpcalc
+from matplotlib.figure import Figure
+from metpy.plots import SkewT
+from metpy.units import units
+from app.utils.skewt_background import SkewTTemplate
+
+warnings.filterwarnings('ignore')
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+pressure = np.array([1000, 925, 850, 700, 500, 400, 300, 250, 200, 150, 100]) * units.hPa
+temperature = mpcalc.dry_lapse(pressure, 28 * units.degC).to('degC')
+dewpoint = temperature - 5 * units.delta_degC
+parcel = mpcalc.parcel_profile(pressure, temperature[0], dewpoint[0]).to('degC')
+
+
+def draw_profile(skew):
+    skew.plot(pressure, temperature, 'r-', linewidth=2, label='Température')
+    skew.plot(pressure, dewpoint, 'g-', linewidth=2, label='Point de rosée')
+    skew.plot(pressure, parcel, 'k--', linewidth=2, label='Parcelle soulevée')
+    skew.ax.set_title('Diagramme Skew-T - benchmark', fontsize=14, fontweight='bold')
+    skew.ax.legend(loc='upper right')
+
+
+def render_full():
+    fig = Figure(figsize=(9, 12))
+    skew = SkewT(fig, rotation=45)
+    draw_profile(skew)
+    skew.ax.set_ylim(1000, 100)
+    skew.ax.set_xlim(-40, 60)
+    skew.plot_dry_adiabats(t0=np.arange(233, 533, 10) * units.kelvin, alpha=0.25)
+    skew.plot_moist_adiabats(t0=np.arange(233, 400, 5) * units.kelvin, alpha=0.25)
+    skew.plot_mixing_lines(pressure=np.arange(1000, 99, -100) * units.hPa, alpha=0.25)
+    fig.savefig(io.BytesIO(), format='png', dpi=150, bbox_inches='tight')
+
+
+def timed(render):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        render()
+    return (time.perf_counter() - started) / repeats
+
+
+# Création du gabarit : une fois par processus (préchauffage du pool de rendu)
+started = time.perf_counter()
+template = SkewTTemplate()
+initial = time.perf_counter() - started
+render_full()
+
+full = timed(render_full)
+reused = timed(lambda: template.render(draw_profile))
+
+print(f"📊 Skew-T, moyenne sur {repeats} rendus (PNG 150 dpi)")
+print(f"   Création du gabarit : {initial:.3f} s (une fois par processus)")
+print(f"   Figure complète     : {full:.3f} s")
+print(f"   Gabarit réutilisé   : {reused:.3f} s")
+print(f"   Accélération        : x{full / reused:.1f}")
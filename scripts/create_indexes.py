@@ -0,0 +1,37 @@
+# scripts/create_indexes.py
+"""
+Crée les index déclarés sur les modèles dans une base existante
+db.create_all() ne crée pas les index des tables déjà présentes
+
+Les modèles liés à app.extensions.db (MaritimeData, TurbulenceData, hiérarchie
+DGM) ont leur propre metadata : elle est parcourue aussi, avec le moteur de
+l'application. Les tables absentes de la base sont ignorées.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from app import create_app, db
+from app.extensions import db as extensions_db
+import app.models.maritime_data  # noqa: F401 (enregistre MaritimeData)
+import app.models.aviation_data  # noqa: F401 (enregistre TurbulenceData)
+
+app = create_app()
+
+with app.app_context():
+    print("🔧 Création des index manquants...")
+
+    existing_tables = set(inspect(db.engine).get_table_names())
+    for metadata in (db.metadata, extensions_db.metadata):
+        # L'ordre des dépendances est inutile pour les index (et sorted_tables échoue
+        # sur les clés étrangères vers l'autre metadata)
+        for table in metadata.tables.values():
+            if table.name not in existing_tables:
+                print(f"   ⏭️  {table.name} absente de la base")
+                continue
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+                print(f"   ✅ {table.name}.{index.name}")
+
+    print("✅ Index à jour")
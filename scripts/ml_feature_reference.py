@@ -0,0 +1,125 @@
+# scripts/ml_feature_reference.py
+"""
+Référence et données synthétiques pour les features ML (WeatherMLPredictor)
+
+- reference_prepare_features : implémentation ligne à ligne d'origine, conservée
+  pour vérifier la parité de la version vectorisée
+- make_observations : série horaire synthétique (tests et scripts/benchmark_ml_features.py)
+
+Hors du paquet app : ce code de référence n'est pas livré avec l'application.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import metpy.calc as mpcalc
+from metpy.units import units
+
+
+def reference_prepare_features(weather_data):
+    """Implémentation ligne à ligne d'origine, conservée comme référence"""
+    features = []
+
+    for i, data in enumerate(weather_data):
+        if not (data.temperature and data.humidity and data.pressure):
+            continue
+
+        temp = data.temperature * units.celsius
+        humidity = data.humidity * units.percent
+        pressure = data.pressure * units.hPa
+
+        # Features de base
+        feature_row = {
+            'temperature': temp.magnitude,
+            'humidity': humidity.magnitude,
+            'pressure': pressure.magnitude,
+            'wind_speed': data.wind_speed or 0,
+            'wind_direction': data.wind_direction or 0,
+            'precipitation': data.precipitation or 0
+        }
+
+        # Features MetPy calculées
+        try:
+            # Point de rosée
+            dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, humidity)
+            feature_row['dewpoint'] = dewpoint.to('celsius').magnitude
+
+            # Température potentielle
+            potential_temp = mpcalc.potential_temperature(pressure, temp)
+            feature_row['potential_temperature'] = potential_temp.to('kelvin').magnitude
+
+            # Température équivalente potentielle
+            equiv_potential_temp = mpcalc.equivalent_potential_temperature(pressure, temp, dewpoint)
+            feature_row['equiv_potential_temp'] = equiv_potential_temp.to('kelvin').magnitude
+
+            # Rapport de mélange
+            mixing_ratio = mpcalc.mixing_ratio_from_relative_humidity(pressure, temp, humidity)
+            feature_row['mixing_ratio'] = mixing_ratio.magnitude
+
+            # Température virtuelle
+            virtual_temp = mpcalc.virtual_temperature(temp, mixing_ratio)
+            feature_row['virtual_temperature'] = virtual_temp.to('celsius').magnitude
+
+            # Indice de chaleur (si applicable)
+            if temp.magnitude > 20:
+                heat_index = mpcalc.heat_index(temp, humidity)
+                feature_row['heat_index'] = heat_index.to('celsius').magnitude
+            else:
+                feature_row['heat_index'] = temp.magnitude
+
+        except Exception as e:
+            # Valeurs par défaut si calculs échouent
+            feature_row.update({
+                'dewpoint': temp.magnitude - 10,
+                'potential_temperature': temp.magnitude + 273.15,
+                'equiv_potential_temp': temp.magnitude + 280,
+                'mixing_ratio': 0.01,
+                'virtual_temperature': temp.magnitude,
+                'heat_index': temp.magnitude
+            })
+
+        # Features temporelles
+        feature_row['hour'] = data.timestamp.hour
+        feature_row['day_of_year'] = data.timestamp.timetuple().tm_yday
+        feature_row['month'] = data.timestamp.month
+
+        # Features de tendance (si suffisamment de données)
+        if i >= 3:
+            recent_temps = [weather_data[j].temperature for j in range(i-3, i) if weather_data[j].temperature]
+            recent_pressures = [weather_data[j].pressure for j in range(i-3, i) if weather_data[j].pressure]
+
+            if len(recent_temps) >= 2:
+                feature_row['temp_trend'] = np.mean(np.diff(recent_temps))
+            else:
+                feature_row['temp_trend'] = 0
+
+            if len(recent_pressures) >= 2:
+                feature_row['pressure_trend'] = np.mean(np.diff(recent_pressures))
+            else:
+                feature_row['pressure_trend'] = 0
+        else:
+            feature_row['temp_trend'] = 0
+            feature_row['pressure_trend'] = 0
+
+        features.append(feature_row)
+
+    return pd.DataFrame(features)
+
+
+def make_observations(count, seed=0, base_temperature=30.0):
+    """Série horaire synthétique avec valeurs manquantes et nulles"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    observations = []
+    for i in range(count):
+        observations.append(SimpleNamespace(
+            timestamp=start + timedelta(hours=i),
+            temperature=float(base_temperature + 3 * np.sin(i / 24 * 2 * np.pi) + rng.normal()),
+            humidity=float(rng.uniform(60, 95)),
+            pressure=float(1010 + rng.normal()),
+            wind_speed=None if i % 7 == 0 else float(rng.uniform(0, 8)),
+            wind_direction=float(rng.uniform(0, 360)),
+            precipitation=None if i % 5 == 0 else float(rng.random() < 0.1)
+        ))
+    return observations
@@ -0,0 +1,46 @@
+# scripts/train_ml_models.py
+"""
+Entraîne et enregistre les modèles ML de prévision (hors des requêtes web)
+
+Usage: python scripts/train_ml_models.py [station_id ...] [--days N] [--workers N]
+Sans identifiant, toutes les stations actives sont entraînées, en parallèle
+sur les cœurs disponibles (--workers 1 pour un entraînement séquentiel).
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.utils.training_jobs import train_all_stations
+
+
+def _pop_option(args, name, default):
+    if name not in args:
+        return default
+    position = args.index(name)
+    value = int(args[position + 1])
+    del args[position:position + 2]
+    return value
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    days_back = _pop_option(args, '--days', 90)
+    max_workers = _pop_option(args, '--workers', None)
+
+    app = create_app()
+
+    with app.app_context():
+        station_ids = [int(arg) for arg in args] or None
+
+        print(f"🔧 Entraînement des modèles ({days_back} jours)...")
+        report = train_all_stations(station_ids, days_back, max_workers)
+
+        for result in report['results']:
+            print(f"   {'✅' if result['success'] else '⚠'} Station {result['station_id']}: "
+                  f"{result['message']} ({result['seconds']} s)")
+
+        print(f"✅ {report['succeeded']}/{report['stations']} stations en {report['wall_time_seconds']} s "
+              f"avec {report['workers']} processus x {report['n_jobs_per_model']} cœurs "
+              f"(somme des durées par station {report['station_seconds_total']} s, "
+              f"accélération estimée x{report['estimated_speedup']})")
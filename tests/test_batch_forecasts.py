@@ -0,0 +1,181 @@
+# tests/test_batch_forecasts.py
+import unittest
+import os
+import sys
+import json
+import subprocess
+import tempfile
+from unittest import mock
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.metpy_core import GabonMeteoCore
+from app.utils.metpy_gabon import GabonMetPyCore, SEASON_CODES
+from app.models.training_job import TrainingJob, JOB_SUCCEEDED
+from app.utils.model_cache import model_cache
+from app.utils.training_jobs import submit_training_job, JOB_GABON_MODELS
+from app.routes.metpy_enhanced import forecasts_batch, gabon_core
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+class CountingModel:
+    """Modèle factice : compte les appels predict et retourne une valeur par ligne"""
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def predict(self, features):
+        self.calls += 1
+        return np.full(len(features), self.value)
+
+class BatchPredictionTestCase(unittest.TestCase):
+    conditions = [
+        {'temperature': 30, 'humidity': 80, 'pressure': 1010, 'wind_speed': 5},
+        {'temperature': 25, 'humidity': 90, 'pressure': 1012, 'wind_speed': 10},
+        {'temperature': 27, 'humidity': 70, 'pressure': 1008, 'wind_speed': 3}
+    ]
+
+    def test_advanced_weather_one_predict_per_model(self):
+        core = GabonMeteoCore()
+        core.temp_model, core.rain_model = CountingModel(28.0), CountingModel(4.0)
+
+        results = core.predict_advanced_weather_batch(self.conditions, days_ahead=7)
+
+        self.assertEqual(core.temp_model.calls, 1)
+        self.assertEqual(core.rain_model.calls, 1)
+        self.assertEqual([len(predictions) for predictions in results], [7, 7, 7])
+        self.assertEqual(results[0][0]['confidence'], 'ÉLEVÉE')
+        self.assertEqual(results[0][6]['confidence'], 'FAIBLE')
+        self.assertIn('thermal_stress_level', results[2][3]['thermal_analysis'])
+
+    def test_gabon_weather_one_predict_per_model(self):
+        core = GabonMetPyCore()
+        core._load_models = lambda: False
+        core.models_trained = True
+        core.models = {'temperature': CountingModel(27.0), 'precipitation': CountingModel(-1.0)}
+
+        results = core.predict_gabon_weather_batch(self.conditions, days_ahead=7)
+        single = core.predict_gabon_weather(self.conditions[0], days_ahead=3)
+
+        self.assertEqual(core.models['temperature'].calls, 2)
+        self.assertEqual(core.models['precipitation'].calls, 2)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(single), 3)
+        self.assertTrue(all(day['precipitation'] == 0 for predictions in results for day in predictions))
+
+class SeasonCodesTestCase(unittest.TestCase):
+    def test_codes_identical_across_processes(self):
+        # Graines de hachage différentes : les codes ne doivent pas en dépendre
+        script = ('import json; from app.utils.metpy_gabon import SEASON_CODES; '
+                  'print(json.dumps(sorted(SEASON_CODES.items())))')
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        outputs = []
+        for seed in ('1', '2'):
+            completed = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True,
+                                       env={**os.environ, 'PYTHONHASHSEED': seed}, check=True)
+            outputs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], [list(item) for item in sorted(SEASON_CODES.items())])
+        self.assertEqual(sorted(code for _, code in SEASON_CODES.items()), [0] * 3 + [1] * 4 + [2] * 2 + [3] * 3)
+
+class ForecastsBatchRouteTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.app.config['TRAINING_JOBS_EAGER'] = True
+
+        # Modèles Gabon dans un répertoire temporaire, route sans modèle chargé
+        self.models_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(GabonMetPyCore, 'MODELS_DIR', self.models_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.saved_state = gabon_core.models, gabon_core.models_trained
+        gabon_core.models, gabon_core.models_trained = {}, False
+        model_cache.invalidate()
+
+        with self.app.app_context():
+            db.create_all()
+            self.station_ids = []
+            for name, temperature in [('Libreville', 30.0), ('Oyem', 24.0), ('Mouila', None)]:
+                station = WeatherStation(name=name, latitude=0.4, longitude=9.4, region='Estuaire')
+                db.session.add(station)
+                db.session.commit()
+                self.station_ids.append(station.id)
+                if temperature is not None:
+                    db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 1, 1, 12),
+                                               temperature=temperature, humidity=80.0,
+                                               wind_speed=6.0, pressure=1010.0))
+            db.session.commit()
+
+    def tearDown(self):
+        gabon_core.models, gabon_core.models_trained = self.saved_state
+        model_cache.invalidate()
+        with self.app.app_context():
+            db.drop_all()
+        self.models_dir.cleanup()
+
+    def _train_national_models(self):
+        """Entraînement réel par le travail 'gabon_models' (historique horaire récent)"""
+        now = datetime.utcnow()
+        db.session.add_all([
+            WeatherData(station_id=self.station_ids[0], timestamp=now - timedelta(hours=hour),
+                        temperature=26.0 + (hour % 24) / 4, humidity=75.0 + hour % 10, pressure=1010.0,
+                        wind_speed=5.0, precipitation=float(hour % 7 == 0))
+            for hour in range(1, 121)
+        ])
+        db.session.commit()
+        job, _ = submit_training_job(JOB_GABON_MODELS, params={'days_back': 30})
+        self.assertEqual(db.session.get(TrainingJob, job.id).status, JOB_SUCCEEDED)
+
+    def _spy_predict(self):
+        """Compte les appels predict des vrais modèles (sans les remplacer)"""
+        return (mock.patch.object(GradientBoostingRegressor, 'predict', autospec=True,
+                                  side_effect=GradientBoostingRegressor.predict),
+                mock.patch.object(RandomForestRegressor, 'predict', autospec=True,
+                                  side_effect=RandomForestRegressor.predict))
+
+    def test_national_forecast_uses_trained_models(self):
+        with self.app.app_context():
+            self._train_national_models()
+
+        temp_spy, rain_spy = self._spy_predict()
+        with temp_spy as temp_predict, rain_spy as rain_predict:
+            with self.app.test_request_context('/api/v2/forecasts/batch?station_ids=all&days=7'):
+                payload = forecasts_batch().get_json()
+
+        self.assertEqual([item['station']['id'] for item in payload['forecasts']], self.station_ids[:2])
+        forecasts = payload['forecasts'][0]['advanced_forecasts']
+        self.assertEqual(len(forecasts), 7)
+        self.assertIn('thermal_comfort', forecasts[0])
+        # Modèles persistés chargés par la route : un appel predict par modèle
+        self.assertTrue(gabon_core.models_trained)
+        self.assertEqual((temp_predict.call_count, rain_predict.call_count), (1, 1))
+
+    def test_national_forecast_without_models_is_climatological(self):
+        temp_spy, rain_spy = self._spy_predict()
+        with temp_spy as temp_predict, rain_spy as rain_predict:
+            with self.app.test_request_context('/api/v2/forecasts/batch?days=3'):
+                payload = forecasts_batch().get_json()
+
+        self.assertEqual(len(payload['forecasts']), 2)
+        self.assertEqual(len(payload['forecasts'][0]['advanced_forecasts']), 3)
+        self.assertFalse(gabon_core.models_trained)
+        self.assertEqual(temp_predict.call_count + rain_predict.call_count, 0)
+
+    def test_missing_stations_and_invalid_days(self):
+        with self.app.test_request_context('/api/v2/forecasts/batch', method='POST',
+                                           json={'station_ids': [self.station_ids[2], 9999], 'days': 3}):
+            payload = forecasts_batch().get_json()
+        with self.app.test_request_context('/api/v2/forecasts/batch?days=30'):
+            _, status = forecasts_batch()
+
+        self.assertEqual(payload['forecasts'], [])
+        self.assertEqual(payload['missing_station_ids'], [self.station_ids[2], 9999])
+        self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# tests/test_batch_validation.py
+import unittest
+import os
+import sys
+from unittest import mock
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_login import login_user
+from sqlalchemy import event, update
+from app import create_app, db
+from app.models.user import User
+from app.models.agent import AgentDGM, Direction, Service, Prelevement
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.weather_rollup import WeatherDataDaily
+from app.utils.permission_scopes import permission_scopes
+from app.utils import prelevement_validation
+from app.utils.prelevement_validation import validate_prelevements
+from app.routes.dgm_hierarchy import batch_validate
+
+class BatchValidationTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        permission_scopes.invalidate()
+
+        with self.app.app_context():
+            db.create_all()
+            direction = Direction(name='Estuaire')
+            db.session.add(direction)
+            db.session.flush()
+            services = [Service(name='Observation', direction_id=direction.id),
+                        Service(name='Prévision', direction_id=direction.id)]
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add_all(services + [station])
+            db.session.flush()
+
+            users = [User(username=f'agent_validation_{i}', email=f'agent{i}@dgm.ga', role='user')
+                     for i in range(2)]
+            self.admin = User(username='admin_validation', email='admin.validation@dgm.ga', role='admin')
+            db.session.add_all(users + [self.admin])
+            db.session.flush()
+            agents = [AgentDGM(matricule=f'DGM10{i}', user_id=user.id, date_naissance=date(1985, 1, 1),
+                               fonction='Observateur', service_id=service.id, station_id=station.id)
+                      for i, (user, service) in enumerate(zip(users, services))]
+            db.session.add_all(agents)
+            db.session.flush()
+
+            start = datetime(2024, 1, 1)
+            prelevements = [Prelevement(agent_id=agents[i % 2].id, station_id=station.id,
+                                        date_prelevement=start + timedelta(hours=i),
+                                        temperature=25.0 + i % 5, humidity=80.0, validated=(i % 10 == 0))
+                            for i in range(2000)]
+            db.session.add_all(prelevements)
+            db.session.commit()
+
+            self.ids = [p.id for p in prelevements]
+            self.service_ids = {services[0].id}
+            self.admin_id = self.admin.id
+
+    def tearDown(self):
+        permission_scopes.invalidate()
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_set_based_validation(self):
+        with self.app.app_context():
+            statements = []
+            def count(*args):
+                statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                results = validate_prelevements(self.ids + [self.ids[1], 999999, 'abc'], self.service_ids)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+
+            statuses = {item['id']: item['status'] for item in results}
+            # Pairs : service autorisé ; multiples de 10 déjà validés
+            self.assertEqual(statuses[self.ids[2]], 'validated')
+            self.assertEqual(statuses[self.ids[1]], 'out_of_scope')
+            self.assertEqual(statuses[self.ids[10]], 'already_validated')
+            self.assertEqual(statuses[999999], 'not_found')
+            self.assertEqual(statuses['abc'], 'invalid')
+            self.assertEqual(len(results), len(self.ids) + 2)
+
+            validated = sum(1 for status in statuses.values() if status == 'validated')
+            self.assertEqual(validated, 800)
+            self.assertEqual(WeatherData.query.count(), 800)
+            self.assertEqual(Prelevement.query.filter_by(validated=True).count(), 1000)
+            self.assertEqual(db.session.query(db.func.sum(WeatherDataDaily.record_count)).scalar(), 800)
+            # Hors agrégats (une ligne par heure/jour créée) : quelques requêtes groupées seulement
+            self.assertLess(len([sql for sql in statements if 'weather_data_hourly' not in sql
+                                 and 'weather_data_daily' not in sql]), 15)
+
+    def test_concurrent_validation_is_not_duplicated(self):
+        with self.app.app_context():
+            select_rows = prelevement_validation._select_rows
+
+            def select_then_validate_elsewhere(ids, service_ids):
+                # Une autre requête valide le prélèvement après notre sélection
+                rows = select_rows(ids, service_ids)
+                db.session.execute(update(Prelevement).where(Prelevement.id == self.ids[2])
+                                   .values(validated=True))
+                return rows
+
+            with mock.patch.object(prelevement_validation, '_select_rows', select_then_validate_elsewhere):
+                results = validate_prelevements([self.ids[2], self.ids[4]], self.service_ids)
+
+            self.assertEqual([item['status'] for item in results], ['already_validated', 'validated'])
+            self.assertEqual(WeatherData.query.count(), 1)
+            self.assertEqual(db.session.query(db.func.sum(WeatherDataDaily.record_count)).scalar(), 1)
+
+    def test_route_keeps_error_messages(self):
+        with self.app.test_request_context('/dgm/batch-validate', method='POST',
+                                           json={'prelevement_ids': [self.ids[0], self.ids[2], 999999]}):
+            login_user(db.session.get(User, self.admin_id))
+            payload = batch_validate.__wrapped__().get_json()
+
+        self.assertEqual(payload['validated_count'], 1)
+        self.assertEqual(payload['errors'], [f'Prélèvement {self.ids[0]} déjà validé',
+                                             'Prélèvement 999999 non trouvé'])
+        self.assertEqual([item['status'] for item in payload['results']],
+                         ['already_validated', 'validated', 'not_found'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# tests/test_convective_indices.py
+import unittest
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metpy.calc as mpcalc
+from metpy.units import units
+from app.utils.convective_indices import compute_convective_indices
+
+def reference_indices(temperature, humidity, pressure):
+    """Calcul ligne à ligne d'origine (composite_index_diagram), avec unités MetPy"""
+    temp = temperature * units.celsius
+    rh = humidity * units.percent
+    p = pressure * units.hPa
+
+    dewpoint = mpcalc.dewpoint_from_relative_humidity(temp, rh)
+    virtual_temp = mpcalc.virtual_temperature(temp, mpcalc.mixing_ratio_from_relative_humidity(p, temp, rh))
+
+    cape = max(0, (virtual_temp.to('kelvin').magnitude - 273.15) * 100)
+    k_index = (temp.magnitude - 20) + dewpoint.to('celsius').magnitude - 5
+    return {
+        'dewpoint': dewpoint.to('celsius').magnitude,
+        'cape': cape,
+        'lifted_index': 15 - (temp - 15 * units.celsius).magnitude,
+        'k_index': k_index,
+        'storm_probability': min(100, max(0, cape / 50 + (rh.magnitude - 50) + (k_index - 15)))
+    }
+
+class ConvectiveIndicesTestCase(unittest.TestCase):
+    def test_matches_row_by_row_metpy(self):
+        rng = np.random.default_rng(1)
+        temperature = rng.uniform(18, 36, 50)
+        humidity = rng.uniform(40, 100, 50)
+        pressure = rng.uniform(995, 1020, 50)
+
+        indices = compute_convective_indices(temperature, humidity, pressure)
+
+        for i in range(len(temperature)):
+            expected = reference_indices(temperature[i], humidity[i], pressure[i])
+            for name, value in expected.items():
+                self.assertAlmostEqual(indices[name][i], value, places=6, msg=name)
+
+    def test_scalars_and_missing_values(self):
+        indices = compute_convective_indices(28.0, 80.0, 1010.0)
+        self.assertEqual(np.ndim(indices['cape']), 0)
+        self.assertAlmostEqual(float(indices['cin']), max(0, 50 - float(indices['cape']) / 10))
+
+        indices = compute_convective_indices([28.0, None], [80.0, 70.0], [1010.0, 1012.0])
+        self.assertFalse(np.isnan(indices['k_index'][0]))
+        self.assertTrue(np.isnan(indices['k_index'][1]))
+
+if __name__ == '__main__':
+    unittest.main()
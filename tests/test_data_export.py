@@ -0,0 +1,72 @@
+# tests/test_data_export.py
+import unittest
+import os
+import sys
+import csv
+import gzip
+import io
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.user import User
+
+class DataExportTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            admin = User(username='admin_export', email='admin_export@test.ga', role='admin')
+            admin.set_password('secret')
+            lbv = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            pog = WeatherStation(name='Port-Gentil', latitude=-0.7, longitude=8.8, region='Ogooué-Maritime')
+            db.session.add_all([admin, lbv, pog])
+            db.session.commit()
+            self.lbv_id = lbv.id
+
+            db.session.add_all([
+                WeatherData(station_id=lbv.id, timestamp=datetime(2024, 1, 10, 12), temperature=27.0),
+                WeatherData(station_id=pog.id, timestamp=datetime(2024, 1, 11, 12), temperature=28.0),
+                WeatherData(station_id=lbv.id, timestamp=datetime(2024, 2, 1, 12), temperature=29.0),
+            ])
+            db.session.commit()
+
+        self.client.post('/login', data={'email': 'admin_export@test.ga', 'password': 'secret'})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def _rows(self, text):
+        return list(csv.reader(io.StringIO(text)))
+
+    def test_streamed_csv_with_filters(self):
+        response = self.client.get(
+            f'/dashboard/export_data?station_id={self.lbv_id}&start_date=2024-01-01&end_date=2024-01-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+
+        rows = self._rows(response.get_data(as_text=True))
+        self.assertEqual(rows[0][1], 'Station')
+        self.assertEqual([row[1:4] for row in rows[1:]], [['Libreville', '2024-01-10 12:00:00', '27.0']])
+
+    def test_gzip_export(self):
+        response = self.client.get('/dashboard/export_data?compress=gzip')
+        self.assertEqual(response.mimetype, 'application/gzip')
+
+        rows = self._rows(gzip.decompress(response.get_data()).decode('utf-8'))
+        self.assertEqual([row[1] for row in rows[1:]], ['Libreville', 'Port-Gentil', 'Libreville'])
+
+    def test_invalid_date(self):
+        response = self.client.get('/dashboard/export_data?start_date=10/01/2024')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_data_import.py
+import unittest
+import os
+import sys
+import io
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.weather_rollup import WeatherDataDaily
+from app.utils.data_import import import_weather_file
+
+CSV_CONTENT = """station_name,date,temperature,humidity,pressure,wind_speed,wind_direction,precipitation
+Libreville,2024-01-01 06:00,25.5,85,1010,3,180,0
+Libreville,2024-01-01 12:00,31.0,70,1009,5,200,
+Libreville,2024-01-01 12:00,31.0,70,1009,5,200,
+Libreville,2024-01-02 06:00,120,85,1010,3,180,0
+Libreville,pas une date,25,85,1010,3,180,0
+Libreville,2024-01-02 09:00,abc,85,1010,3,180,0
+Inconnue,2024-01-01 06:00,25,85,1010,3,180,0
+Libreville,2023-12-31 06:00,24,80,1011,2,90,1
+"""
+
+class DataImportTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+
+            # Déjà présent en base
+            db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2023, 12, 31, 6), temperature=24.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_import_report_and_rows(self):
+        with self.app.app_context():
+            report = import_weather_file(io.StringIO(CSV_CONTENT), filename='obs.csv', chunk_size=3)
+
+            self.assertEqual(report.rows_read, 8)
+            self.assertEqual(report.rows_accepted, 2)
+            self.assertEqual(report.rows_duplicated, 2)
+            self.assertEqual(report.rows_rejected, 4)
+            self.assertIsNotNone(report.rows_per_second)
+
+            rows = WeatherData.query.filter(WeatherData.timestamp >= datetime(2024, 1, 1)).order_by(WeatherData.timestamp).all()
+            self.assertEqual([r.temperature for r in rows], [25.5, 31.0])
+            self.assertIsNone(rows[1].precipitation)
+
+            # Les agrégats journaliers suivent l'insertion groupée
+            daily = WeatherDataDaily.query.filter_by(station_id=self.station_id, day=datetime(2024, 1, 1).date()).one()
+            self.assertEqual(daily.record_count, 2)
+
+    def test_create_stations(self):
+        content = "station_name,date,temperature,latitude,longitude\nFranceville,2024-01-01,27,-1.6,13.6\n"
+        with self.app.app_context():
+            report = import_weather_file(io.StringIO(content), filename='obs.csv', create_stations=True)
+
+            self.assertEqual(report.stations_created, 1)
+            self.assertEqual(report.rows_accepted, 1)
+            self.assertIsNotNone(WeatherStation.query.filter_by(name='Franceville').first())
+
+if __name__ == '__main__':
+    unittest.main()
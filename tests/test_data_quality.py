@@ -0,0 +1,81 @@
+# tests/test_data_quality.py
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.data_quality import get_station_quality
+
+class DataQualityTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+
+            lbv = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            oyem = WeatherStation(name='Oyem', latitude=1.6, longitude=11.6, region='Woleu-Ntem')
+            db.session.add_all([lbv, oyem])
+            db.session.commit()
+
+            self.start = datetime(2024, 3, 1, 0, 0)
+            # Quatre observations sur les heures 0, 1 et 3 (heure 2 manquante)
+            rows = [
+                (0, 26.0, 80.0, 0.0, 1010.0),
+                (1, None, 82.0, 0.0, 1011.0),     # Température manquante
+                (1, 27.0, 120.0, 0.0, 1012.0),    # Humidité hors plage
+                (3, 28.0, 75.0, None, 700.0),     # Précipitations manquantes, pression hors plage
+                (30, 25.0, 80.0, 0.0, 1010.0),    # Hors période
+            ]
+            for hour, temp, hum, precip, pressure in rows:
+                db.session.add(WeatherData(station_id=lbv.id, timestamp=self.start + timedelta(hours=hour, minutes=10),
+                                           temperature=temp, humidity=hum, precipitation=precip,
+                                           pressure=pressure))
+            db.session.commit()
+
+            self.station_ids = [lbv.id, oyem.id]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_grouped_report(self):
+        with self.app.app_context():
+            statements = []
+            def count(*args):
+                statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                report = get_station_quality(self.station_ids, self.start, self.start + timedelta(hours=4))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+
+        self.assertEqual(len(statements), 1)
+        lbv, oyem = report
+
+        self.assertEqual(lbv['station'], 'Libreville')
+        self.assertEqual(lbv['total_records'], 4)
+        self.assertEqual(lbv['incomplete_records'], 2)
+        self.assertEqual(lbv['completeness_rate'], 50.0)
+        self.assertEqual(lbv['null_counts']['temperature'], 1)
+        self.assertEqual(lbv['null_counts']['precipitation'], 1)
+        self.assertEqual(lbv['out_of_range']['humidity'], 1)
+        self.assertEqual(lbv['out_of_range']['pressure'], 1)
+        self.assertEqual(lbv['out_of_range_values'], 2)
+        self.assertEqual(lbv['missing_hours'], 1)
+
+        # Station sans observation : présente, avec toutes les heures manquantes
+        self.assertEqual(oyem['total_records'], 0)
+        self.assertEqual(oyem['incomplete_records'], 0)
+        self.assertEqual(oyem['null_counts']['temperature'], 0)
+        self.assertEqual(oyem['completeness_rate'], 0)
+        self.assertEqual(oyem['missing_hours'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
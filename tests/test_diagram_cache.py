@@ -0,0 +1,103 @@
+# tests/test_diagram_cache.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.diagram_cache import DiagramCache, diagram_key
+from app.routes.metpy_diagrams import _serve_diagram
+
+class DiagramCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.cache = DiagramCache(self.base_dir, max_bytes=250)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_key_depends_on_latest_observation(self):
+        latest = datetime(2024, 1, 1, 12)
+        self.assertEqual(diagram_key(1, 'skew_t', latest), diagram_key(1, 'skew_t', latest))
+        self.assertNotEqual(diagram_key(1, 'skew_t', latest),
+                            diagram_key(1, 'skew_t', datetime(2024, 1, 1, 13)))
+        self.assertNotEqual(diagram_key(1, 'skew_t', latest), diagram_key(2, 'skew_t', latest))
+        self.assertNotEqual(diagram_key(1, 'skew_t', latest), diagram_key(1, 'hodograph', latest))
+
+    def test_put_and_get(self):
+        self.assertIsNone(self.cache.get('absent'))
+
+        self.cache.put('a', b'png-a', {'station': 'Libreville'})
+        png, metadata = self.cache.get('a')
+        self.assertEqual(png, b'png-a')
+        self.assertEqual(metadata, {'station': 'Libreville'})
+
+    def test_least_recently_used_evicted(self):
+        for index, key in enumerate(['a', 'b']):
+            self.cache.put(key, b'x' * 100, {})
+            os.utime(os.path.join(self.base_dir, f'{key}.png'), (index, index))
+
+        # Lecture de 'a' : 'b' devient le moins récemment utilisé
+        self.cache.get('a')
+        self.cache.put('c', b'x' * 100, {})
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+class ServeDiagramTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.base_dir = tempfile.mkdtemp()
+        self.app.config['DIAGRAM_CACHE_DIR'] = self.base_dir
+        self.app.config['DIAGRAM_RENDER_EAGER'] = True
+        self.renders = 0
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 1, 1, 12),
+                                       temperature=28.0, humidity=80.0, pressure=1010.0))
+            db.session.commit()
+            self.station_id = station.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.base_dir)
+
+    def _render(self, station):
+        self.renders += 1
+        return b'\x89PNG-test', {'station': station.name}
+
+    def test_png_rendered_once_then_revalidated(self):
+        path = f'/api/metpy/diagrams/skewt/{self.station_id}.png'
+        with self.app.test_request_context(path):
+            response = _serve_diagram(self.station_id, 'skew_t', self._render, 'Erreur')
+            self.assertEqual(response.mimetype, 'image/png')
+            self.assertEqual(response.get_data(), b'\x89PNG-test')
+            etag = response.get_etag()[0]
+
+        with self.app.test_request_context(path, headers={'If-None-Match': f'"{etag}"'}):
+            response = _serve_diagram(self.station_id, 'skew_t', self._render, 'Erreur')
+            self.assertEqual(response.status_code, 304)
+
+        with self.app.test_request_context(f'/api/metpy/diagrams/skewt/{self.station_id}'):
+            response = _serve_diagram(self.station_id, 'skew_t', self._render, 'Erreur')
+            payload = response.get_json()
+            self.assertTrue(payload['cached'])
+            self.assertEqual(payload['station'], 'Libreville')
+            self.assertTrue(payload['image'].startswith('data:image/png;base64,'))
+
+        self.assertEqual(self.renders, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# tests/test_diagram_renderer.py
+import unittest
+import os
+import sys
+import pickle
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation
+from app.utils import diagram_renderer
+from app.utils.diagram_renderer import RenderPool, RenderQueueFull
+from app.routes.metpy_diagrams import DiagramDataError
+from app.utils.skewt_background import SkewTTemplate, background_lines
+from matplotlib.figure import Figure
+from metpy.plots import SkewT
+from metpy.units import units
+
+def _render_name(station):
+    return b'png', {'station': station.name}
+
+class FakeExecutor:
+    """Pool factice : chaque instance applique au futur le comportement suivant de la liste"""
+    outcomes = []
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.shut_down = False
+        FakeExecutor.instances.append(self)
+
+    def submit(self, fn, *args):
+        outcome = FakeExecutor.outcomes.pop(0)
+        if outcome == 'submit_error':
+            raise RuntimeError('soumission impossible')
+        if outcome == 'submit_broken':
+            raise BrokenProcessPool('pool cassé')
+        future = Future()
+        if outcome == 'broken':
+            future.set_exception(BrokenProcessPool('processus mort'))
+        else:
+            future.set_result(((b'png', {}), 0.1))
+        return future
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+class RenderPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_eager_render_records_metrics(self):
+        self.app.config['DIAGRAM_RENDER_EAGER'] = True
+        pool = RenderPool()
+        with self.app.app_context():
+            png, payload = pool.render(_render_name, self.station_id)
+            metrics = pool.metrics()
+
+        self.assertEqual(payload, {'station': 'Libreville'})
+        self.assertEqual(metrics['completed'], 1)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_full_queue_rejected(self):
+        self.app.config['DIAGRAM_RENDER_MAX_QUEUE'] = 0
+        pool = RenderPool()
+        with self.app.app_context():
+            with self.assertRaises(RenderQueueFull):
+                pool.render(_render_name, self.station_id)
+            self.assertEqual(pool.metrics()['rejected'], 1)
+
+    def _pool_with_outcomes(self, *outcomes):
+        FakeExecutor.outcomes = list(outcomes)
+        FakeExecutor.instances = []
+        patcher = mock.patch.object(diagram_renderer, 'ProcessPoolExecutor', FakeExecutor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return RenderPool()
+
+    def test_failed_submit_releases_queue_slot(self):
+        self.app.config['DIAGRAM_RENDER_MAX_QUEUE'] = 1
+        pool = self._pool_with_outcomes('submit_error', 'submit_error', 'ok')
+        with self.app.app_context():
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    pool.render(_render_name, self.station_id)
+            self.assertEqual(pool.queue_depth, 0)
+            self.assertEqual(pool.render(_render_name, self.station_id), (b'png', {}))
+            self.assertEqual(pool.metrics()['failed'], 2)
+
+    def test_broken_pool_is_recreated(self):
+        pool = self._pool_with_outcomes('broken', 'submit_broken', 'ok')
+        with self.app.app_context():
+            with self.assertRaises(BrokenProcessPool):
+                pool.render(_render_name, self.station_id)
+            # Pool abandonné : la requête suivante en crée un nouveau, recréé
+            # encore une fois si la soumission trouve un pool cassé
+            self.assertEqual(pool.render(_render_name, self.station_id), (b'png', {}))
+            self.assertEqual(pool.queue_depth, 0)
+
+        self.assertEqual(len(FakeExecutor.instances), 3)
+        self.assertTrue(all(executor.shut_down for executor in FakeExecutor.instances[:2]))
+        self.assertFalse(FakeExecutor.instances[2].shut_down)
+
+    def test_data_error_keeps_status_across_processes(self):
+        error = pickle.loads(pickle.dumps(DiagramDataError('Aucune donnée disponible', 404)))
+        self.assertEqual(error.status, 404)
+        self.assertEqual(str(error), 'Aucune donnée disponible')
+
+class SkewTTemplateTestCase(unittest.TestCase):
+    def test_background_matches_metpy(self):
+        skew = SkewT(Figure(), rotation=45)
+        skew.ax.set_ylim(1000, 100)
+        skew.plot_moist_adiabats(t0=np.arange(233, 400, 5) * units.kelvin)
+
+        expected = skew.moist_adiabats.get_segments()
+        lines = background_lines()['moist_adiabats']
+        self.assertEqual(len(lines), len(expected))
+        np.testing.assert_allclose(lines[3], expected[3], rtol=1e-6)
+
+    def test_render_leaves_template_unchanged(self):
+        template = SkewTTemplate(figsize=(4, 5), dpi=50)
+
+        def draw(skew):
+            skew.plot([1000, 500] * units.hPa, [30, -10] * units.degC, 'r-', label='T')
+            skew.ax.set_title('Libreville')
+            skew.ax.legend()
+
+        first, _ = template.render(draw)
+        empty, _ = template.render(lambda skew: None)
+        second, _ = template.render(draw)
+
+        self.assertTrue(first.startswith(b'\x89PNG'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, empty)
+        self.assertIsNone(template.skew.ax.get_legend())
+
+if __name__ == '__main__':
+    unittest.main()
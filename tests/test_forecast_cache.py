@@ -0,0 +1,114 @@
+# tests/test_forecast_cache.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.forecast_cache import ForecastCache, forecast_key
+from app.routes.api import get_station_forecast
+
+class ForecastCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.latest = datetime(2024, 1, 1, 12)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def compute(self):
+        self.calls += 1
+        return [{'date': self.latest.date(), 'temperature': 27.0 + self.calls}]
+
+    def test_computed_once_per_key(self):
+        cache = ForecastCache(max_entries=10, ttl=60)
+
+        first, cached_first = cache.get_or_compute(1, 'method', 3, self.latest, self.compute, model_version=1)
+        first[0]['temperature'] = -99  # Les appelants reçoivent une copie
+        second, cached_second = cache.get_or_compute(1, 'method', 3, self.latest, self.compute, model_version=1)
+        _, cached_new_data = cache.get_or_compute(1, 'method', 3, self.latest + timedelta(hours=1),
+                                                  self.compute, model_version=1)
+        _, cached_new_model = cache.get_or_compute(1, 'method', 3, self.latest, self.compute, model_version=2)
+
+        self.assertEqual((cached_first, cached_second), (False, True))
+        self.assertEqual(second[0]['temperature'], 28.0)
+        self.assertFalse(cached_new_data)
+        self.assertFalse(cached_new_model)
+        self.assertEqual(self.calls, 3)
+
+    def test_ttl_lru_and_invalidation(self):
+        cache = ForecastCache(max_entries=2, ttl=0.05)
+        cache.get_or_compute(1, 'method', 3, self.latest, self.compute)
+        time.sleep(0.1)
+        self.assertFalse(cache.get_or_compute(1, 'method', 3, self.latest, self.compute)[1])
+
+        cache.get_or_compute(2, 'method', 3, self.latest, self.compute)
+        cache.get_or_compute(3, 'method', 3, self.latest, self.compute)
+        self.assertEqual(cache.metrics()['entries'], 2)
+
+        cache.invalidate([3])
+        self.assertIsNone(cache.get(forecast_key(3, 'method', 3, self.latest)))
+        self.assertIsNotNone(cache.get(forecast_key(2, 'method', 3, self.latest)))
+
+    def test_sqlite_tier_shared_between_workers(self):
+        path = os.path.join(self.tmp_dir, 'forecasts.db')
+        worker_a = ForecastCache(ttl=60, db_path=path)
+        worker_b = ForecastCache(ttl=60, db_path=path)
+
+        worker_a.get_or_compute(1, 'method', 3, self.latest, self.compute)
+        value, cached = worker_b.get_or_compute(1, 'method', 3, self.latest, self.compute)
+        self.assertTrue(cached)
+        self.assertEqual(value[0]['date'], self.latest.date())
+        self.assertEqual(worker_b.metrics()['disk_hits'], 1)
+
+        worker_a.invalidate([1])
+        self.assertIsNone(ForecastCache(ttl=60, db_path=path).get(forecast_key(1, 'method', 3, self.latest)))
+
+class StationForecastCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+            for day in range(6):
+                db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 1, 10 + day, 12),
+                                           temperature=26.0 + day % 3, humidity=80.0, precipitation=0.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def station_forecast(self):
+        with self.app.test_request_context():
+            return get_station_forecast(self.station_id).get_json()
+
+    def test_cached_until_new_observation(self):
+        first = self.station_forecast()
+        second = self.station_forecast()
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(first['forecast'], second['forecast'])
+
+        # Observation antérieure (rattrapage) : même dernière mesure, mais invalidation explicite
+        with self.app.app_context():
+            db.session.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 1, 1, 12),
+                                       temperature=25.0, humidity=80.0))
+            db.session.commit()
+
+        self.assertFalse(self.station_forecast()['cached'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# tests/test_keyset_pagination.py
+import unittest
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.user import User
+from app.models.agent import AgentDGM, Direction, Service, Prelevement
+from app.models.weather_data import WeatherStation
+from app.utils.keyset_pagination import (keyset_paginate, date_range_filters, encode_cursor,
+                                         decode_cursor, COUNT_EXACT)
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.app.config['PAGINATION_COUNT_LIMIT'] = 20
+
+        with self.app.app_context():
+            db.create_all()
+            direction = Direction(name='Estuaire')
+            db.session.add(direction)
+            db.session.flush()
+            service = Service(name='Observation', direction_id=direction.id)
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            user = User(username='agent_pagination', email='agent.pagination@dgm.ga', role='user')
+            db.session.add_all([service, station, user])
+            db.session.flush()
+            agent = AgentDGM(matricule='DGM200', user_id=user.id, date_naissance=date(1990, 1, 1),
+                             fonction='Observateur', service_id=service.id, station_id=station.id)
+            db.session.add(agent)
+            db.session.flush()
+
+            # 25 prélèvements, deux par créneau horaire (égalités de date départagées par id)
+            start = datetime(2024, 5, 1, 6, 0)
+            db.session.add_all([Prelevement(agent_id=agent.id, station_id=station.id,
+                                            date_prelevement=start + timedelta(hours=i // 2),
+                                            temperature=25.0)
+                                for i in range(25)])
+            db.session.commit()
+
+            self.expected = [row.id for row in Prelevement.query.order_by(
+                Prelevement.date_prelevement.desc(), Prelevement.id.desc())]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_walk_forward_and_back(self):
+        with self.app.app_context():
+            pages, cursor = [], None
+            while True:
+                page = keyset_paginate(Prelevement.query, per_page=10, after=cursor)
+                pages.append(page)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+
+            self.assertEqual([p.id for page in pages for p in page.items], self.expected)
+            self.assertEqual([len(page.items) for page in pages], [10, 10, 5])
+            self.assertFalse(pages[0].has_prev)
+
+            previous = keyset_paginate(Prelevement.query, per_page=10, before=pages[2].prev_cursor)
+            self.assertEqual([p.id for p in previous.items], self.expected[10:20])
+            self.assertTrue(previous.has_prev)
+            self.assertTrue(previous.has_next)
+
+    def test_seek_without_offset(self):
+        with self.app.app_context():
+            first = keyset_paginate(Prelevement.query, per_page=10)
+            statements = []
+            def count(*args):
+                statements.append((args[2], args[3]))
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                keyset_paginate(Prelevement.query, per_page=10, after=first.next_cursor, count_mode=None)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+
+            self.assertEqual(len(statements), 1)
+            sql, params = statements[0]
+            # Recherche par clé ; SQLite rend LIMIT ? OFFSET ? avec un décalage nul
+            self.assertIn('prelevement.date_prelevement < ?', sql)
+            self.assertEqual(params[-1], 0)
+
+    def test_counts_and_cursors(self):
+        with self.app.app_context():
+            approximate = keyset_paginate(Prelevement.query, per_page=10)
+            self.assertEqual(approximate.total_display, '20+')
+
+            exact = keyset_paginate(Prelevement.query, per_page=10, count_mode=COUNT_EXACT)
+            self.assertEqual((exact.total, exact.total_is_approximate), (25, False))
+
+            # Curseur invalide : retour à la première page
+            page = keyset_paginate(Prelevement.query, per_page=10, after='nimporte-quoi')
+            self.assertEqual([p.id for p in page.items], self.expected[:10])
+
+        key = (datetime(2024, 5, 1, 6, 30), 42)
+        self.assertEqual(decode_cursor(encode_cursor(*key)), key)
+
+    def test_date_range_filters(self):
+        with self.app.app_context():
+            query = Prelevement.query.filter(*date_range_filters(date(2024, 5, 1), date(2024, 5, 1)))
+            self.assertEqual(query.count(), 25)
+            query = Prelevement.query.filter(*date_range_filters(date_from=date(2024, 5, 2)))
+            self.assertEqual(query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# tests/test_latest_observations.py
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.latest_observations import get_latest_observations, get_stale_stations
+
+class LatestObservationsTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            now = datetime.now()
+            stations = []
+            for name in ['Libreville', 'Port-Gentil', 'Franceville']:
+                station = WeatherStation(name=name, latitude=0.4, longitude=9.4, region='Test')
+                db.session.add(station)
+                stations.append(station)
+            db.session.commit()
+
+            # Deux observations pour les deux premières stations, aucune pour la troisième
+            for offset, station in enumerate(stations[:2]):
+                db.session.add(WeatherData(station_id=station.id, timestamp=now - timedelta(hours=3),
+                                           temperature=20 + offset, humidity=80))
+                db.session.add(WeatherData(station_id=station.id, timestamp=now - timedelta(hours=1),
+                                           temperature=30 + offset, humidity=70))
+            db.session.commit()
+
+            self.station_ids = [s.id for s in stations]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_latest_per_station(self):
+        with self.app.app_context():
+            snapshot = get_latest_observations()
+
+            self.assertEqual(set(snapshot), set(self.station_ids[:2]))
+            self.assertEqual(snapshot[self.station_ids[0]].temperature, 30)
+            self.assertEqual(snapshot[self.station_ids[1]].temperature, 31)
+
+    def test_station_filter(self):
+        with self.app.app_context():
+            snapshot = get_latest_observations(station_ids=[self.station_ids[1]])
+            self.assertEqual(list(snapshot), [self.station_ids[1]])
+            self.assertEqual(get_latest_observations(station_ids=[]), {})
+
+    def test_current_endpoint(self):
+        response = self.client.get('/api/current')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.get_json()
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(sorted(d['temperature'] for d in payload['data']), [30.0, 31.0])
+
+    def test_stale_stations(self):
+        with self.app.app_context():
+            stale = get_stale_stations(datetime.now() - timedelta(hours=2), self.station_ids)
+            self.assertEqual([row.id for row in stale], [self.station_ids[2]])
+
+            stale = get_stale_stations(datetime.now(), self.station_ids[:2])
+            self.assertEqual(sorted(row.id for row in stale), self.station_ids[:2])
+
+    def test_freshness_endpoint(self):
+        response = self.client.get('/api/stations/freshness?hours=2')
+        self.assertEqual(response.status_code, 200)
+
+        stations = {s['id']: s for s in response.get_json()['stations']}
+        self.assertFalse(stations[self.station_ids[0]]['stale'])
+        self.assertTrue(stations[self.station_ids[2]]['stale'])
+        self.assertIsNone(stations[self.station_ids[2]]['last_observation'])
+
+        self.assertEqual(self.client.get('/api/stations/freshness?since=hier').status_code, 400)
+
+    def test_freshness_endpoint_aware_since(self):
+        # Seuil avec fuseau (UTC), il y a deux heures : converti en heure locale naïve
+        since = (datetime.now(timezone.utc) - timedelta(hours=2)).replace(microsecond=0)
+        for value in (since.isoformat().replace('+', '%2B'), since.strftime('%Y-%m-%dT%H:%M:%SZ')):
+            response = self.client.get(f'/api/stations/freshness?since={value}')
+            self.assertEqual(response.status_code, 200)
+
+            stations = {s['id']: s for s in response.get_json()['stations']}
+            self.assertFalse(stations[self.station_ids[0]]['stale'])
+            self.assertTrue(stations[self.station_ids[2]]['stale'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# tests/test_ml_features.py
+import unittest
+import os
+import sys
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from unittest import mock
+import numpy as np
+import pandas as pd
+import metpy.calc as mpcalc
+from app.routes.metpy_ml_forecasting import WeatherMLPredictor, build_future_targets, FORECAST_TARGETS
+from ml_feature_reference import make_observations, reference_prepare_features
+
+class PrepareFeaturesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.predictor = WeatherMLPredictor(registry=object())
+
+    def test_parity_with_reference(self):
+        observations = make_observations(200)
+        # Observations incomplètes : exclues des features mais prises en compte dans les tendances
+        observations[10].humidity = None
+        observations[20].temperature = None
+        observations[30].pressure = 0
+
+        expected = reference_prepare_features(observations).astype(float)
+        result = self.predictor.prepare_features(observations)
+
+        # L'index conserve la position des observations retenues
+        self.assertNotIn(10, result.index)
+        result = result.reset_index(drop=True)
+
+        self.assertEqual(list(result.columns), list(expected.columns))
+        self.assertFalse(result.isna().any().any())
+
+        # La référence produit NaN quand l'indice de chaleur est hors domaine (T < 26,7°C) :
+        # la version vectorisée y reprend la température de l'air
+        undefined = expected['heat_index'].isna()
+        self.assertTrue(undefined.any())
+        np.testing.assert_allclose(result.loc[undefined, 'heat_index'], result.loc[undefined, 'temperature'])
+
+        expected.loc[undefined, 'heat_index'] = expected.loc[undefined, 'temperature']
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+
+    def test_heat_index_below_threshold_is_temperature(self):
+        observations = make_observations(10, base_temperature=15.0)
+        result = self.predictor.prepare_features(observations)
+
+        np.testing.assert_allclose(result['heat_index'], result['temperature'])
+
+    def test_failure_falls_back_per_row(self):
+        observations = make_observations(20)
+        observations[5].temperature = 45.5
+        expected = self.predictor.prepare_features(observations)
+
+        dewpoint = mpcalc.dewpoint_from_relative_humidity
+        def failing_dewpoint(temperature, humidity):
+            # Échec MetPy provoqué par une seule ligne
+            if np.any(np.atleast_1d(temperature.magnitude) == 45.5):
+                raise ValueError('valeur rejetée')
+            return dewpoint(temperature, humidity)
+
+        with mock.patch.object(mpcalc, 'dewpoint_from_relative_humidity', failing_dewpoint):
+            result = self.predictor.prepare_features(observations)
+
+        # Seule la ligne en échec reçoit les valeurs par défaut
+        self.assertEqual(result.at[5, 'dewpoint'], 45.5 - 10)
+        self.assertEqual(result.at[5, 'mixing_ratio'], 0.01)
+        others = result.index != 5
+        pd.testing.assert_frame_equal(result[others], expected[others], rtol=1e-9)
+
+    def test_empty_input(self):
+        self.assertTrue(self.predictor.prepare_features([]).empty)
+
+class FutureTargetsTestCase(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        observations = make_observations(300, seed=1)
+        # Pas de temps irréguliers et lacunes
+        rng = np.random.default_rng(2)
+        offset = timedelta()
+        for obs in observations:
+            offset += timedelta(minutes=int(rng.integers(0, 50)))
+            obs.timestamp += offset
+        del observations[100:130]
+
+        targets = build_future_targets(observations)
+
+        for i, obs in enumerate(observations):
+            for target_name, (variable, hours) in FORECAST_TARGETS.items():
+                target_time = obs.timestamp + timedelta(hours=hours)
+                future = next((d for d in observations[i + 1:]
+                               if abs((d.timestamp - target_time).total_seconds()) < 3600), None)
+                value = targets.at[i, target_name]
+                if future is None:
+                    self.assertTrue(np.isnan(value), (i, target_name))
+                else:
+                    self.assertEqual(value, getattr(future, variable) or 0, (i, target_name))
+
+if __name__ == '__main__':
+    unittest.main()
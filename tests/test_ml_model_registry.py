@@ -0,0 +1,68 @@
+# tests/test_ml_model_registry.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from app.models.weather_data import WeatherData
+from app.utils.ml_model_registry import ModelRegistry
+from app.routes.metpy_ml_forecasting import WeatherMLPredictor
+
+class ModelRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.registry = ModelRegistry(self.base_dir, max_loaded=2)
+        self.metadata = {'feature_names': ['temperature'], 'mae': 0.5, 'r2': 0.9}
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def _model(self):
+        return LinearRegression().fit([[0.0], [1.0]], [0.0, 2.0])
+
+    def test_save_and_load_with_versions(self):
+        first = self.registry.save(1, 'temperature_6h', self._model(), StandardScaler(), self.metadata)
+        second = self.registry.save(1, 'temperature_6h', self._model(), StandardScaler(), self.metadata)
+        self.assertEqual((first['version'], second['version']), (1, 2))
+
+        # Un nouveau registre relit le modèle depuis le disque
+        entry = ModelRegistry(self.base_dir).load(1, 'temperature_6h')
+        self.assertEqual(entry['metadata']['version'], 2)
+        self.assertAlmostEqual(entry['model'].predict([[2.0]])[0], 4.0)
+
+        self.assertIsNone(self.registry.load(2, 'temperature_6h'))
+        self.assertEqual(self.registry.targets(1), ['temperature_6h'])
+
+    def test_lru_eviction(self):
+        for station_id in (1, 2, 3):
+            self.registry.save(station_id, 'pressure_6h', self._model(), StandardScaler(), self.metadata)
+            self.registry.load(station_id, 'pressure_6h')
+
+        self.assertEqual(list(self.registry._loaded), [(2, 'pressure_6h'), (3, 'pressure_6h')])
+
+    def test_reloads_model_saved_by_another_process(self):
+        self.registry.save(1, 'temperature_6h', self._model(), StandardScaler(), self.metadata)
+        self.assertEqual(self.registry.load(1, 'temperature_6h')['metadata']['version'], 1)
+
+        # Ré-entraînement dans un autre processus : registre distinct, aucune invalidation locale
+        ModelRegistry(self.base_dir).save(1, 'temperature_6h', self._model(), StandardScaler(), self.metadata)
+
+        self.assertEqual(self.registry.load(1, 'temperature_6h')['metadata']['version'], 2)
+
+    def test_predict_without_models_does_not_train(self):
+        predictor = WeatherMLPredictor(self.registry)
+        predictor.train_models = lambda *args, **kwargs: self.fail("entraînement dans predict")
+
+        observation = WeatherData(station_id=5, timestamp=datetime(2024, 1, 1, 12),
+                                  temperature=28.0, humidity=80.0, pressure=1010.0)
+        predictions, message = predictor.predict(observation, 5)
+        self.assertIsNone(predictions)
+
+if __name__ == '__main__':
+    unittest.main()
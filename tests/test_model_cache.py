@@ -0,0 +1,94 @@
+# tests/test_model_cache.py
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from app.utils.model_cache import ModelCache, save_model
+from app.utils.metpy_gabon import GabonMetPyCore
+
+def _fitted_model(slope):
+    x = np.arange(10, dtype=float).reshape(-1, 1)
+    return LinearRegression().fit(x, slope * x.ravel())
+
+class ModelCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'model.pkl')
+        self.cache = ModelCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_loaded_once_and_shared(self):
+        save_model(_fitted_model(2.0), self.path)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get(self.path))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(model is results[0] for model in results))
+        metrics = self.cache.metrics()
+        self.assertEqual(metrics['loads'], 1)
+        self.assertEqual(metrics['hits'], 7)
+        self.assertIsNotNone(metrics['files'][os.path.abspath(self.path)]['seconds'])
+
+    def test_reloaded_when_file_changes(self):
+        save_model(_fitted_model(2.0), self.path)
+        first = self.cache.get(self.path)
+
+        save_model(_fitted_model(3.0), self.path)
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 10 ** 9))
+        second = self.cache.get(self.path)
+
+        self.assertIsNot(first, second)
+        self.assertAlmostEqual(second.predict([[1.0]])[0], 3.0)
+        self.assertEqual(self.cache.metrics()['reloads'], 1)
+
+    def test_missing_file_and_mmap(self):
+        self.assertIsNone(self.cache.get(os.path.join(self.tmp_dir, 'absent.pkl')))
+
+        save_model(np.arange(1000, dtype=float), self.path)
+        array = ModelCache(mmap_mode='r').get(self.path)
+        self.assertIsInstance(array, np.memmap)
+
+class GabonModelsCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.core = GabonMetPyCore()
+        self.core.MODELS_DIR = self.tmp_dir
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_instances_share_models_and_see_retraining(self):
+        self.assertFalse(self.core._load_models())
+
+        self.core.models = {'temperature': _fitted_model(1.0), 'precipitation': _fitted_model(0.5)}
+        self.core._save_models()
+
+        other = GabonMetPyCore()
+        other.MODELS_DIR = self.tmp_dir
+        self.assertTrue(other._load_models())
+        self.assertTrue(self.core._load_models())
+        self.assertIs(other.models['temperature'], self.core.models['temperature'])
+
+        # Ré-entraînement dans un autre processus : nouveau fichier
+        path = self.core._model_path('temperature')
+        save_model(_fitted_model(4.0), path)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+
+        self.assertTrue(other._load_models())
+        self.assertAlmostEqual(other.models['temperature'].predict([[1.0]])[0], 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
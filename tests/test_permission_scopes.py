@@ -0,0 +1,128 @@
+# tests/test_permission_scopes.py
+import unittest
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_login import login_user
+from sqlalchemy import event
+from app import create_app, db
+from app.models.user import User
+from app.models.agent import AgentDGM, Direction, Service
+from app.models.weather_data import WeatherStation
+from app.utils.permission_scopes import permission_scopes
+from app.routes.dgm_hierarchy import get_user_permissions
+
+class PermissionScopesTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        permission_scopes.invalidate()
+
+        with self.app.app_context():
+            db.create_all()
+            direction = Direction(name='Estuaire')
+            db.session.add(direction)
+            db.session.flush()
+            service = Service(name='Observation', direction_id=direction.id)
+            other_service = Service(name='Prévision', direction_id=direction.id)
+            db.session.add_all([service, other_service])
+            stations = [WeatherStation(name=name, latitude=0.4, longitude=9.4, region=region)
+                        for name, region in [('Libreville', 'Estuaire'), ('Owendo', 'Estuaire'),
+                                             ('Oyem', 'Woleu-Ntem')]]
+            db.session.add_all(stations)
+            db.session.flush()
+
+            self.user = User(username='chef_scope', email='chef.scope@dgm.ga', role='user')
+            self.admin = User(username='admin_scope', email='admin.scope@dgm.ga', role='admin')
+            db.session.add_all([self.user, self.admin])
+            db.session.flush()
+            agent = AgentDGM(matricule='DGM001', user_id=self.user.id, date_naissance=date(1980, 1, 1),
+                             fonction='Chef de service', service_id=service.id, station_id=stations[2].id)
+            db.session.add(agent)
+            db.session.commit()
+
+            self.user_id, self.admin_id, self.agent_id = self.user.id, self.admin.id, agent.id
+            self.service_id, self.other_service_id = service.id, other_service.id
+            self.station_ids = [station.id for station in stations]
+            # Directions et services par défaut créés par create_app
+            self.total_services = Service.query.count()
+            self.total_stations = WeatherStation.query.count()
+
+    def tearDown(self):
+        permission_scopes.invalidate()
+        with self.app.app_context():
+            db.drop_all()
+
+    def permissions(self, user_id):
+        """Appelle la vue JSON des permissions et compte les requêtes SQL exécutées"""
+        statements = []
+        with self.app.test_request_context():
+            login_user(db.session.get(User, user_id))
+
+            def count(*args):
+                statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                payload = get_user_permissions.__wrapped__().get_json()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+        return payload, len(statements)
+
+    def test_chef_scope_is_cached(self):
+        payload, first_queries = self.permissions(self.user_id)
+        cached_payload, cached_queries = self.permissions(self.user_id)
+
+        self.assertTrue(payload['can_validate'])
+        self.assertEqual(payload['services_count'], 1)
+        self.assertEqual(payload['stations_count'], 2)  # Stations de la région de la direction
+        self.assertEqual(cached_payload, payload)
+        self.assertGreater(first_queries, 0)
+        self.assertEqual(cached_queries, 0)
+
+    def test_admin_sees_everything(self):
+        payload, _ = self.permissions(self.admin_id)
+        self.assertTrue(payload['can_manage_agents'])
+        self.assertEqual(payload['stations_count'], self.total_stations)
+        self.assertEqual(payload['services_count'], self.total_services)
+
+    def test_invalidated_when_fonction_changes(self):
+        self.permissions(self.user_id)
+
+        with self.app.app_context():
+            agent = db.session.get(AgentDGM, self.agent_id)
+            agent.fonction = 'Directeur'
+            db.session.commit()
+
+        payload, queries = self.permissions(self.user_id)
+        self.assertGreater(queries, 0)
+        self.assertTrue(payload['can_view_all_services'])
+        self.assertEqual(payload['services_count'], 2)
+
+    def test_invalidated_when_structure_changes(self):
+        self.permissions(self.admin_id)
+
+        with self.app.app_context():
+            db.session.add(WeatherStation(name='Lambaréné', latitude=-0.7, longitude=10.2,
+                                          region='Moyen-Ogooué'))
+            db.session.commit()
+
+        payload, _ = self.permissions(self.admin_id)
+        self.assertEqual(payload['stations_count'], self.total_stations + 1)
+
+    def test_agent_scope_limited_to_station(self):
+        with self.app.app_context():
+            agent = db.session.get(AgentDGM, self.agent_id)
+            agent.fonction = 'Observateur'
+            db.session.commit()
+
+        with self.app.app_context():
+            scope = permission_scopes.get(db.session.get(User, self.user_id))
+        self.assertEqual(scope['station_ids'], frozenset([self.station_ids[2]]))
+        self.assertEqual(scope['service_ids'], frozenset([self.service_id]))
+        self.assertFalse(scope['can_validate'])
+
+if __name__ == '__main__':
+    unittest.main()
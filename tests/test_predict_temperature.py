@@ -0,0 +1,83 @@
+# tests/test_predict_temperature.py
+import unittest
+import os
+import sys
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.utils.weather_utils import predict_temperature
+from app.routes.api import get_station_forecast
+
+def _history(base_date, days=10):
+    return [SimpleNamespace(timestamp=datetime.combine(base_date - timedelta(days=day), datetime.min.time()),
+                            temperature=26.0 + (day % 4) * 0.7, humidity=70.0 + day,
+                            precipitation=4.0 if day % 2 else 0.0)
+            for day in range(days)]
+
+class PredictTemperatureTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base_date = date(2024, 3, 15)
+        self.history = _history(self.base_date)
+
+    def test_deterministic_mode_is_reproducible(self):
+        first = predict_temperature(self.history, days_ahead=7, station_id=3,
+                                    base_date=self.base_date, deterministic=True)
+        second = predict_temperature(self.history, days_ahead=7, station_id=3,
+                                     base_date=self.base_date, deterministic=True)
+        other_station = predict_temperature(self.history, days_ahead=7, station_id=4,
+                                            base_date=self.base_date, deterministic=True)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other_station)
+        self.assertEqual([p['date'] for p in first],
+                         [self.base_date + timedelta(days=day) for day in range(1, 8)])
+
+    def test_values_within_bounds(self):
+        predictions = predict_temperature(self.history, days_ahead=14, station_id=1,
+                                          base_date=self.base_date, deterministic=True)
+        for prediction in predictions:
+            self.assertTrue(18 <= prediction['temperature'] <= 38)
+            self.assertTrue(50 <= prediction['humidity'] <= 95)
+            self.assertGreaterEqual(prediction['precipitation'], 0)
+            self.assertTrue(0 <= prediction['wind_direction'] <= 360)
+            self.assertIsInstance(prediction['temperature'], float)
+
+    def test_insufficient_history(self):
+        self.assertEqual(predict_temperature(self.history[:4], deterministic=True), [])
+
+class StationForecastETagTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Port-Gentil', latitude=-0.7, longitude=8.8, region='Ogooué-Maritime')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+            for day in range(6):
+                db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 2, 1 + day, 12),
+                                           temperature=27.0 + day % 2, humidity=85.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_etag_and_not_modified(self):
+        with self.app.test_request_context():
+            response = get_station_forecast(self.station_id)
+        etag = response.get_etag()[0]
+        self.assertTrue(etag)
+
+        with self.app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+            revalidated = get_station_forecast(self.station_id)
+        self.assertEqual(revalidated.status_code, 304)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_thermal_comfort_batch.py
+import unittest
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.routes.metpy_enhanced import thermal_comfort_batch, meteo_core
+from app.routes.metpy_api import thermal_analysis_station
+
+class ThermalComfortBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+            self.station_ids = []
+            for name, region, temperature in [('Libreville', 'Estuaire', 33.0),
+                                              ('Oyem', 'Woleu-Ntem', 22.0),
+                                              ('Franceville', 'Haut-Ogooué', None)]:
+                station = WeatherStation(name=name, latitude=0.4, longitude=9.4, region=region)
+                db.session.add(station)
+                db.session.commit()
+                self.station_ids.append(station.id)
+                if temperature is not None:
+                    for hour, offset in [(6, -3.0), (12, 0.0)]:
+                        db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 1, 1, hour),
+                                                   temperature=temperature + offset, humidity=75.0,
+                                                   wind_speed=10.0, pressure=1010.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_batch_matches_single_station_analysis(self):
+        with self.app.test_request_context('/api/v2/thermal-comfort/batch?station_ids=all'):
+            payload = thermal_comfort_batch().get_json()
+
+        by_station = {item['station']['id']: item for item in payload['thermal_comfort']}
+        self.assertEqual(set(by_station), set(self.station_ids[:2]))
+
+        libreville = by_station[self.station_ids[0]]
+        self.assertEqual(libreville['thermal_comfort'], meteo_core.analyze_thermal_stress(33.0, 75.0, 10.0))
+        self.assertEqual(libreville['timestamp'], datetime(2024, 1, 1, 12).isoformat())
+
+    def test_selected_ids_and_missing(self):
+        ids = [self.station_ids[1], self.station_ids[2], 9999]
+        with self.app.test_request_context('/api/v2/thermal-comfort/batch', method='POST',
+                                           json={'station_ids': ids}):
+            payload = thermal_comfort_batch().get_json()
+
+        self.assertEqual([item['station']['id'] for item in payload['thermal_comfort']], [self.station_ids[1]])
+        self.assertEqual(payload['missing_station_ids'], [self.station_ids[2], 9999])
+
+    def test_invalid_ids_rejected(self):
+        with self.app.test_request_context('/api/v2/thermal-comfort/batch?station_ids=1,abc'):
+            response, status = thermal_comfort_batch()
+        self.assertEqual(status, 400)
+
+    def test_single_station_analysis(self):
+        with self.app.test_request_context():
+            payload = thermal_analysis_station(self.station_ids[1]).get_json()
+            _, status = thermal_analysis_station(self.station_ids[2])
+
+        self.assertEqual(payload['thermal_analysis']['climate_zone'], 'NORTHERN')
+        self.assertEqual(payload['observation']['temperature'], 22.0)
+        self.assertEqual(status, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_thermo_kernel.py
+import unittest
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metpy.calc as mpcalc
+from metpy.units import units
+from app.utils import thermo_kernel
+from app.utils.metpy_gabon import GabonMetPyCore
+from app.utils.metpy_core import GabonMeteoCore
+
+class ThermoKernelTestCase(unittest.TestCase):
+    def setUp(self):
+        # Grille couvrant le climat gabonais (et au-delà)
+        t, rh = np.meshgrid(np.arange(10.0, 45.0, 1.5), np.arange(10.0, 100.0, 4.5))
+        self.temperature = t.ravel()
+        self.humidity = rh.ravel()
+        self.pressure = np.full_like(self.temperature, 1005.0)
+
+    def test_dewpoint_matches_metpy(self):
+        expected = mpcalc.dewpoint_from_relative_humidity(self.temperature * units.degC,
+                                                          self.humidity * units.percent)
+        np.testing.assert_allclose(thermo_kernel.dewpoint(self.temperature, self.humidity),
+                                   expected.to('degC').magnitude, atol=1e-6)
+
+    def test_heat_index_matches_metpy(self):
+        expected = mpcalc.heat_index(self.temperature * units.degC, self.humidity * units.percent)
+        defined = ~np.ma.getmaskarray(expected)
+
+        result = thermo_kernel.heat_index(self.temperature, self.humidity)
+
+        np.testing.assert_allclose(result[defined], expected.to('degC').magnitude[defined], atol=1e-6)
+        # Indice non défini sous 80 °F : température de l'air
+        np.testing.assert_allclose(result[~defined], self.temperature[~defined])
+
+    def test_equivalent_potential_temperature_matches_metpy(self):
+        dewpoint = mpcalc.dewpoint_from_relative_humidity(self.temperature * units.degC,
+                                                          self.humidity * units.percent)
+        expected = mpcalc.equivalent_potential_temperature(self.pressure * units.hPa,
+                                                           self.temperature * units.degC, dewpoint)
+        result = thermo_kernel.equivalent_potential_temperature(
+            self.pressure, self.temperature, thermo_kernel.dewpoint(self.temperature, self.humidity))
+        np.testing.assert_allclose(result, expected.to('kelvin').magnitude, rtol=1e-6)
+
+    def test_wet_bulb_close_to_metpy(self):
+        # Approximation de Stull : tolérance de 1 °C sur quelques points tropicaux
+        for t, rh in [(24.0, 90.0), (28.0, 80.0), (32.0, 65.0), (35.0, 40.0)]:
+            dewpoint = mpcalc.dewpoint_from_relative_humidity(t * units.degC, rh * units.percent)
+            expected = mpcalc.wet_bulb_temperature(1013.25 * units.hPa, t * units.degC, dewpoint)
+            self.assertAlmostEqual(thermo_kernel.wet_bulb_temperature(t, rh),
+                                   expected.to('degC').magnitude, delta=1.0)
+
+    def test_scalar_inputs_return_floats(self):
+        self.assertIsInstance(thermo_kernel.heat_index(32.0, 70.0), float)
+        self.assertIsInstance(thermo_kernel.dewpoint(30, 70), float)
+        self.assertTrue(np.isnan(thermo_kernel.dewpoint(None, 70)))
+
+class CoreThermodynamicsTestCase(unittest.TestCase):
+    def test_cores_use_kernel(self):
+        expected = mpcalc.heat_index(32 * units.degC, 70 * units.percent).to('degC').magnitude[0]
+        self.assertAlmostEqual(GabonMetPyCore().calculate_heat_index(32, 70), expected, places=6)
+        self.assertAlmostEqual(GabonMeteoCore().calculate_heat_index(32, 70), expected, places=6)
+        self.assertAlmostEqual(GabonMeteoCore().calculate_dewpoint(30, 70),
+                               GabonMetPyCore().calculate_dewpoint(30, 70))
+
+    def test_gabon_features_vectorised(self):
+        rows = 100000
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'timestamp': pd.date_range('2023-01-01', periods=rows, freq='h'),
+            'temperature': rng.uniform(20, 35, rows),
+            'humidity': rng.uniform(60, 100, rows)
+        })
+
+        started = time.perf_counter()
+        features = GabonMetPyCore()._create_gabon_features(df)
+        elapsed = time.perf_counter() - started
+
+        expected = GabonMetPyCore().calculate_heat_index(df['temperature'].iloc[5], df['humidity'].iloc[5])
+        self.assertAlmostEqual(features['heat_index'].iloc[5], expected)
+        self.assertLess(elapsed, 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# tests/test_training_jobs.py
+import unittest
+import os
+import sys
+import socket
+import subprocess
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation
+from app.models.training_job import TrainingJob, JOB_QUEUED, JOB_RUNNING, JOB_FAILED
+from app.utils import training_jobs
+from app.utils.training_jobs import (submit_training_job, train_all_stations, plan_workers, recover_orphaned_jobs,
+                                    job_core_budget, process_identity, JOB_STATION_MODELS, JOB_GABON_MODELS)
+
+class TrainingJobsTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.app.config['TRAINING_JOBS_EAGER'] = True
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_job_runs_and_records_outcome(self):
+        with self.app.app_context():
+            job, created = submit_training_job(JOB_STATION_MODELS, self.station_id, params={'days_back': 30})
+
+            self.assertTrue(created)
+            job = db.session.get(TrainingJob, job.id)
+            # Aucune observation : échec enregistré, pas d'exception
+            self.assertEqual(job.status, JOB_FAILED)
+            self.assertIn('insuffisantes', job.message)
+            self.assertIsNotNone(job.duration)
+            self.assertEqual(job.to_dict()['params'], {'days_back': 30})
+            self.assertEqual(job.owner, process_identity())
+            self.assertIsNotNone(job.updated_at)
+
+    def test_duplicate_request_returns_active_job(self):
+        with self.app.app_context():
+            running = TrainingJob(kind=JOB_STATION_MODELS, station_id=self.station_id,
+                                  dedupe_key=f'{JOB_STATION_MODELS}:{self.station_id}',
+                                  status=JOB_RUNNING, started_at=datetime.utcnow())
+            db.session.add(running)
+            db.session.commit()
+
+            job, created = submit_training_job(JOB_STATION_MODELS, self.station_id)
+
+            self.assertFalse(created)
+            self.assertEqual(job.id, running.id)
+            self.assertEqual(TrainingJob.query.count(), 1)
+
+    def test_orphaned_job_does_not_block_station(self):
+        with self.app.app_context():
+            # Travail resté « running » après un redémarrage du serveur
+            orphan = TrainingJob(kind=JOB_STATION_MODELS, station_id=self.station_id,
+                                 dedupe_key=f'{JOB_STATION_MODELS}:{self.station_id}',
+                                 status=JOB_RUNNING, started_at=datetime.utcnow() - timedelta(hours=3))
+            db.session.add(orphan)
+            db.session.commit()
+
+            job, created = submit_training_job(JOB_STATION_MODELS, self.station_id)
+
+            self.assertTrue(created)
+            self.assertNotEqual(job.id, orphan.id)
+            orphan = db.session.get(TrainingJob, orphan.id)
+            self.assertEqual(orphan.status, JOB_FAILED)
+            self.assertIn('abandonné', orphan.message)
+
+    def test_dead_worker_marks_job_failed(self):
+        with self.app.app_context():
+            job = TrainingJob(kind=JOB_STATION_MODELS, station_id=self.station_id,
+                              dedupe_key=f'{JOB_STATION_MODELS}:{self.station_id}', status=JOB_QUEUED)
+            db.session.add(job)
+            db.session.commit()
+            job_id = job.id
+
+            # Pool interrompu : le future se termine sans que le travail ait écrit son résultat
+            future = Future()
+            training_jobs._dispatched[job_id] = future
+            self.assertEqual(recover_orphaned_jobs(), [])
+            future.set_exception(BrokenProcessPool('processus tué'))
+            self.assertEqual([j.id for j in recover_orphaned_jobs()], [job_id])
+
+            db.session.expire_all()
+            self.assertEqual(db.session.get(TrainingJob, job_id).status, JOB_FAILED)
+            self.assertNotIn(job_id, training_jobs._dispatched)
+
+    def test_job_of_stopped_process_fails_at_startup(self):
+        # Processus terminé : son pid n'existe plus
+        stopped = subprocess.Popen([sys.executable, '-c', 'pass'])
+        stopped.wait()
+
+        with self.app.app_context():
+            job = TrainingJob(kind=JOB_STATION_MODELS, station_id=self.station_id,
+                              dedupe_key=f'{JOB_STATION_MODELS}:{self.station_id}', status=JOB_QUEUED,
+                              owner=f'{socket.gethostname()}:{stopped.pid}')
+            elsewhere = TrainingJob(kind=JOB_GABON_MODELS, station_id=self.station_id,
+                                    dedupe_key=f'{JOB_GABON_MODELS}:{self.station_id}', status=JOB_QUEUED,
+                                    owner=f'autre-serveur:{stopped.pid}')
+            db.session.add_all([job, elsewhere])
+            db.session.commit()
+
+            # Récemment créé, bien avant TRAINING_JOB_TIMEOUT : échoue quand même
+            self.assertEqual([j.id for j in recover_orphaned_jobs()], [job.id])
+            self.assertIn('arrêté', job.message)
+            self.assertEqual(elsewhere.status, JOB_QUEUED)
+
+    def test_silent_running_job_fails(self):
+        with self.app.app_context():
+            self.app.config['TRAINING_JOB_HEARTBEAT_TIMEOUT'] = 60
+            started = datetime.utcnow() - timedelta(minutes=10)
+            silent = TrainingJob(kind=JOB_STATION_MODELS, station_id=self.station_id,
+                                 dedupe_key=f'{JOB_STATION_MODELS}:{self.station_id}', status=JOB_RUNNING,
+                                 owner='autre-serveur:1', started_at=started, updated_at=started)
+            alive = TrainingJob(kind=JOB_GABON_MODELS, station_id=self.station_id,
+                                dedupe_key=f'{JOB_GABON_MODELS}:{self.station_id}', status=JOB_RUNNING,
+                                owner='autre-serveur:2', started_at=started, updated_at=datetime.utcnow())
+            db.session.add_all([silent, alive])
+            db.session.commit()
+
+            self.assertEqual([j.id for j in recover_orphaned_jobs()], [silent.id])
+            self.assertIn('pulsation', silent.message)
+            self.assertEqual(alive.status, JOB_RUNNING)
+
+    def test_plan_workers_avoids_oversubscription(self):
+        self.assertEqual(plan_workers(10, cpu_count=8), (8, 1))
+        self.assertEqual(plan_workers(2, cpu_count=8), (2, 4))
+        self.assertEqual(plan_workers(10, max_workers=3, cpu_count=8), (3, 2))
+        self.assertEqual(plan_workers(0, cpu_count=8), (1, 8))
+
+    def test_job_core_budget_shares_cores(self):
+        with self.app.app_context():
+            self.app.config['TRAINING_WORKERS'] = 2
+            self.assertEqual(job_core_budget(cpu_count=8), 4)
+
+            # Trois travaux déjà en cours : le budget tient compte de tous
+            for station in range(3):
+                db.session.add(TrainingJob(kind=JOB_STATION_MODELS, dedupe_key=f'test:{station}',
+                                           status=JOB_RUNNING, started_at=datetime.utcnow()))
+            db.session.commit()
+            self.assertEqual(job_core_budget(cpu_count=8), 2)
+            self.assertEqual(plan_workers(10, cpu_count=job_core_budget(cpu_count=8)), (2, 1))
+
+    def test_train_all_report(self):
+        with self.app.app_context():
+            report = train_all_stations(max_workers=1)
+
+            self.assertEqual(report['stations'], 1)
+            self.assertEqual(report['failed'], 1)
+            self.assertEqual(report['results'][0]['station_id'], self.station_id)
+            self.assertIn('wall_time_seconds', report)
+            self.assertIn('station_seconds_total', report)
+            self.assertIn('estimated_speedup', report)
+
+    def test_unknown_kind(self):
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                submit_training_job('inconnu', self.station_id)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# tests/test_weather_rollups.py
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.weather_rollup import WeatherDataHourly, WeatherDataDaily
+from app.utils.weather_rollups import rebuild_rollups
+
+class RollupsTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+        with self.app.app_context():
+            db.create_all()
+
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+
+            db.session.add_all([
+                WeatherData(station_id=station.id, timestamp=datetime(2024, 3, 1, 10, 5), temperature=26.0, humidity=80),
+                WeatherData(station_id=station.id, timestamp=datetime(2024, 3, 1, 10, 45), temperature=28.0, humidity=None),
+            ])
+            db.session.commit()
+
+            db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 3, 1, 14, 0), temperature=31.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def _assert_rollups(self):
+        hourly = WeatherDataHourly.query.filter_by(station_id=self.station_id).order_by(WeatherDataHourly.hour).all()
+        self.assertEqual([h.hour for h in hourly], [datetime(2024, 3, 1, 10), datetime(2024, 3, 1, 14)])
+        self.assertEqual(hourly[0].record_count, 2)
+        self.assertEqual(hourly[0].mean('temperature'), 27.0)
+        self.assertEqual(hourly[0].count('humidity'), 1)
+
+        daily = WeatherDataDaily.query.filter_by(station_id=self.station_id).one()
+        self.assertEqual(daily.record_count, 3)
+        self.assertEqual(daily.temperature_min, 26.0)
+        self.assertEqual(daily.temperature_max, 31.0)
+        self.assertEqual(daily.humidity_nulls, 2)
+
+    def test_incremental_rollups(self):
+        with self.app.app_context():
+            self._assert_rollups()
+
+    def test_rebuild_matches_incremental(self):
+        with self.app.app_context():
+            self.assertEqual(rebuild_rollups(), (2, 1))
+            self._assert_rollups()
+
+    def test_updates_and_deletes_recompute_rollups(self):
+        with self.app.app_context():
+            first, second, third = WeatherData.query.order_by(WeatherData.timestamp).all()
+            second.temperature = 20.0
+            third.timestamp = datetime(2024, 3, 2, 8, 0)   # Changement d'heure et de jour
+            db.session.delete(first)
+            db.session.commit()
+
+            hourly = {h.hour: h for h in WeatherDataHourly.query.filter_by(station_id=self.station_id)}
+            self.assertEqual(hourly[datetime(2024, 3, 1, 10)].record_count, 1)
+            self.assertEqual(hourly[datetime(2024, 3, 1, 10)].temperature_min, 20.0)
+            self.assertEqual(hourly[datetime(2024, 3, 1, 14)].record_count, 0)
+            self.assertEqual(hourly[datetime(2024, 3, 2, 8)].temperature_max, 31.0)
+
+            daily = {d.day: d for d in WeatherDataDaily.query.filter_by(station_id=self.station_id)}
+            self.assertEqual(daily[datetime(2024, 3, 1).date()].record_count, 1)
+            self.assertEqual(daily[datetime(2024, 3, 1).date()].temperature_max, 20.0)
+            self.assertEqual(daily[datetime(2024, 3, 2).date()].record_count, 1)
+
+            # Une nouvelle observation s'ajoute à l'agrégat recalculé
+            db.session.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 3, 1, 10, 30),
+                                       temperature=22.0))
+            db.session.commit()
+            hourly = WeatherDataHourly.query.filter_by(station_id=self.station_id,
+                                                       hour=datetime(2024, 3, 1, 10)).one()
+            self.assertEqual((hourly.record_count, hourly.temperature_max), (2, 22.0))
+
+class RollupConcurrencyTestCase(unittest.TestCase):
+    def setUp(self):
+        # Fichier temporaire : chaque session a sa propre connexion
+        self.directory = tempfile.TemporaryDirectory()
+        uri = f"sqlite:///{os.path.join(self.directory.name, 'rollups.db')}"
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': uri})
+
+        with self.app.app_context():
+            db.create_all()
+            station = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            db.session.add(station)
+            db.session.commit()
+            self.station_id = station.id
+            db.session.add(WeatherData(station_id=station.id, timestamp=datetime(2024, 3, 1, 10, 0), temperature=26.0))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_two_sessions_do_not_lose_counts(self):
+        with self.app.app_context():
+            other = db.session.session_factory()
+            try:
+                # L'autre session a déjà chargé l'agrégat avant l'écriture de la première
+                stale = other.query(WeatherDataHourly).filter_by(station_id=self.station_id).one()
+                self.assertEqual(stale.record_count, 1)
+
+                db.session.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 3, 1, 10, 20),
+                                           temperature=30.0))
+                db.session.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 3, 1, 16, 0),
+                                           temperature=29.0))
+                db.session.commit()
+
+                other.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 3, 1, 10, 50),
+                                      temperature=24.0))
+                other.add(WeatherData(station_id=self.station_id, timestamp=datetime(2024, 3, 1, 16, 30),
+                                      temperature=31.0))
+                other.commit()
+                self.assertEqual(stale.record_count, 3)
+            finally:
+                other.close()
+
+            hourly = {h.hour: h for h in WeatherDataHourly.query.filter_by(station_id=self.station_id)}
+            self.assertEqual(hourly[datetime(2024, 3, 1, 10)].record_count, 3)
+            self.assertEqual((hourly[datetime(2024, 3, 1, 10)].temperature_min,
+                              hourly[datetime(2024, 3, 1, 10)].temperature_max), (24.0, 30.0))
+            self.assertEqual(hourly[datetime(2024, 3, 1, 16)].record_count, 2)
+            self.assertEqual(hourly[datetime(2024, 3, 1, 16)].mean('temperature'), 30.0)
+            daily = WeatherDataDaily.query.filter_by(station_id=self.station_id).one()
+            self.assertEqual((daily.record_count, daily.temperature_sum), (5, 140.0))
+
+if __name__ == '__main__':
+    unittest.main()
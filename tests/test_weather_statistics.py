@@ -0,0 +1,75 @@
+# tests/test_weather_statistics.py
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.weather_data import WeatherStation, WeatherData
+from app.models.weather_rollup import WeatherDataHourly, WeatherDataDaily
+
+class StatisticsTestCase(unittest.TestCase):
+    def setUp(self):
+        # Base en mémoire : la base de développement n'est jamais touchée
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            now = datetime.now()
+            lbv = WeatherStation(name='Libreville', latitude=0.4, longitude=9.4, region='Estuaire')
+            pog = WeatherStation(name='Port-Gentil', latitude=-0.7, longitude=8.8, region='Ogooué-Maritime')
+            db.session.add_all([lbv, pog])
+            db.session.commit()
+
+            rows = [
+                (lbv.id, 1, 26.0, 2.0, 80),
+                (lbv.id, 2, 30.0, 0.0, None),
+                (pog.id, 1, 28.0, None, 90),
+                # Hors période
+                (pog.id, 400, 10.0, 50.0, 10),
+            ]
+            for station_id, days_ago, temp, precip, hum in rows:
+                db.session.add(WeatherData(station_id=station_id, timestamp=now - timedelta(days=days_ago),
+                                           temperature=temp, precipitation=precip, humidity=hum))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_statistics_shape_and_values(self):
+        response = self.client.get('/api/statistics?days=30')
+        self.assertEqual(response.status_code, 200)
+
+        stats = response.get_json()['statistics']
+
+        lbv = stats['stations']['Libreville']
+        self.assertEqual(lbv['temperature'], {'avg': 28.0, 'min': 26.0, 'max': 30.0})
+        self.assertEqual(lbv['precipitation'], {'total': 2.0, 'avg': 1.0, 'max': 2.0})
+        self.assertEqual(lbv['humidity'], {'avg': 80.0})
+
+        pog = stats['stations']['Port-Gentil']
+        self.assertEqual(pog['precipitation'], {'total': None, 'avg': None, 'max': None})
+
+        glob = stats['global']
+        self.assertEqual(glob['temperature'], {'avg': 28.0, 'min': 26.0, 'max': 30.0})
+        self.assertEqual(glob['precipitation'], {'total': 2.0, 'avg': 1.0, 'max': 2.0})
+        self.assertEqual(glob['humidity'], {'avg': 85.0})
+
+    def test_history_without_rollups_falls_back_to_raw(self):
+        with self.app.app_context():
+            # Base existante : observations antérieures aux tables de cumul
+            WeatherDataDaily.query.delete()
+            WeatherDataHourly.query.delete()
+            db.session.commit()
+
+        payload = self.client.get('/api/statistics?days=30').get_json()['statistics']
+        self.assertEqual(payload['stations']['Libreville']['temperature'], {'avg': 28.0, 'min': 26.0, 'max': 30.0})
+        self.assertEqual(payload['global']['humidity'], {'avg': 85.0})
+
+if __name__ == '__main__':
+    unittest.main()